@@ -0,0 +1,136 @@
+"""
+Transaction modes for booking creation under contention (Postgres only).
+
+BOOKING_TXN_MODE:
+    advisory      per-Eastern-day pg_advisory_xact_lock; concurrent bookings for
+                  the same day run their check-then-insert one at a time (default)
+    serializable  SERIALIZABLE isolation, retried on serialization failure or
+                  deadlock up to BOOKING_TXN_MAX_RETRIES times
+    off           plain READ COMMITTED (bookings_no_overlap still rejects overlaps)
+
+Lock wait and retry counters are served at GET /api/admin/booking-contention.
+Concurrency tests (throwaway Postgres database): tests/test_booking_txn.py.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.timezone import eastern_wall_clock
+
+logger = logging.getLogger(__name__)
+
+BOOKING_TXN_MODE = os.environ.get("BOOKING_TXN_MODE", "advisory").strip().lower()
+BOOKING_TXN_MAX_RETRIES = int(os.environ.get("BOOKING_TXN_MAX_RETRIES", "5"))
+# First key of the two-int advisory lock, so day locks don't collide with other users
+ADVISORY_LOCK_NAMESPACE = 0x426B
+# serialization_failure, deadlock_detected
+RETRYABLE_PGCODES = ("40001", "40P01")
+BUSY_MESSAGE = "Many people are booking this time right now. Please try again."
+
+T = TypeVar("T")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "transactions": 0,
+    "lock_waits": 0,
+    "lock_wait_ms_total": 0.0,
+    "lock_wait_ms_max": 0.0,
+    "retries": 0,
+    "retries_exhausted": 0,
+    "rejected": 0,
+}
+
+
+def _record(**deltas) -> None:
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    waits = out["lock_waits"]
+    out["lock_wait_ms_avg"] = round(out["lock_wait_ms_total"] / waits, 3) if waits else None
+    out["lock_wait_ms_total"] = round(out["lock_wait_ms_total"], 3)
+    out["lock_wait_ms_max"] = round(out["lock_wait_ms_max"], 3)
+    out["mode"] = BOOKING_TXN_MODE
+    out["max_retries"] = BOOKING_TXN_MAX_RETRIES
+    return out
+
+
+def lock_days(span_start: datetime, span_end: datetime) -> list[int]:
+    """Ordinals of every Eastern day [span_start, span_end) touches, ascending."""
+    first = eastern_wall_clock(span_start).date()
+    last = eastern_wall_clock(span_end - timedelta(microseconds=1)).date()
+    return [first.toordinal() + i for i in range((last - first).days + 1)]
+
+
+def _take_day_locks(db: Session, span_start: datetime, span_end: datetime) -> None:
+    started = time.perf_counter()
+    # Ascending order so two multi-day bookings can't deadlock on each other
+    for day in lock_days(span_start, span_end):
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:ns, :day)"),
+            {"ns": ADVISORY_LOCK_NAMESPACE, "day": day},
+        )
+    waited_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats["lock_waits"] += 1
+        _stats["lock_wait_ms_total"] += waited_ms
+        if waited_ms > _stats["lock_wait_ms_max"]:
+            _stats["lock_wait_ms_max"] = waited_ms
+
+
+def _is_retryable(e: DBAPIError) -> bool:
+    return getattr(e.orig, "pgcode", None) in RETRYABLE_PGCODES
+
+
+def _run_serializable(db: Session, work: Callable[[], T]) -> T:
+    attempt = 0
+    while True:
+        # Isolation can only be set before the transaction's first statement
+        db.rollback()
+        db.connection(execution_options={"isolation_level": "SERIALIZABLE"})
+        try:
+            return work()
+        except DBAPIError as e:
+            db.rollback()
+            if not _is_retryable(e):
+                raise
+            if attempt >= BOOKING_TXN_MAX_RETRIES:
+                _record(retries_exhausted=1)
+                logger.warning("booking transaction gave up after %d retries", attempt)
+                raise ValueError(BUSY_MESSAGE)
+            attempt += 1
+            _record(retries=1)
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+
+
+def run(db: Session, span_start: datetime, span_end: datetime, work: Callable[[], T]) -> T:
+    """Run work() (check, insert, commit) under the configured mode for this span.
+
+    work must build its ORM objects itself: in serializable mode it may run
+    more than once. A ValueError from work is counted as a rejected booking.
+    """
+    _record(transactions=1)
+    postgres = db.bind.dialect.name == "postgresql"
+    try:
+        if postgres and BOOKING_TXN_MODE == "serializable":
+            return _run_serializable(db, work)
+        if postgres and BOOKING_TXN_MODE == "advisory":
+            _take_day_locks(db, span_start, span_end)
+        return work()
+    except ValueError:
+        # Also releases advisory locks held by this transaction
+        db.rollback()
+        _record(rejected=1)
+        raise
@@ -0,0 +1,223 @@
+"""
+In-process caches and per-table generation counters.
+
+Every commit bumps the generation of each table it wrote (tracked from ORM
+flushes and bulk insert/update/delete statements). Callers put the
+generations they depend on into the cache key, so a write makes older entries
+unreachable at once; TTL bounds staleness for writes made by other processes
+(other Lambda instances, psql).
+
+Tables registered with share_versions() also get a row in table_versions,
+incremented in the same transaction as the write. shared_versions() reads
+those rows (at most once per TTL, and right after a local write), so every
+instance sees the same version for the same data; app.http_cache builds
+ETags from them. While table_versions doesn't exist (a database that predates
+it), writes skip the bump and shared_versions() falls back to this process's
+generations instead of failing the request.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_generations: dict[str, int] = {}
+_generations_lock = threading.Lock()
+_caches: dict[str, "TTLCache"] = {}
+
+_MISSING = object()
+
+
+def generation(*tables: str) -> tuple[int, ...]:
+    """Current generation of each table (0 until first write in this process)."""
+    return tuple(_generations.get(t, 0) for t in tables)
+
+
+def bump(*tables: str) -> None:
+    with _generations_lock:
+        for t in tables:
+            _generations[t] = _generations.get(t, 0) + 1
+
+
+# Tables whose writes bump table_versions, and this process's last read of it
+_shared_tables: set[str] = set()
+_shared_versions: dict[str, int] = {}
+_shared_loaded_at = float("-inf")
+_shared_lock = threading.Lock()
+
+# Whether table_versions exists (None = not checked); a miss is re-checked after this many seconds
+_shared_table_exists: Optional[bool] = None
+_shared_table_checked_at = float("-inf")
+SHARED_TABLE_RECHECK_SECONDS = 60.0
+
+_CREATE_SHARED = text(
+    "CREATE TABLE IF NOT EXISTS table_versions "
+    "(table_name VARCHAR(64) PRIMARY KEY, version BIGINT NOT NULL DEFAULT 0)"
+)
+_BUMP_SHARED = text(
+    "INSERT INTO table_versions (table_name, version) VALUES (:table, 1) "
+    "ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1"
+)
+
+
+def share_versions(*tables: str) -> None:
+    """Keep a shared (cross-instance) version for these tables from now on."""
+    _shared_tables.update(tables)
+
+
+def ensure_shared_table(engine) -> None:
+    """Create table_versions if missing (for startup paths that skip create_all)."""
+    global _shared_table_exists
+    with engine.begin() as conn:
+        conn.execute(_CREATE_SHARED)
+    _shared_table_exists = True
+
+
+def _has_shared_table(session: Session) -> bool:
+    """Catalog check, so a missing table never aborts the caller's transaction."""
+    global _shared_table_exists, _shared_table_checked_at
+    if _shared_table_exists:
+        return True
+    now = time.monotonic()
+    if now - _shared_table_checked_at > SHARED_TABLE_RECHECK_SECONDS:
+        _shared_table_checked_at = now
+        _shared_table_exists = inspect(session.connection()).has_table("table_versions")
+        if not _shared_table_exists:
+            logger.warning("table_versions is missing; using per-process generations for shared versions")
+    return bool(_shared_table_exists)
+
+
+def shared_versions(db: Session, tables: tuple[str, ...], ttl: float) -> tuple[int, ...]:
+    """table_versions for tables (0 if never written), re-read at most once per ttl seconds.
+
+    Without the table, this process's generation() of the tables instead.
+    """
+    global _shared_versions, _shared_loaded_at
+    now = time.monotonic()
+    if not _has_shared_table(db):
+        return generation(*tables)
+    if now - _shared_loaded_at > ttl:
+        rows = db.execute(text("SELECT table_name, version FROM table_versions")).all()
+        with _shared_lock:
+            _shared_versions = {name: version for name, version in rows}
+            _shared_loaded_at = now
+    versions = _shared_versions
+    return tuple(versions.get(t, 0) for t in tables)
+
+
+class TTLCache:
+    """Thread-safe LRU with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+        }
+
+
+def all_stats() -> dict:
+    """Stats for every cache plus the current table generations."""
+    return {
+        "caches": [c.stats() for c in _caches.values()],
+        "generations": dict(_generations),
+        "shared_versions": dict(_shared_versions),
+    }
+
+
+def _written_tables(session: Session) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            tables.add(table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_shared_in_transaction(session):
+    if not _shared_tables:
+        return
+    if session.new or session.dirty or session.deleted:
+        # Commit flushes after this hook; flush now so those writes are tracked too
+        session.flush()
+    # Sorted: two transactions bumping the same rows lock them in the same order
+    tables = sorted(session.info.get("written_tables", set()) & _shared_tables)
+    if not tables or not _has_shared_table(session):
+        return
+    for table in tables:
+        session.execute(_BUMP_SHARED, {"table": table})
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    global _shared_loaded_at
+    tables = session.info.pop("written_tables", None)
+    if tables:
+        bump(*tables)
+        if tables & _shared_tables:
+            # Our own write is visible on the next read, not after the TTL
+            _shared_loaded_at = float("-inf")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("written_tables", None)
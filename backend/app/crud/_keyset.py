@@ -0,0 +1,46 @@
+"""
+Helpers shared by the crud modules: keyset pagination cursors and a cached
+probe for Postgres-only columns added by the startup migrations.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# (table, column) -> present; probed once per process
+_known_columns: dict[tuple[str, str], bool] = {}
+
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    """Opaque keyset position after the row at (position, row_id)."""
+    raw = json.dumps([position.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """(position, row_id) from encode_cursor; ValueError if the cursor is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(position), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def has_column(db: Session, table: str, column: str) -> bool:
+    """True on Postgres once table.column exists (e.g. a generated tsvector or range column)."""
+    key = (table, column)
+    if key not in _known_columns:
+        _known_columns[key] = db.bind.dialect.name == "postgresql" and (
+            db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = :table AND column_name = :column"
+                ),
+                {"table": table, "column": column},
+            ).first()
+            is not None
+        )
+    return _known_columns[key]
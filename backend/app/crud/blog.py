@@ -0,0 +1,57 @@
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session, load_only
+
+from app import models
+from app.crud._keyset import has_column
+
+SEARCH_CONFIG = "english"
+
+# Columns a list or search result needs; content stays in the database
+SUMMARY_COLUMNS = (
+    models.BlogPost.id,
+    models.BlogPost.title,
+    models.BlogPost.slug,
+    models.BlogPost.excerpt,
+    models.BlogPost.image_url,
+    models.BlogPost.published,
+    models.BlogPost.created_at,
+    models.BlogPost.updated_at,
+)
+
+
+def get_post_summaries(db: Session, skip: int = 0, limit: int = 100, published_only: bool = True):
+    """Newest first, without content (see SUMMARY_COLUMNS)."""
+    q = db.query(models.BlogPost).options(load_only(*SUMMARY_COLUMNS))
+    if published_only:
+        q = q.filter(models.BlogPost.published == True)
+    return q.order_by(models.BlogPost.created_at.desc(), models.BlogPost.id.desc()).offset(skip).limit(limit).all()
+
+
+def search_posts(db: Session, q: str, limit: int = 20, published_only: bool = True):
+    """Posts matching q, best first.
+
+    On Postgres: websearch query against search_vector (title weighted above
+    content), ordered by ts_rank. Elsewhere: every word in title or content,
+    title matches first.
+    """
+    post = models.BlogPost
+    query = db.query(post).options(load_only(*SUMMARY_COLUMNS))
+    if published_only:
+        query = query.filter(post.published == True)
+    if has_column(db, "blog_posts", "search_vector"):
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', :q)"
+        return (
+            query.filter(text(f"blog_posts.search_vector @@ {tsquery}"))
+            .order_by(text(f"ts_rank(blog_posts.search_vector, {tsquery}) DESC"), post.id.desc())
+            .params(q=q)
+            .limit(limit)
+            .all()
+        )
+    words = [w.lower() for w in q.replace('"', " ").split() if not w.startswith("-") and w.upper() != "OR"]
+    if not words:
+        return []
+    for word in words:
+        pattern = f"%{word}%"
+        query = query.filter(or_(func.lower(post.title).like(pattern), func.lower(post.content).like(pattern)))
+    in_title = case((func.lower(post.title).like(f"%{words[0]}%"), 0), else_=1)
+    return query.order_by(in_title, post.created_at.desc(), post.id.desc()).limit(limit).all()
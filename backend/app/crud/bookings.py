@@ -1,25 +1,28 @@
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app import models, schemas
-from app.crud import services as crud_services
+from app import booking_txn, free_intervals, models, outbox, schemas
+from app.crud._keyset import decode_cursor, encode_cursor, has_column
+from app.package_catalog import required_minutes_for_packages
 from datetime import timedelta
-from app.timezone import now_eastern
+from app.timezone import eastern_wall_clock, now_eastern
 
 # Default duration for legacy bookings with no duration_minutes
 DEFAULT_BOOKING_DURATION_MINUTES = 120
 
 
-def _duration_minutes_for_package_ids(db: Session, package_ids: list[int]) -> int:
-    """Sum of package turnaround (hours) + 2 hours, in minutes."""
-    total_hours = 2.0
-    for pid in package_ids or []:
-        pkg = crud_services.get_package(db, pid)
-        if not pkg:
-            continue
-        if pkg.turnaround_hours is not None:
-            total_hours += pkg.turnaround_hours
-        elif pkg.duration_minutes is not None:
-            total_hours += pkg.duration_minutes / 60.0
-    return int(total_hours * 60)
+OVERLAP_MESSAGE = (
+    "This service requires more time than is available for the selected "
+    "slot. Please choose another date or time."
+)
+# Non-Postgres path: only bookings starting this far back can still be running
+OVERLAP_LOOKBACK = timedelta(days=7)
+# Postgres SQLSTATE for an EXCLUDE constraint violation (bookings_no_overlap)
+EXCLUSION_VIOLATION = "23P01"
+
+
+def _span_end(scheduled_date, duration_minutes: int):
+    return scheduled_date + timedelta(minutes=duration_minutes)
 
 
 def _booking_overlaps_existing(
@@ -29,41 +32,72 @@ def _booking_overlaps_existing(
     exclude_booking_id: int | None = None,
 ) -> bool:
     """True if this time range overlaps any non-cancelled booking."""
-    new_end = scheduled_date + timedelta(minutes=duration_minutes)
+    new_end = _span_end(scheduled_date, duration_minutes)
+    if has_column(db, "bookings", "time_span"):
+        # Index probe on the exclusion constraint's GiST index
+        q = (
+            db.query(models.Booking.id)
+            .filter(models.Booking.status != "cancelled")
+            .filter(
+                text("bookings.time_span && tstzrange(:span_start, :span_end, '[)')").bindparams(
+                    span_start=scheduled_date, span_end=new_end
+                )
+            )
+        )
+        if exclude_booking_id is not None:
+            q = q.filter(models.Booking.id != exclude_booking_id)
+        return q.first() is not None
     q = (
-        db.query(models.Booking)
+        db.query(models.Booking.scheduled_date, models.Booking.duration_minutes)
         .filter(models.Booking.status != "cancelled")
         .filter(models.Booking.scheduled_date < new_end)
+        .filter(models.Booking.scheduled_date > scheduled_date - OVERLAP_LOOKBACK)
     )
     if exclude_booking_id is not None:
         q = q.filter(models.Booking.id != exclude_booking_id)
-    for b in q.all():
+    for b_start, b_minutes in q.all():
         b_dur = (
-            b.duration_minutes
-            if b.duration_minutes is not None
+            b_minutes
+            if b_minutes is not None
             else DEFAULT_BOOKING_DURATION_MINUTES
         )
-        b_end = b.scheduled_date + timedelta(minutes=b_dur)
+        b_end = b_start + timedelta(minutes=b_dur)
         if b_end > scheduled_date:
             return True
     return False
 
 
+def _flush_or_conflict(db: Session) -> None:
+    """Flush; a concurrent overlap caught by bookings_no_overlap becomes ValueError (409)."""
+    try:
+        db.flush()
+    except IntegrityError as e:
+        if getattr(e.orig, "pgcode", None) != EXCLUSION_VIOLATION:
+            raise
+        db.rollback()
+        raise ValueError(OVERLAP_MESSAGE)
+
 
 def create_booking(db: Session, booking: schemas.BookingCreate):
-    duration_minutes = _duration_minutes_for_package_ids(db, [booking.package_id])
-    if _booking_overlaps_existing(db, booking.scheduled_date, duration_minutes):
-        raise ValueError(
-            "This service requires more time than is available for the selected "
-            "slot. Please choose another date or time."
-        )
-    data = booking.model_dump()
-    data["duration_minutes"] = duration_minutes
-    db_booking = models.Booking(**data)
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
+    duration_minutes = required_minutes_for_packages(db, [booking.package_id])
+
+    def insert():
+        if _booking_overlaps_existing(db, booking.scheduled_date, duration_minutes):
+            raise ValueError(OVERLAP_MESSAGE)
+        data = booking.model_dump()
+        data["duration_minutes"] = duration_minutes
+        db_booking = models.Booking(**data)
+        db.add(db_booking)
+        _flush_or_conflict(db)
+        free_intervals.refresh_booking_span(db, booking.scheduled_date, duration_minutes)
+        outbox.enqueue_booking_created(db, get_booking_with_details(db, db_booking.id))
+        db.commit()
+        db.refresh(db_booking)
+        return db_booking
+
+    return booking_txn.run(
+        db, booking.scheduled_date, _span_end(booking.scheduled_date, duration_minutes), insert
+    )
 
 
 def create_booking_multi(db: Session, payload: schemas.BookingCreateMulti):
@@ -71,30 +105,35 @@ def create_booking_multi(db: Session, payload: schemas.BookingCreateMulti):
     if not payload.package_ids:
         return None
     first_id = payload.package_ids[0]
-    duration_minutes = _duration_minutes_for_package_ids(db, payload.package_ids)
-    if _booking_overlaps_existing(db, payload.scheduled_date, duration_minutes):
-        raise ValueError(
-            "This service requires more time than is available for the selected "
-            "slot. Please choose another date or time."
+    duration_minutes = required_minutes_for_packages(db, payload.package_ids)
+
+    def insert():
+        if _booking_overlaps_existing(db, payload.scheduled_date, duration_minutes):
+            raise ValueError(OVERLAP_MESSAGE)
+        db_booking = models.Booking(
+            customer_id=payload.customer_id,
+            package_id=first_id,
+            available_slot_id=payload.available_slot_id,
+            scheduled_date=payload.scheduled_date,
+            duration_minutes=duration_minutes,
+            status=payload.status,
+            location=payload.location,
+            notes=payload.notes,
         )
-    db_booking = models.Booking(
-        customer_id=payload.customer_id,
-        package_id=first_id,
-        available_slot_id=payload.available_slot_id,
-        scheduled_date=payload.scheduled_date,
-        duration_minutes=duration_minutes,
-        status=payload.status,
-        location=payload.location,
-        notes=payload.notes,
+        db.add(db_booking)
+        _flush_or_conflict(db)
+        for pid in payload.package_ids:
+            db.add(models.BookingItem(booking_id=db_booking.id, package_id=pid, quantity=1))
+        db.flush()
+        free_intervals.refresh_booking_span(db, payload.scheduled_date, duration_minutes)
+        outbox.enqueue_booking_created(db, get_booking_with_details(db, db_booking.id))
+        db.commit()
+        db.refresh(db_booking)
+        return db_booking
+
+    return booking_txn.run(
+        db, payload.scheduled_date, _span_end(payload.scheduled_date, duration_minutes), insert
     )
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    for pid in payload.package_ids:
-        db.add(models.BookingItem(booking_id=db_booking.id, package_id=pid, quantity=1))
-    db.commit()
-    db.refresh(db_booking)
-    return db_booking
 
 def get_booking(db: Session, booking_id: int):
     return db.query(models.Booking).filter(models.Booking.id == booking_id).first()
@@ -104,22 +143,32 @@ def get_bookings(db: Session, skip: int = 0, limit: int = 100):
 
 
 def get_bookings_with_details(
-    db: Session, skip: int = 0, limit: int = 100, include_archived: bool = False
-):
-    """Bookings for owner. Hides completed >7d by default; all states in DB."""
-    from sqlalchemy.orm import joinedload
-    from sqlalchemy import or_
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    include_archived: bool = False,
+    cursor: str | None = None,
+) -> tuple[list[models.Booking], str | None]:
+    """Bookings for owner, newest first, and the cursor for the next page (None at the end).
+
+    Hides completed >7d by default; all states in DB. With a cursor, pages by
+    (scheduled_date, id) keyset so deep pages cost the same as the first;
+    skip is only applied without one (older clients).
+    """
+    from sqlalchemy.orm import joinedload, selectinload
+    from sqlalchemy import or_, tuple_
 
     q = (
         db.query(models.Booking)
         .options(
             joinedload(models.Booking.customer),
             joinedload(models.Booking.package).joinedload(models.Package.service),
-            joinedload(models.Booking.booking_items)
+            # Collection in a separate IN query: no row fan-out, no LIMIT subquery
+            selectinload(models.Booking.booking_items)
             .joinedload(models.BookingItem.package)
             .joinedload(models.Package.service),
         )
-        .order_by(models.Booking.scheduled_date.desc())
+        .order_by(models.Booking.scheduled_date.desc(), models.Booking.id.desc())
     )
     if not include_archived:
         # Hide completed bookings older than 7 days; all states still in DB
@@ -131,7 +180,20 @@ def get_bookings_with_details(
                 models.Booking.completed_at >= week_ago,
             )
         )
-    return q.offset(skip).limit(limit).all()
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        q = q.filter(
+            tuple_(models.Booking.scheduled_date, models.Booking.id) < tuple_(after_date, after_id)
+        )
+    elif skip:
+        q = q.offset(skip)
+    if limit <= 0:
+        return [], None
+    rows = q.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1].scheduled_date, page[-1].id)
 
 
 def get_booking_with_details(db: Session, booking_id: int):
@@ -157,15 +219,38 @@ def get_customer_bookings(db: Session, customer_id: int):
         .all()
     )
 
+def _span_state(db_booking: models.Booking):
+    """What the booking contributes to free time: (start, duration, cancelled)."""
+    return (
+        db_booking.scheduled_date,
+        db_booking.duration_minutes,
+        db_booking.status == "cancelled",
+    )
+
 def update_booking(db: Session, booking_id: int, booking: schemas.BookingCreate):
     db_booking = get_booking(db, booking_id)
     if db_booking:
         now = now_eastern()
+        old_status = db_booking.status
+        before = _span_state(db_booking)
         for key, value in booking.model_dump(exclude_unset=True).items():
             setattr(db_booking, key, value)
         if db_booking.status == "completed" and db_booking.completed_at is None:
             db_booking.completed_at = now
         db_booking.updated_at = now
+        after = _span_state(db_booking)
+        if after != before:
+            # Cancel/uncancel, date move or duration change: free time shifts
+            _flush_or_conflict(db)
+            free_intervals.refresh_booking_span(db, before[0], before[1])
+            free_intervals.refresh_booking_span(db, after[0], after[1])
+        if eastern_wall_clock(after[0]) != eastern_wall_clock(before[0]):
+            # Moved: remind again relative to the new time
+            db_booking.reminded_24h_at = None
+            db_booking.reminded_2h_at = None
+        # When admin confirms a pending booking, email the customer
+        if old_status == "pending" and db_booking.status == "confirmed":
+            outbox.enqueue_booking_confirmed(db, db_booking)
         db.commit()
         db.refresh(db_booking)
     return db_booking
@@ -173,6 +258,9 @@ def update_booking(db: Session, booking_id: int, booking: schemas.BookingCreate)
 def delete_booking(db: Session, booking_id: int):
     db_booking = get_booking(db, booking_id)
     if db_booking:
+        scheduled_date, duration_minutes, _ = _span_state(db_booking)
         db.delete(db_booking)
+        db.flush()
+        free_intervals.refresh_booking_span(db, scheduled_date, duration_minutes)
         db.commit()
     return db_booking
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import func, or_, text, tuple_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.crud._keyset import decode_cursor, encode_cursor, has_column
+from app.timezone import eastern_wall_clock
+
+# websearch syntax: plain words are ANDed, "quoted phrases", -excluded, OR
+SEARCH_CONFIG = "english"
+
+
+def _like_filter(q: str):
+    """Fallback without Postgres: every word must appear in name, email or message."""
+    m = models.ContactMessage
+    clauses = []
+    for word in q.replace('"', " ").split():
+        if word.startswith("-") or word.upper() == "OR":
+            continue
+        pattern = f"%{word.lower()}%"
+        clauses.append(or_(
+            func.lower(m.name).like(pattern),
+            func.lower(m.email).like(pattern),
+            func.lower(m.message).like(pattern),
+        ))
+    return clauses
+
+
+def search_contact_messages(
+    db: Session,
+    q: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> tuple[list[models.ContactMessage], str | None]:
+    """Messages matching q (name/email/message), newest first, and the next-page cursor.
+
+    On Postgres q is a websearch query against the GIN-indexed search_vector;
+    elsewhere it degrades to a LIKE per word. since/until bound created_at
+    ([since, until)). Pages by (created_at, id) keyset, so every page costs the same.
+    """
+    m = models.ContactMessage
+    query = db.query(m)
+    if q and q.strip():
+        if has_column(db, "contact_messages", "search_vector"):
+            query = query.filter(
+                text(f"contact_messages.search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', :q)")
+                .bindparams(q=q.strip())
+            )
+        else:
+            query = query.filter(*_like_filter(q))
+    if since is not None:
+        query = query.filter(m.created_at >= eastern_wall_clock(since))
+    if until is not None:
+        query = query.filter(m.created_at < eastern_wall_clock(until))
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        query = query.filter(tuple_(m.created_at, m.id) < tuple_(after_created, after_id))
+    rows = query.order_by(m.created_at.desc(), m.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1].created_at, page[-1].id)
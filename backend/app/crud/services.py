@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app import models, schemas
 
 def create_service(db: Session, service: schemas.ServiceCreate):
@@ -47,12 +47,23 @@ def get_package(db: Session, package_id: int):
 
 
 def get_package_with_service(db: Session, package_id: int):
-    """Return package with service name and slug attached (for detail page)."""
-    pkg = (
+    """Return package with its service joined in (one query; for detail page)."""
+    return (
         db.query(models.Package)
+        .options(joinedload(models.Package.service))
         .filter(models.Package.id == package_id)
         .first()
     )
-    if not pkg:
-        return None
-    return pkg
+
+
+def get_packages_with_service(db: Session, package_ids: list[int]) -> dict:
+    """Packages (service joined in) for package_ids in one query, keyed by id."""
+    if not package_ids:
+        return {}
+    rows = (
+        db.query(models.Package)
+        .options(joinedload(models.Package.service))
+        .filter(models.Package.id.in_(package_ids))
+        .all()
+    )
+    return {pkg.id: pkg for pkg in rows}
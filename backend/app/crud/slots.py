@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import free_intervals, models, schemas
+from app.timezone import EASTERN, eastern_wall_clock
+
+# Upper bound for one materialize call (a year of weekly templates)
+MAX_MATERIALIZE_DAYS = 366
+
+
+def _parse_hhmm(value: Optional[str]) -> Optional[time]:
+    if not value or not value.strip():
+        return None
+    try:
+        h, m = (int(p) for p in value.strip().split(":"))
+        return time(h, m)
+    except ValueError:
+        return None
+
+
+def plan_new_slots(
+    existing: Iterable[tuple[datetime, Optional[datetime]]],
+    candidates: Iterable[tuple[datetime, Optional[datetime]]],
+) -> tuple[list[tuple[datetime, Optional[datetime]]], int]:
+    """Split candidates into (new, skipped): a slot overlapping another on the same
+    Eastern day (existing or accepted earlier in this batch) is skipped."""
+    by_day: dict[date, list[tuple[datetime, Optional[datetime]]]] = {}
+    for start, end in existing:
+        start = eastern_wall_clock(start)
+        by_day.setdefault(start.date(), []).append(
+            (start, eastern_wall_clock(end) if end is not None else None)
+        )
+    new = []
+    skipped = 0
+    for start, end in candidates:
+        wall_start = eastern_wall_clock(start)
+        wall_end = eastern_wall_clock(end) if end is not None else None
+        day_end = datetime.combine(wall_start.date(), time.max)
+        same_day = by_day.setdefault(wall_start.date(), [])
+        new_end = wall_end if wall_end is not None else day_end
+        if any(
+            wall_start < (ex_end if ex_end is not None else day_end) and new_end > ex_start
+            for ex_start, ex_end in same_day
+        ):
+            skipped += 1
+            continue
+        same_day.append((wall_start, wall_end))
+        new.append((start, end))
+    return new, skipped
+
+
+def insert_slots(
+    db: Session, candidates: list[tuple[datetime, Optional[datetime]]]
+) -> tuple[list[models.AvailableSlot], int]:
+    """Overlap check in memory against one range query, then a single bulk INSERT.
+    Free intervals for the new slots are written too; caller commits."""
+    if not candidates:
+        return [], 0
+    days = [eastern_wall_clock(start).date() for start, _ in candidates]
+    range_start = datetime.combine(min(days), time.min, tzinfo=EASTERN)
+    range_end = datetime.combine(max(days) + timedelta(days=1), time.min, tzinfo=EASTERN)
+    existing = (
+        db.query(models.AvailableSlot.slot_start, models.AvailableSlot.slot_end)
+        .filter(models.AvailableSlot.slot_start >= range_start)
+        .filter(models.AvailableSlot.slot_start < range_end)
+        .all()
+    )
+    new, skipped = plan_new_slots(existing, candidates)
+    if not new:
+        return [], skipped
+    created = db.scalars(
+        insert(models.AvailableSlot).returning(
+            models.AvailableSlot, sort_by_parameter_order=True
+        ),
+        [{"slot_start": start, "slot_end": end} for start, end in new],
+    ).all()
+    free_intervals.refresh_slots(db, [c.id for c in created])
+    return created, skipped
+
+
+def expand_templates(
+    templates: Iterable[models.SlotTemplate], from_date: date, to_date: date
+) -> list[tuple[datetime, Optional[datetime]]]:
+    """Concrete (slot_start, slot_end) in Eastern for every template day in range."""
+    out = []
+    for t in templates:
+        open_time = _parse_hhmm(t.open_time)
+        close_time = _parse_hhmm(t.close_time)
+        if open_time is None:
+            continue
+        skip = {d.strip() for d in (t.exceptions or "").split(",") if d.strip()}
+        first = max(from_date, t.start_date)
+        last = min(to_date, t.end_date) if t.end_date else to_date
+        day = first + timedelta(days=(t.weekday - first.weekday()) % 7)
+        while day <= last:
+            if day.isoformat() not in skip:
+                out.append((
+                    datetime.combine(day, open_time, tzinfo=EASTERN),
+                    datetime.combine(day, close_time, tzinfo=EASTERN) if close_time else None,
+                ))
+            day += timedelta(days=7)
+    out.sort(key=lambda s: s[0])
+    return out
+
+
+def create_template(db: Session, template: schemas.SlotTemplateCreate):
+    open_time = _parse_hhmm(template.open_time)
+    if open_time is None:
+        raise ValueError("open_time must be HH:MM")
+    close_time = None
+    if template.close_time and template.close_time.strip():
+        close_time = _parse_hhmm(template.close_time)
+        if close_time is None or close_time <= open_time:
+            raise ValueError("close_time must be HH:MM after open_time")
+    if template.end_date and template.end_date < template.start_date:
+        raise ValueError("end_date must be on or after start_date")
+    data = template.model_dump()
+    data["open_time"] = open_time.strftime("%H:%M")
+    data["close_time"] = close_time.strftime("%H:%M") if close_time else None
+    data["exceptions"] = ",".join(sorted({d.isoformat() for d in template.exceptions}))
+    db_template = models.SlotTemplate(**data)
+    db.add(db_template)
+    db.commit()
+    db.refresh(db_template)
+    return db_template
+
+
+def get_templates(db: Session):
+    return db.query(models.SlotTemplate).order_by(models.SlotTemplate.weekday, models.SlotTemplate.id).all()
+
+
+def delete_template(db: Session, template_id: int):
+    db_template = (
+        db.query(models.SlotTemplate).filter(models.SlotTemplate.id == template_id).first()
+    )
+    if db_template:
+        db.delete(db_template)
+        db.commit()
+    return db_template
+
+
+def materialize_templates(
+    db: Session, from_date: date, to_date: date, template_ids: Optional[list[int]] = None
+) -> tuple[int, int]:
+    """Create available_slots from templates; returns (created, duplicates_skipped)."""
+    if to_date < from_date:
+        raise ValueError("to_date must be on or after from_date")
+    if (to_date - from_date).days > MAX_MATERIALIZE_DAYS:
+        raise ValueError(f"At most {MAX_MATERIALIZE_DAYS} days per request")
+    q = db.query(models.SlotTemplate)
+    if template_ids:
+        q = q.filter(models.SlotTemplate.id.in_(template_ids))
+    candidates = expand_templates(q.all(), from_date, to_date)
+    created, skipped = insert_slots(db, candidates)
+    db.commit()
+    return len(created), skipped
@@ -1,14 +1,15 @@
 """
 Send email via Resend (primary, 100 free/day), then Brevo or MailerSend as fallback
-when Resend fails (e.g. rate limit).
+when Resend fails (e.g. rate limit). All three go through the pooled keep-alive
+transport in app.provider_http.
 """
-import json
 import logging
 import os
-import urllib.error
-import urllib.request
+import time
 from typing import Tuple
 
+from app import provider_health, provider_http
+
 logger = logging.getLogger(__name__)
 
 # Resend (primary – 100 free emails/day)
@@ -36,6 +37,11 @@ MAILERSEND_FROM = (
 
 OWNER_EMAIL = os.environ.get("OWNER_EMAIL", "").strip()
 
+# API hosts; point them at a local stand-in (python -m app.fake_providers serve) to test or benchmark
+RESEND_API_BASE = os.environ.get("RESEND_API_BASE", "https://api.resend.com").rstrip("/")
+BREVO_API_BASE = os.environ.get("BREVO_API_BASE", "https://api.brevo.com").rstrip("/")
+MAILERSEND_API_BASE = os.environ.get("MAILERSEND_API_BASE", "https://api.mailersend.com").rstrip("/")
+
 
 def is_configured() -> bool:
     """True if at least one provider is configured."""
@@ -56,71 +62,33 @@ def _parse_from(raw: str) -> Tuple[str, str]:
     return (raw, raw) if raw else ("", "")
 
 
-def _send_resend(to: str, subject: str, html: str) -> bool:
-    if not RESEND_API_KEY or not RESEND_FROM:
-        return False
-    try:
-        import resend
-        resend.api_key = RESEND_API_KEY
-        resend.Emails.send({
-            "from": RESEND_FROM,
-            "to": [to],
-            "subject": subject,
-            "html": html,
-        })
-        logger.info("Email sent via Resend to %s", to)
-        return True
-    except Exception as e:
-        resp = getattr(e, "response", None)
-        code = getattr(e, "status_code", None)
-        if code is None and resp:
-            code = getattr(resp, "status_code", None)
-        if code == 429:
-            logger.warning("Resend rate limit (429); will try fallback")
-        else:
-            logger.warning("Resend failed to %s: %s", to, e)
-        return False
+def _resend_request(to: str, subject: str, html: str, text: str) -> provider_http.Response:
+    return provider_http.request(
+        "POST",
+        f"{RESEND_API_BASE}/emails",
+        json_body={"from": RESEND_FROM, "to": [to], "subject": subject, "html": html},
+        headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
+    )
 
 
-def _send_brevo(to: str, subject: str, html: str) -> bool:
-    if not BREVO_API_KEY or not BREVO_FROM:
-        return False
+def _brevo_request(to: str, subject: str, html: str, text: str) -> provider_http.Response:
     name, email = _parse_from(BREVO_FROM)
-    if not email:
-        return False
     body = {
         "sender": {"name": name or email, "email": email},
         "to": [{"email": to}],
         "subject": subject,
         "htmlContent": html,
     }
-    try:
-        req = urllib.request.Request(
-            "https://api.brevo.com/v3/smtp/email",
-            data=json.dumps(body).encode("utf-8"),
-            headers={
-                "api-key": BREVO_API_KEY,
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            if 200 <= resp.status < 300:
-                logger.info("Email sent via Brevo to %s", to)
-                return True
-    except urllib.error.HTTPError as e:
-        logger.warning("Brevo failed to %s: %s %s", to, e.code, e.reason)
-    except Exception as e:
-        logger.warning("Brevo failed to %s: %s", to, e)
-    return False
+    return provider_http.request(
+        "POST",
+        f"{BREVO_API_BASE}/v3/smtp/email",
+        json_body=body,
+        headers={"api-key": BREVO_API_KEY},
+    )
 
 
-def _send_mailersend(to: str, subject: str, html: str, text: str) -> bool:
-    if not MAILERSEND_API_KEY or not MAILERSEND_FROM:
-        return False
+def _mailersend_request(to: str, subject: str, html: str, text: str) -> provider_http.Response:
     name, email = _parse_from(MAILERSEND_FROM)
-    if not email:
-        return False
     body = {
         "from": {"email": email, "name": name or email},
         "to": [{"email": to}],
@@ -128,30 +96,64 @@ def _send_mailersend(to: str, subject: str, html: str, text: str) -> bool:
         "html": html,
         "text": text or html.replace("<br>", "\n").replace("<br>\n", "\n"),
     }
+    return provider_http.request(
+        "POST",
+        f"{MAILERSEND_API_BASE}/v1/email",
+        json_body=body,
+        headers={"Authorization": f"Bearer {MAILERSEND_API_KEY}"},
+    )
+
+
+# Fallback order: (name, display name, request)
+_PROVIDERS = [
+    ("resend", "Resend", _resend_request),
+    ("brevo", "Brevo", _brevo_request),
+    ("mailersend", "MailerSend", _mailersend_request),
+]
+
+
+def configured_providers() -> list[str]:
+    configured = {
+        "resend": bool(RESEND_API_KEY and RESEND_FROM),
+        "brevo": bool(BREVO_API_KEY and BREVO_FROM and _parse_from(BREVO_FROM)[1]),
+        "mailersend": bool(
+            MAILERSEND_API_KEY and MAILERSEND_FROM and _parse_from(MAILERSEND_FROM)[1]
+        ),
+    }
+    return [name for name, _, _ in _PROVIDERS if configured[name]]
+
+
+def _send_via(name: str, to: str, subject: str, html: str, text: str) -> bool:
+    """One provider attempt, recorded in its health state."""
+    health = provider_health.get(name)
+    if not health.acquire():
+        return False
+    label, send = next((label, fn) for n, label, fn in _PROVIDERS if n == name)
+    started = time.perf_counter()
     try:
-        req = urllib.request.Request(
-            "https://api.mailersend.com/v1/email",
-            data=json.dumps(body).encode("utf-8"),
-            headers={
-                "Authorization": f"Bearer {MAILERSEND_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            if resp.status in (200, 202):
-                logger.info("Email sent via MailerSend to %s", to)
-                return True
-    except urllib.error.HTTPError as e:
-        logger.warning("MailerSend failed to %s: %s %s", to, e.code, e.reason)
+        resp = send(to, subject, html, text)
     except Exception as e:
-        logger.warning("MailerSend failed to %s: %s", to, e)
+        health.record_failure(None, f"{e.__class__.__name__}: {e}")
+        logger.warning("%s failed to %s: %s", label, to, e)
+        return False
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if resp.ok:
+        health.record_success(elapsed_ms)
+        logger.info("Email sent via %s to %s", label, to)
+        return True
+    if resp.status == 429:
+        health.record_rate_limited(elapsed_ms, (resp.headers or {}).get("retry-after"))
+        logger.warning("%s rate limit (429); will try fallback", label)
+    else:
+        health.record_failure(elapsed_ms, f"HTTP {resp.status}")
+        logger.warning("%s failed to %s: %s %s", label, to, resp.status, resp.body[:200])
     return False
 
 
 def send_email(to: str, subject: str, body_text: str, html: bool = False) -> bool:
     """
-    Send email: try Resend first, then Brevo, then MailerSend.
+    Send email: try Resend first, then Brevo, then MailerSend, skipping providers
+    whose breaker is open or quota is exhausted (see app.provider_health).
     body_text: plain text; if html=True, treated as HTML.
     Returns True if any provider succeeded.
     """
@@ -169,11 +171,12 @@ def send_email(to: str, subject: str, body_text: str, html: bool = False) -> boo
         else body_text.replace("<br>", "\n").replace("<br>\n", "\n")
     )
 
-    if _send_resend(to, subject, html_body):
-        return True
-    if _send_brevo(to, subject, html_body):
-        return True
-    if _send_mailersend(to, subject, html_body, text_body):
-        return True
+    candidates = provider_health.order(configured_providers())
+    if not candidates:
+        logger.error("All email providers unavailable (breaker open or quota exhausted) for %s", to)
+        return False
+    for name in candidates:
+        if _send_via(name, to, subject, html_body, text_body):
+            return True
     logger.error("All email providers failed for %s", to)
     return False
@@ -0,0 +1,395 @@
+"""
+Local stand-in for the Resend, Brevo, MailerSend and Twilio HTTP APIs.
+
+One server answers all four providers on their real paths, so pointing
+RESEND_API_BASE, BREVO_API_BASE, MAILERSEND_API_BASE and TWILIO_API_BASE at it
+exercises email_send / notify without sending anything. Per provider it can add
+latency (+ jitter), fail a fraction of requests with 500, and answer 429 bursts
+(burst_len requests out of every burst_every, with Retry-After).
+
+    uv run python -m app.fake_providers serve --port 8025 --set resend.burst_every=50 --set resend.burst_len=10
+    uv run python -m app.fake_providers bench 500 --latency-ms 40 --error-rate 0.02
+
+GET /_fake/stats returns per-provider counters; POST /_fake/config takes
+{"resend": {"error_rate": 1.0}, ...} to change behavior while running;
+POST /_fake/reset zeroes the counters.
+
+bench starts the server in-process, queues N bookings' created-messages
+(customer email, owner email, owner SMS) with outbox.enqueue_booking_created
+on a scratch database (a temporary SQLite file, or --database-url for a
+disposable Postgres database) and sends them with outbox.drain, the path
+production runs: claiming, concurrent sends, retries, owner digest and
+deadline. It reports throughput, queued-to-sent latency and how often the
+email chain fell back past Resend. The scratch database is never DATABASE_URL.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Optional
+
+PROVIDERS = ("resend", "brevo", "mailersend", "twilio")
+
+
+class Behavior:
+    """How one fake provider answers; all fields settable via --set or /_fake/config."""
+
+    FIELDS = {
+        "latency_ms": float,
+        "jitter_ms": float,
+        "error_rate": float,
+        "burst_every": int,
+        "burst_len": int,
+        "retry_after": int,
+    }
+
+    def __init__(self, **kw):
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.error_rate = 0.0
+        self.burst_every = 0  # 0 = no 429 bursts
+        self.burst_len = 0
+        self.retry_after = 1  # seconds sent with each 429; -1 = no Retry-After header
+        self.update(kw)
+
+    def update(self, values: dict) -> None:
+        for key, value in values.items():
+            if key not in self.FIELDS:
+                raise ValueError(f"unknown setting {key!r} (one of {', '.join(self.FIELDS)})")
+            setattr(self, key, self.FIELDS[key](value))
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+
+class FakeProviders:
+    """Behavior and counters per provider, shared by the handler threads."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.behavior = {name: Behavior() for name in PROVIDERS}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = {
+                name: {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0} for name in PROVIDERS
+            }
+
+    def configure(self, settings: dict) -> None:
+        for name, values in settings.items():
+            targets = PROVIDERS if name == "all" else (name,)
+            for target in targets:
+                if target not in self.behavior:
+                    raise ValueError(f"unknown provider {target!r}")
+                self.behavior[target].update(values)
+
+    def decide(self, name: str) -> tuple[int, float]:
+        """(status, seconds to wait) for the next request to this provider."""
+        b = self.behavior[name]
+        with self._lock:
+            c = self.counts[name]
+            n = c["requests"]
+            c["requests"] += 1
+            if b.burst_every and n % b.burst_every < b.burst_len:
+                status = 429
+            elif b.error_rate and self._rng.random() < b.error_rate:
+                status = 500
+            else:
+                status = 200
+            c[{200: "ok", 429: "rate_limited", 500: "errors"}[status]] += 1
+            delay = max(0.0, b.latency_ms + self._rng.uniform(-b.jitter_ms, b.jitter_ms)) / 1000
+        return status, delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {name: dict(c) for name, c in self.counts.items()}
+        return {
+            name: {**counts[name], "behavior": self.behavior[name].as_dict()} for name in PROVIDERS
+        }
+
+
+def _provider_for(path: str) -> Optional[str]:
+    if path == "/emails":
+        return "resend"
+    if path == "/v3/smtp/email":
+        return "brevo"
+    if path == "/v1/email":
+        return "mailersend"
+    if path.startswith("/2010-04-01/Accounts/") and path.endswith("/Messages.json"):
+        return "twilio"
+    return None
+
+
+_OK_BODIES = {
+    "resend": lambda n: {"id": f"fake-resend-{n}"},
+    "brevo": lambda n: {"messageId": f"<fake-brevo-{n}@localhost>"},
+    "mailersend": lambda n: {},
+    "twilio": lambda n: {"sid": f"SMfake{n:026d}", "status": "queued"},
+}
+
+
+def make_handler(fake: FakeProviders):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, payload, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/_fake/stats":
+                self._reply(200, fake.stats())
+            else:
+                self._reply(404, {"message": "not found"})
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path in ("/_fake/config", "/_fake/reset"):
+                try:
+                    if self.path == "/_fake/reset":
+                        fake.reset()
+                    else:
+                        fake.configure(json.loads(raw or b"{}"))
+                except (ValueError, TypeError, AttributeError) as e:
+                    self._reply(400, {"message": str(e)})
+                    return
+                self._reply(200, fake.stats())
+                return
+            name = _provider_for(self.path.split("?", 1)[0])
+            if name is None:
+                self._reply(404, {"message": "not found"})
+                return
+            status, delay = fake.decide(name)
+            if delay:
+                time.sleep(delay)
+            if status == 429:
+                retry_after = fake.behavior[name].retry_after
+                self._reply(
+                    429,
+                    {"message": "Too many requests", "code": 20429},
+                    {"Retry-After": str(retry_after)} if retry_after >= 0 else None,
+                )
+            elif status == 500:
+                self._reply(500, {"message": "Internal server error (fake)"})
+            else:
+                ok = 202 if name == "mailersend" else 201 if name in ("brevo", "twilio") else 200
+                self._reply(ok, _OK_BODIES[name](fake.counts[name]["requests"]))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start(
+    fake: FakeProviders, host: str = "127.0.0.1", port: int = 0
+) -> tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread; returns (server, base URL)."""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def point_env_at(base_url: str) -> None:
+    """Route every provider to base_url with dummy credentials.
+
+    Must run before app.email_send / app.notify are imported (they read env once).
+    """
+    os.environ.update({
+        "RESEND_API_BASE": base_url,
+        "BREVO_API_BASE": base_url,
+        "MAILERSEND_API_BASE": base_url,
+        "TWILIO_API_BASE": base_url,
+        "RESEND_API_KEY": "re_fake",
+        "RESEND_FROM": "Fake <bookings@example.com>",
+        "BREVO_API_KEY": "xkeysib-fake",
+        "BREVO_FROM": "Fake <bookings@example.com>",
+        "MAILERSEND_API_KEY": "mlsn.fake",
+        "MAILERSEND_FROM": "Fake <bookings@example.com>",
+        "TWILIO_ACCOUNT_SID": "ACfake",
+        "TWILIO_AUTH_TOKEN": "fake",
+        "TWILIO_FROM_NUMBER": "+15555550100",
+        "OWNER_EMAIL": "owner@example.com",
+        "OWNER_PHONE": "5555550101",
+    })
+
+
+def _fake_booking(i: int):
+    """Just enough of a Booking for notify's message rendering (id None: no bookings row)."""
+    package = SimpleNamespace(name="Full Detail", service_name="Interior & Exterior")
+    return SimpleNamespace(
+        id=None,
+        customer=SimpleNamespace(name=f"Bench Customer {i}", email=f"bench{i}@example.com", phone="5555550102"),
+        scheduled_date=datetime(2030, 1, 7, 9, 0) + timedelta(hours=i),
+        booking_items=[],
+        package=package,
+        location="123 Bench St",
+        notes=None,
+    )
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def bench(
+    n: int,
+    fake: FakeProviders,
+    base_url: Optional[str] = None,
+    database_url: Optional[str] = None,
+    budget_seconds: Optional[float] = None,
+) -> dict:
+    """Queue n bookings' notifications on a scratch database and drain them; returns the report."""
+    server = None
+    if base_url is None:
+        server, base_url = start(fake)
+    point_env_at(base_url)
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app import models, outbox, provider_health, provider_http
+    from app.database import Base
+    from app.timezone import eastern_wall_clock
+
+    scratch_dir = None
+    if database_url is None:
+        scratch_dir = tempfile.TemporaryDirectory(prefix="outbox-bench-")
+        database_url = f"sqlite:///{scratch_dir.name}/bench.db"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine, tables=[models.NotificationOutbox.__table__])
+    db = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        for b in range(n):
+            outbox.enqueue_booking_created(db, _fake_booking(b))
+        db.commit()
+        provider_health.reset()
+        started = time.perf_counter()
+        drained = outbox.drain(db, budget_seconds)
+        elapsed = time.perf_counter() - started
+        o = models.NotificationOutbox
+        rows = db.query(o.channel, o.status, o.created_at, o.sent_at).all()
+        if server is not None:
+            server_stats = fake.stats()
+        else:
+            server_stats = provider_http.request("GET", f"{base_url}/_fake/stats").json()
+    finally:
+        db.close()
+        engine.dispose()
+        if scratch_dir is not None:
+            scratch_dir.cleanup()
+        if server is not None:
+            server.shutdown()
+        provider_http.close_all()
+
+    by_status: dict[str, int] = {}
+    latency: dict[str, list[float]] = {}
+    for channel, status, created_at, sent_at in rows:
+        by_status[status] = by_status.get(status, 0) + 1
+        if sent_at is not None:
+            waited = eastern_wall_clock(sent_at) - eastern_wall_clock(created_at)
+            latency.setdefault(channel, []).append(waited.total_seconds() * 1000)
+    health = {h["name"]: h for h in provider_health.snapshot()}
+    email_sent = sum(health.get(p, {}).get("successes", 0) for p in ("resend", "brevo", "mailersend"))
+    return {
+        "bookings": n,
+        "messages": len(rows),
+        "concurrency": outbox.OUTBOX_CONCURRENCY,
+        "batch_size": outbox.OUTBOX_BATCH_SIZE,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(len(rows) / elapsed, 1) if elapsed else None,
+        "bookings_per_second": round(n / elapsed, 1) if elapsed else None,
+        "drain": drained,
+        "by_status": by_status,
+        # Queued -> sent, so it includes time waiting behind earlier batches
+        "queued_to_sent_ms": {
+            channel: {
+                "p50": round(_percentile(sorted(s), 0.50), 2),
+                "p99": round(_percentile(sorted(s), 0.99), 2),
+                "max": round(max(s), 2),
+            }
+            for channel, s in latency.items()
+        },
+        "email_sent_by": {
+            p: health.get(p, {}).get("successes", 0) for p in ("resend", "brevo", "mailersend")
+        },
+        "email_fallbacks": email_sent - health.get("resend", {}).get("successes", 0),
+        "providers": {
+            name: {k: h[k] for k in ("state", "failures", "rate_limited", "skipped")}
+            for name, h in health.items()
+        },
+        "fake_server": {name: {k: v for k, v in s.items() if k != "behavior"}
+                        for name, s in server_stats.items()},
+    }
+
+
+def _parse_settings(pairs: list[str]) -> dict:
+    """["resend.error_rate=0.1", "all.latency_ms=30"] -> {"resend": {...}, "all": {...}}"""
+    settings: dict[str, dict] = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        name, dot, field = key.partition(".")
+        if not sep or not dot:
+            raise SystemExit(f"--set expects provider.setting=value, got {pair!r}")
+        settings.setdefault(name, {})[field] = value
+    return settings
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.fake_providers")
+    parser.add_argument("command", choices=("serve", "bench"))
+    parser.add_argument("n", nargs="?", type=int, default=200, help="bookings to send (bench)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--base-url", help="bench against an already running fake server")
+    parser.add_argument("--database-url", help="scratch database for the bench outbox (default: temporary SQLite)")
+    parser.add_argument("--budget", type=float, help="drain time budget in seconds (default: until empty)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--set", action="append", default=[], metavar="PROVIDER.SETTING=VALUE",
+                        help=f"per-provider override; PROVIDER is one of {', '.join(PROVIDERS)} or all")
+    args = parser.parse_args(argv)
+
+    fake = FakeProviders(seed=args.seed)
+    try:
+        fake.configure({"all": {
+            "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+        }})
+        fake.configure(_parse_settings(args.set))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "serve":
+        server, base_url = start(fake, args.host, args.port)
+        print(f"fake providers on {base_url}; set RESEND_API_BASE, BREVO_API_BASE, "
+              f"MAILERSEND_API_BASE and TWILIO_API_BASE to it")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    print(json.dumps(bench(args.n, fake, args.base_url, args.database_url, args.budget), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,189 @@
+"""
+Materialized free intervals: each available slot minus non-cancelled bookings.
+
+Rows are rewritten in the caller's transaction on every booking/slot write, so
+/api/availability/bookable-slots only clips precomputed gaps to the required
+duration. Rebuild or verify against a full recompute:
+    uv run python -m app.free_intervals rebuild
+    uv run python -m app.free_intervals check
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import Session
+
+from app import availability_engine as engine
+from app import models
+from app.timezone import eastern_wall_clock
+
+# Bookings are a few hours long; look this far back for ones running into a slot.
+BOOKING_LOOKBACK = timedelta(days=1)
+
+
+def _slot_rows(db: Session, *criteria):
+    return (
+        db.query(
+            models.AvailableSlot.id,
+            models.AvailableSlot.slot_start,
+            models.AvailableSlot.slot_end,
+        )
+        .filter(*criteria)
+        .all()
+    )
+
+
+def _compute_gaps(db: Session, slot_rows) -> dict[int, tuple[datetime, list[engine.Interval]]]:
+    """slot id -> (window_start, gaps), from one bookings query over all windows."""
+    from app.crud.bookings import DEFAULT_BOOKING_DURATION_MINUTES
+
+    windows = [(sid, *engine.slot_window(start, end)) for sid, start, end in slot_rows]
+    if not windows:
+        return {}
+    lo = min(w[1] for w in windows)
+    hi = max(w[2] for w in windows)
+    bookings = (
+        db.query(models.Booking.scheduled_date, models.Booking.duration_minutes)
+        .filter(models.Booking.status != "cancelled")
+        .filter(models.Booking.scheduled_date >= lo - BOOKING_LOOKBACK)
+        .filter(models.Booking.scheduled_date < hi)
+        .all()
+    )
+    timeline = engine.BusyTimeline(
+        engine.booking_intervals(bookings, DEFAULT_BOOKING_DURATION_MINUTES)
+    )
+    return {sid: (ws, timeline.gaps(ws, we)) for sid, ws, we in windows}
+
+
+def _rewrite(db: Session, slot_rows) -> int:
+    """Replace stored gaps for these slots; returns rows written."""
+    if not slot_rows:
+        return 0
+    computed = _compute_gaps(db, slot_rows)
+    (
+        db.query(models.FreeInterval)
+        .filter(models.FreeInterval.available_slot_id.in_(list(computed)))
+        .delete(synchronize_session=False)
+    )
+    # Stored as read: the columns have available_slots' type, so reads match the sweep's
+    rows = [
+        {"available_slot_id": sid, "slot_start": ws, "gap_start": gs, "gap_end": ge}
+        for sid, (ws, gaps) in computed.items()
+        for gs, ge in gaps
+    ]
+    if rows:
+        db.execute(insert(models.FreeInterval), rows)
+    return len(rows)
+
+
+def refresh_slots(db: Session, slot_ids: list[int]) -> None:
+    """Recompute gaps for new or changed slots (caller flushes and commits)."""
+    if slot_ids:
+        _rewrite(db, _slot_rows(db, models.AvailableSlot.id.in_(slot_ids)))
+
+
+def refresh_range(db: Session, range_start: datetime, range_end: datetime) -> None:
+    """Recompute gaps for every slot whose window touches [range_start, range_end)."""
+    slot = models.AvailableSlot
+    _rewrite(
+        db,
+        _slot_rows(
+            db,
+            slot.slot_start < range_end,
+            or_(
+                slot.slot_end > range_start,
+                and_(slot.slot_end.is_(None), slot.slot_start > range_start - timedelta(days=1)),
+            ),
+        ),
+    )
+
+
+def refresh_booking_span(
+    db: Session, scheduled_date: datetime, duration_minutes: Optional[int]
+) -> None:
+    """Recompute gaps around one booking's [start, start + duration)."""
+    from app.crud.bookings import DEFAULT_BOOKING_DURATION_MINUTES
+
+    minutes = duration_minutes if duration_minutes is not None else DEFAULT_BOOKING_DURATION_MINUTES
+    refresh_range(db, scheduled_date, scheduled_date + timedelta(minutes=minutes))
+
+
+def remove_slot(db: Session, slot_id: int) -> None:
+    db.query(models.FreeInterval).filter(
+        models.FreeInterval.available_slot_id == slot_id
+    ).delete(synchronize_session=False)
+
+
+def gaps_in_window(db: Session, start: datetime, end: datetime):
+    """(slot_id, slot_start, gap_start, gap_end) for slots starting in [start, end]."""
+    fi = models.FreeInterval
+    return (
+        db.query(fi.available_slot_id, fi.slot_start, fi.gap_start, fi.gap_end)
+        .filter(fi.slot_start >= start)
+        .filter(fi.slot_start <= end)
+        .order_by(fi.slot_start, fi.available_slot_id, fi.gap_start)
+        .all()
+    )
+
+
+def rebuild(db: Session) -> int:
+    """Drop and recompute every row; returns rows written."""
+    db.query(models.FreeInterval).delete(synchronize_session=False)
+    written = _rewrite(db, _slot_rows(db))
+    db.commit()
+    return written
+
+
+def ensure_built(db: Session) -> None:
+    """Rebuild once if the table is empty but slots exist (first deploy)."""
+    if db.query(models.FreeInterval.id).first() is not None:
+        return
+    if db.query(models.AvailableSlot.id).first() is None:
+        return
+    rebuild(db)
+
+
+def check(db: Session) -> list[dict]:
+    """Diff stored rows against a full recompute; one entry per mismatched slot."""
+    expected = {
+        sid: sorted((eastern_wall_clock(gs), eastern_wall_clock(ge)) for gs, ge in gaps)
+        for sid, (_, gaps) in _compute_gaps(db, _slot_rows(db)).items()
+    }
+    stored: dict[int, list] = {}
+    fi = models.FreeInterval
+    for sid, gs, ge in db.query(fi.available_slot_id, fi.gap_start, fi.gap_end).all():
+        stored.setdefault(sid, []).append((eastern_wall_clock(gs), eastern_wall_clock(ge)))
+    mismatches = []
+    for sid in sorted(set(expected) | set(stored)):
+        want = expected.get(sid, [])
+        have = sorted(stored.get(sid, []))
+        if want != have:
+            mismatches.append({"available_slot_id": sid, "expected": want, "stored": have})
+    return mismatches
+
+
+def main(argv: list[str]) -> int:
+    from app.database import Base, SessionLocal, engine as db_engine
+
+    command = argv[0] if argv else "check"
+    if command not in ("rebuild", "check"):
+        print("usage: python -m app.free_intervals [rebuild|check]")
+        return 2
+    Base.metadata.create_all(bind=db_engine, tables=[models.FreeInterval.__table__])
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            print(f"free_intervals rebuilt: {rebuild(db)} rows")
+            return 0
+        mismatches = check(db)
+        for m in mismatches:
+            print(f"slot {m['available_slot_id']}: expected {m['expected']} stored {m['stored']}")
+        print(f"free_intervals check: {len(mismatches)} mismatched slot(s)")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""
+ETag / Cache-Control for public read endpoints.
+
+    @router.get("", dependencies=[Depends(http_cache.cached("services"))])
+
+The ETag is a hash of the URL and the shared versions (cache.shared_versions)
+of the tables the endpoint reads. Those live in table_versions and are bumped
+in the transaction that writes the table, so every instance issues the same
+tag for the same data and the tag changes only when the data does. It is known
+before the handler runs: a matching If-None-Match is answered 304 from the
+dependency, with one small query at most every HTTP_CACHE_VERSION_TTL seconds.
+A write on another instance is picked up within that TTL.
+
+Cache-Control lets browsers reuse a response for HTTP_CACHE_MAX_AGE seconds
+and the CDN for HTTP_CACHE_S_MAXAGE, serving it stale for
+HTTP_CACHE_STALE_WHILE_REVALIDATE more while it revalidates.
+"""
+import hashlib
+import os
+
+from fastapi import Depends, Request, Response
+from sqlalchemy.orm import Session
+
+from app import cache
+from app.database import get_db
+
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "60"))
+HTTP_CACHE_S_MAXAGE = int(os.environ.get("HTTP_CACHE_S_MAXAGE", "300"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get("HTTP_CACHE_STALE_WHILE_REVALIDATE", "600"))
+# Seconds between reads of table_versions per instance (bounds staleness from other instances)
+HTTP_CACHE_VERSION_TTL = float(os.environ.get("HTTP_CACHE_VERSION_TTL", "10"))
+
+
+class NotModified(Exception):
+    """Raised by a cached() dependency; main.py turns it into an empty 304."""
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+def cache_control() -> str:
+    return (
+        f"public, max-age={HTTP_CACHE_MAX_AGE}, s-maxage={HTTP_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+
+
+def versions(db: Session, tables: tuple[str, ...]) -> tuple[int, ...]:
+    return cache.shared_versions(db, tables, HTTP_CACHE_VERSION_TTL)
+
+
+def etag_for(request: Request, table_versions: tuple[int, ...]) -> str:
+    version = (table_versions, request.url.path, str(request.url.query))
+    return '"' + hashlib.sha256(repr(version).encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cached(*tables: str):
+    """Dependency: 304 on a matching If-None-Match, else ETag + Cache-Control on the response."""
+
+    cache.share_versions(*tables)
+
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+        etag = etag_for(request, versions(db, tables))
+        headers = {"ETag": etag, "Cache-Control": cache_control()}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise NotModified(headers)
+        response.headers.update(headers)
+
+    return dependency
+
+
+def not_modified_response(exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
@@ -1,7 +1,17 @@
 """
 AWS Lambda entrypoint using Mangum.
 Set Lambda handler to: app.lambda_handler.handler
+
+Notification retries: add an EventBridge schedule (e.g. rate(1 minute)) targeting
+this function; scheduled events queue due booking reminders and drain
+notification_outbox instead of serving HTTP.
+
+A request that queued notifications returns as soon as its rows are committed;
+the handler then fires an asynchronous ("Event") invoke of this same function
+with {"outbox_drain": true}, which does the sending. The function's role needs
+lambda:InvokeFunction on itself; without it the schedule still delivers.
 """
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,19 +22,116 @@ _app = None
 _mangum = None
 
 
+_lambda_client = None
+
+
+def _get_lambda_client():
+    global _lambda_client
+    if _lambda_client is None:
+        import boto3  # provided by the Lambda runtime
+        from botocore.config import Config
+
+        _lambda_client = boto3.client(
+            "lambda",
+            config=Config(connect_timeout=1, read_timeout=2, retries={"max_attempts": 0}),
+        )
+    return _lambda_client
+
+
 def _get_mangum():
     global _app, _mangum
     if _mangum is None:
         from mangum import Mangum
         from app.main import app
+        from app import cache
+        from app.database import engine
+
+        # create_all is skipped on Lambda; ETags and write paths need this table
+        try:
+            cache.ensure_shared_table(engine)
+        except Exception as exc:
+            logger.warning("table_versions check failed: %s", exc)
         _app = app
         _mangum = Mangum(app, lifespan="off", api_gateway_base_path=None)
     return _mangum
 
 
+def _is_outbox_drain(event) -> bool:
+    """EventBridge schedule (or manual invoke) asking to send queued notifications."""
+    return isinstance(event, dict) and (
+        event.get("outbox_drain") is True or event.get("source") == "aws.events"
+    )
+
+
+def _is_reminder_run(event) -> bool:
+    """Scheduled events also scan for reminders; {"reminders": true} runs just that."""
+    return isinstance(event, dict) and (
+        event.get("reminders") is True or event.get("source") == "aws.events"
+    )
+
+
+def _run_reminders():
+    from app import reminders
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return reminders.run(db)
+    finally:
+        db.close()
+
+
+def _drain_outbox(context, budget_seconds=None):
+    from app import outbox
+    from app.database import SessionLocal
+
+    if budget_seconds is None and context is not None:
+        # Leave a margin before the Lambda timeout
+        budget_seconds = max(1.0, context.get_remaining_time_in_millis() / 1000 - 5)
+    db = SessionLocal()
+    try:
+        return outbox.drain(db, budget_seconds)
+    finally:
+        db.close()
+
+
+def _invoke_outbox_drain(context) -> None:
+    """Queue an asynchronous drain invocation; returns once Lambda accepts the event (202)."""
+    _get_lambda_client().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({"outbox_drain": True}).encode(),
+    )
+
+
 def handler(event, context):
+    if _is_reminder_run(event) or _is_outbox_drain(event):
+        result = {}
+        if _is_reminder_run(event):
+            try:
+                result["reminders"] = _run_reminders()
+            except Exception as exc:
+                # Don't let a reminder failure hold up sending what is already queued
+                logger.exception("Reminder run failed: %s", exc)
+        result["outbox"] = _drain_outbox(context)
+        logger.info("Scheduled run: %s", result)
+        return result
     try:
-        return _get_mangum()(event, context)
+        response = _get_mangum()(event, context)
     except Exception as exc:
         logger.exception("Lambda handler error: %s", exc)
         raise
+    from app import outbox
+    if outbox.OUTBOX_DRAIN_ON_INVOKE:
+        # Opt-in: send in this invocation (the client waits for the providers)
+        try:
+            outbox.drain_new()
+        except Exception as exc:
+            logger.exception("Outbox drain-on-invoke failed: %s", exc)
+    elif outbox.OUTBOX_ASYNC_INVOKE and context is not None and outbox.take_queued():
+        try:
+            _invoke_outbox_drain(context)
+        except Exception as exc:
+            # Rows stay pending; the EventBridge schedule picks them up
+            logger.warning("Async outbox invoke failed: %s", exc)
+    return response
@@ -8,10 +8,242 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.database import engine, get_db, Base
+from app.timezone import TIMEZONE
 
 logger = logging.getLogger(__name__)
+from app import http_cache
 from app import models  # noqa: F401 - register models with Base
-from app.routers import services, bookings, reviews, contact, blog, business, customers, availability, packages, admin
+from app.routers import services, bookings, reviews, contact, blog, business, customers, availability, packages, admin, catalog, quote
+
+def _ensure_bookings_keyset_index():
+    """Owner booking list: keyset order plus the archived-filter columns (Postgres INCLUDE)."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_bookings_schedule_keyset "
+                "ON bookings (scheduled_date DESC, id DESC) INCLUDE (status, completed_at)"
+            ))
+    except Exception as e:
+        logger.warning("bookings keyset index skipped: %s", e)
+
+# Reminder watermarks get bookings.scheduled_date's type (TIMESTAMPTZ in reset_and_seed.sql,
+# TIMESTAMP from create_all); earlier builds always added them as TIMESTAMP
+_BOOKING_REMINDER_COLUMNS_DDL = f"""
+DO $$
+DECLARE
+    want text;
+    col text;
+BEGIN
+    SELECT data_type INTO want FROM information_schema.columns
+    WHERE table_name = 'bookings' AND column_name = 'scheduled_date';
+    IF want IS NULL THEN
+        RETURN;
+    END IF;
+    FOREACH col IN ARRAY ARRAY['reminded_24h_at', 'reminded_2h_at'] LOOP
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'bookings' AND column_name = col
+        ) THEN
+            EXECUTE format('ALTER TABLE bookings ADD COLUMN %I %s', col, want);
+        ELSIF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'bookings' AND column_name = col AND data_type <> want
+        ) THEN
+            EXECUTE format(
+                'ALTER TABLE bookings ALTER COLUMN %1$I TYPE %2$s USING %1$I AT TIME ZONE %3$L',
+                col, want, '{TIMEZONE}'
+            );
+        END IF;
+    END LOOP;
+END $$
+"""
+
+
+def _ensure_booking_reminder_columns():
+    """Reminder watermarks + the (status, scheduled_date) index the reminder scan uses."""
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(_BOOKING_REMINDER_COLUMNS_DDL))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_bookings_status_scheduled ON bookings (status, scheduled_date)"
+            ))
+    except Exception as e:
+        logger.warning("booking reminder migration skipped: %s", e)
+
+def _ensure_contact_content_hash():
+    """contact_messages.content_hash + index for duplicate detection."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE contact_messages ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_contact_messages_content_hash ON contact_messages (content_hash)"
+            ))
+    except Exception as e:
+        logger.warning("contact content_hash migration skipped: %s", e)
+
+# Postgres only: inbox search (crud/contact.py). Email is indexed whole and split at @ and .
+_CONTACT_SEARCH_DDL = [
+    """
+    ALTER TABLE contact_messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english',
+            coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || translate(coalesce(email, ''), '@.', '  ')
+        ), 'A')
+        || setweight(to_tsvector('english', coalesce(message, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_contact_messages_search ON contact_messages USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_contact_messages_keyset ON contact_messages (created_at DESC, id DESC)",
+]
+
+
+# Postgres only: blog list excerpt + ranked search (crud/blog.py), title weighted above content
+_BLOG_SEARCH_DDL = [
+    """
+    ALTER TABLE blog_posts ADD COLUMN IF NOT EXISTS excerpt VARCHAR(240)
+    GENERATED ALWAYS AS (substr(content, 1, 240)) STORED
+    """,
+    """
+    ALTER TABLE blog_posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_blog_posts_search ON blog_posts USING gin (search_vector)",
+]
+
+
+def _ensure_blog_search():
+    if engine.dialect.name != "postgresql":
+        return
+    for stmt in _BLOG_SEARCH_DDL:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception as e:
+            logger.warning("blog search migration step failed: %s", e)
+
+
+def _ensure_contact_search():
+    if engine.dialect.name != "postgresql":
+        return
+    for stmt in _CONTACT_SEARCH_DDL:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception as e:
+            logger.warning("contact search migration step failed: %s", e)
+
+# Postgres only: bookings.time_span (kept by trigger) + GiST exclusion so two
+# non-cancelled bookings can never overlap, even under concurrent requests.
+_BOOKING_TIME_SPAN_DDL = [
+    # Checked first: ADD COLUMN IF NOT EXISTS alone still locks bookings on every cold start
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'bookings' AND column_name = 'time_span'
+        ) THEN
+            ALTER TABLE bookings ADD COLUMN time_span tstzrange;
+        END IF;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bookings_set_time_span() RETURNS trigger AS $$
+    BEGIN
+        NEW.time_span := tstzrange(
+            NEW.scheduled_date,
+            NEW.scheduled_date + make_interval(mins => COALESCE(NEW.duration_minutes, 120)),
+            '[)'
+        );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Created once (the function above is replaced in place): never dropped on startup,
+    # so inserts can't slip in between with a NULL time_span the constraint ignores
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgname = 'bookings_time_span' AND tgrelid = 'bookings'::regclass
+        ) THEN
+            CREATE TRIGGER bookings_time_span
+            BEFORE INSERT OR UPDATE OF scheduled_date, duration_minutes ON bookings
+            FOR EACH ROW EXECUTE FUNCTION bookings_set_time_span();
+        END IF;
+    END $$
+    """,
+    """
+    UPDATE bookings SET time_span = tstzrange(
+        scheduled_date,
+        scheduled_date + make_interval(mins => COALESCE(duration_minutes, 120)),
+        '[)'
+    ) WHERE time_span IS NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_bookings_time_span ON bookings
+    USING gist (time_span) WHERE status <> 'cancelled'
+    """,
+    # Fails (and is skipped) while legacy overlapping rows exist; the index above still serves lookups
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'bookings_no_overlap') THEN
+            ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+            EXCLUDE USING gist (time_span WITH &&) WHERE (status <> 'cancelled');
+        END IF;
+    END $$
+    """,
+]
+
+
+def _ensure_booking_time_span():
+    if engine.dialect.name != "postgresql":
+        return
+    for stmt in _BOOKING_TIME_SPAN_DDL:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception as e:
+            logger.warning("booking time_span migration step failed: %s", e)
+
+
+# free_intervals must have available_slots.slot_start's type (TIMESTAMPTZ in reset_and_seed.sql,
+# TIMESTAMP from create_all); older builds created it with the other one
+_FREE_INTERVALS_TYPE_DDL = f"""
+DO $$
+DECLARE
+    want text;
+BEGIN
+    SELECT data_type INTO want FROM information_schema.columns
+    WHERE table_name = 'available_slots' AND column_name = 'slot_start';
+    IF want IS NOT NULL AND EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'free_intervals' AND column_name = 'gap_start' AND data_type <> want
+    ) THEN
+        EXECUTE format(
+            'ALTER TABLE free_intervals '
+            'ALTER COLUMN slot_start TYPE %1$s USING slot_start AT TIME ZONE %2$L, '
+            'ALTER COLUMN gap_start TYPE %1$s USING gap_start AT TIME ZONE %2$L, '
+            'ALTER COLUMN gap_end TYPE %1$s USING gap_end AT TIME ZONE %2$L',
+            want, '{TIMEZONE}'
+        );
+    END IF;
+END $$
+"""
+
+
+def _ensure_free_intervals_type():
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_FREE_INTERVALS_TYPE_DDL))
+    except Exception as e:
+        logger.warning("free_intervals column migration failed: %s", e)
+
 
 _LAMBDA_TABLES_LOCK = threading.Lock()
 _LAMBDA_TABLES_ENSURED = False
@@ -46,6 +278,20 @@ def _ensure_lambda_tables():
                         conn.execute(text(stmt))
                     except Exception:
                         pass
+            _ensure_bookings_keyset_index()
+            _ensure_booking_reminder_columns()
+            _ensure_contact_content_hash()
+            _ensure_contact_search()
+            _ensure_blog_search()
+            _ensure_booking_time_span()
+            _ensure_free_intervals_type()
+            from app import free_intervals
+            from app.database import SessionLocal
+            db = SessionLocal()
+            try:
+                free_intervals.ensure_built(db)
+            finally:
+                db.close()
             _LAMBDA_TABLES_ENSURED = True
             logger.info("Lambda: tables ensured on first request")
         except Exception as e:
@@ -66,6 +312,11 @@ if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
             conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP"))
     except Exception:
         pass
+    _ensure_bookings_keyset_index()
+    _ensure_booking_reminder_columns()
+    _ensure_contact_content_hash()
+    _ensure_contact_search()
+    _ensure_blog_search()
 
     # One-off migration: add package tiered pricing and display fields
     try:
@@ -89,6 +340,22 @@ if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
     except Exception:
         pass
 
+    # One-off migration: range column + exclusion constraint for booking overlaps
+    _ensure_booking_time_span()
+
+    # Materialized free intervals: build once for DBs that predate the table
+    _ensure_free_intervals_type()
+    try:
+        from app import free_intervals
+        from app.database import SessionLocal
+        _db = SessionLocal()
+        try:
+            free_intervals.ensure_built(_db)
+        finally:
+            _db.close()
+    except Exception as e:
+        logger.warning("free_intervals build skipped or failed: %s", e)
+
     # Seed default services/packages on startup (e.g. for Render free tier with no Shell).
     # Set RUN_SEED_ON_STARTUP=false in env to disable.
     if os.getenv("RUN_SEED_ON_STARTUP", "true").lower() != "false":
@@ -129,12 +396,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
 app.include_router(customers.router, prefix="/api/customers", tags=["Customers"])
 app.include_router(services.router, prefix="/api/services", tags=["Services"])
 app.include_router(packages.router, prefix="/api/packages", tags=["Packages"])
+app.include_router(catalog.router, prefix="/api/catalog", tags=["Catalog"])
+app.include_router(quote.router, prefix="/api/quote", tags=["Quote"])
 app.include_router(bookings.router, prefix="/api/bookings", tags=["Bookings"])
 app.include_router(reviews.router, prefix="/api/reviews", tags=["Reviews"])
 app.include_router(contact.router, prefix="/api/contact", tags=["Contact"])
@@ -144,6 +414,42 @@ app.include_router(availability.router, prefix="/api/availability", tags=["Avail
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
+@app.on_event("startup")
+def start_outbox_dispatcher():
+    """Background email/SMS sender under uvicorn (Lambda drains per invocation instead)."""
+    if os.getenv("AWS_LAMBDA_FUNCTION_NAME") or os.getenv("OUTBOX_DISPATCHER_THREAD", "true").lower() == "false":
+        return
+    from app import outbox
+    outbox.start_dispatcher()
+
+
+@app.on_event("shutdown")
+def stop_outbox_dispatcher():
+    from app import outbox
+    outbox.stop_dispatcher()
+
+
+@app.on_event("startup")
+def start_reminder_loop():
+    """24h/2h booking reminders under uvicorn (Lambda runs them on its EventBridge schedule)."""
+    if os.getenv("AWS_LAMBDA_FUNCTION_NAME") or os.getenv("REMINDER_LOOP_THREAD", "true").lower() == "false":
+        return
+    from app import reminders
+    reminders.start_loop()
+
+
+@app.on_event("shutdown")
+def stop_reminder_loop():
+    from app import reminders
+    reminders.stop_loop()
+
+
+@app.exception_handler(http_cache.NotModified)
+def not_modified_handler(request: Request, exc: http_cache.NotModified):
+    """If-None-Match matched a cached() endpoint's ETag: empty 304, no DB work done."""
+    return http_cache.not_modified_response(exc)
+
+
 @app.exception_handler(Exception)
 def unhandled_exception_handler(request: Request, exc: Exception):
     """Log full traceback and return error detail so Lambda 500s are debuggable."""
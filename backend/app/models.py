@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import BigInteger, Column, Computed, Integer, String, Float, Text, Date, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.timezone import now_eastern
@@ -84,11 +84,20 @@ class Booking(Base):
     notes = Column(Text)
     created_at = Column(DateTime, default=now_eastern)
     updated_at = Column(DateTime, default=now_eastern, onupdate=now_eastern)
+    # Reminder watermarks (app.reminders): set in the same commit that queues the reminder.
+    # Same column type as scheduled_date (the startup migration keeps them in step)
+    reminded_24h_at = Column(DateTime, nullable=True)
+    reminded_2h_at = Column(DateTime, nullable=True)
 
     customer = relationship("Customer", back_populates="bookings")
     package = relationship("Package", back_populates="bookings")
     booking_items = relationship("BookingItem", back_populates="booking")
 
+    __table_args__ = (
+        # Reminder scans: status = 'confirmed' AND scheduled_date in (now, now + lead]
+        Index("ix_bookings_status_scheduled", "status", "scheduled_date"),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -112,6 +121,23 @@ class ContactMessage(Base):
     phone = Column(String(20))
     message = Column(Text, nullable=False)
     created_at = Column(DateTime, default=now_eastern)
+    # sha256 of normalized email + message; repeats within CONTACT_DEDUPE_MINUTES are dropped
+    content_hash = Column(String(64), nullable=True, index=True)
+
+class RateLimitBucket(Base):
+    """Token buckets for app.rate_limit when RATE_LIMIT_BACKEND=postgres."""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)  # e.g. contact:ip:203.0.113.9
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=now_eastern)
+
+class TableVersion(Base):
+    """Write counter per table, bumped inside each writing transaction (app.cache.share_versions)."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
 class BlogPost(Base):
     __tablename__ = "blog_posts"
@@ -120,6 +146,8 @@ class BlogPost(Base):
     title = Column(String(500), nullable=False)
     slug = Column(String(500), unique=True, nullable=False)
     content = Column(Text, nullable=False)
+    # First 240 chars of content, kept by the database; list views load this instead of content
+    excerpt = Column(String(240), Computed("substr(content, 1, 240)", persisted=True))
     image_url = Column(String(500))
     published = Column(Boolean, default=False)
     created_at = Column(DateTime, default=now_eastern)
@@ -149,6 +177,53 @@ class AvailableSlot(Base):
     slot_end = Column(DateTime, nullable=True)  # optional; if null, treat as single time
     created_at = Column(DateTime, default=now_eastern)
 
+class SlotTemplate(Base):
+    """Recurring weekly availability; materialized into available_slots on demand."""
+    __tablename__ = "slot_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    weekday = Column(Integer, nullable=False)  # 0=Monday .. 6=Sunday
+    open_time = Column(String(10), nullable=False)  # "HH:MM" Eastern
+    close_time = Column(String(10), nullable=True)  # null = open until end of day
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)  # null = no end
+    exceptions = Column(Text)  # comma-separated YYYY-MM-DD dates to skip
+    created_at = Column(DateTime, default=now_eastern)
+
+class FreeInterval(Base):
+    """Materialized free time: an available slot minus non-cancelled bookings (see app.free_intervals)."""
+    __tablename__ = "free_intervals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    available_slot_id = Column(
+        Integer, ForeignKey("available_slots.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # Same column type as available_slots.slot_start (gaps are copied from it), so the
+    # materialized and sweep sources return identical starts, offset included
+    slot_start = Column(DateTime, nullable=False, index=True)  # grid anchor (30-min steps)
+    gap_start = Column(DateTime, nullable=False)
+    gap_end = Column(DateTime, nullable=False)
+
+class NotificationOutbox(Base):
+    """Email/SMS queued in the same transaction as the booking write (see app.outbox)."""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (Index("ix_notification_outbox_due", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # booking_created|booking_confirmed
+    channel = Column(String(10), nullable=False)  # email|sms
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(500))
+    body = Column(Text, nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True, index=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending|sending|sent|failed|skipped|held|digested
+    attempts = Column(Integer, nullable=False, default=0)
+    # Due time while pending; lease expiry while sending (a crashed sender's rows get picked up again)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=now_eastern)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), default=now_eastern)
+    sent_at = Column(DateTime(timezone=True))
+
 class FAQ(Base):
     __tablename__ = "faqs"
 
@@ -1,8 +1,14 @@
-"""Send email (Resend, then Brevo/MailerSend fallback) and optional SMS (Twilio) on booking."""
+"""Booking email (Resend, then Brevo/MailerSend fallback) and optional SMS (Twilio).
+
+Messages are rendered when the booking is written and queued in
+notification_outbox (see app.outbox), which calls deliver() in the background.
+"""
 import logging
 import os
 from datetime import datetime
 
+from app import provider_http
+from app.email_send import is_configured as is_email_configured
 from app.email_send import send_email
 from app.timezone import EASTERN
 from zoneinfo import ZoneInfo
@@ -15,6 +21,7 @@ OWNER_PHONE = os.environ.get("OWNER_PHONE", "7024707392")
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.environ.get("TWILIO_FROM_NUMBER")
+TWILIO_API_BASE = os.environ.get("TWILIO_API_BASE", "https://api.twilio.com").rstrip("/")
 
 
 def _format_datetime(dt):
@@ -66,8 +73,12 @@ def _booking_summary(booking):
     return "\n".join(parts)
 
 
-def _send_email(to: str, subject: str, body_text: str):
-    send_email(to, subject, body_text.replace("\n", "<br>\n"), html=True)
+def _send_email(to: str, subject: str, body_text: str) -> bool:
+    return send_email(to, subject, body_text.replace("\n", "<br>\n"), html=True)
+
+
+def sms_configured() -> bool:
+    return bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER)
 
 
 def _normalize_phone_e164(phone: str, default_country_code: str = "1") -> str:
@@ -82,102 +93,198 @@ def _normalize_phone_e164(phone: str, default_country_code: str = "1") -> str:
     return "+" + digits if not digits.startswith("+") else digits
 
 
-def _send_sms(to: str, body: str):
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_FROM_NUMBER:
+def _send_sms(to: str, body: str) -> bool:
+    if not sms_configured():
         logger.warning("Twilio not configured (set TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER); skipping SMS to %s", to)
-        return
+        return False
     to_e164 = _normalize_phone_e164(to)
     if not to_e164:
         logger.warning("Twilio: invalid phone number %r; skipping SMS", to)
-        return
+        return False
     # Twilio FROM must be E.164; ensure no spaces
     from_e164 = TWILIO_FROM_NUMBER.strip()
     if not from_e164.startswith("+"):
         from_e164 = _normalize_phone_e164(from_e164) or ("+" + "".join(c for c in TWILIO_FROM_NUMBER if c.isdigit()))
     try:
-        from twilio.rest import Client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(from_=from_e164, to=to_e164, body=body)
-        logger.info("Twilio SMS sent to %s", to_e164)
+        resp = provider_http.request(
+            "POST",
+            f"{TWILIO_API_BASE}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json",
+            form={"From": from_e164, "To": to_e164, "Body": body},
+            headers={"Authorization": provider_http.basic_auth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)},
+        )
     except Exception as e:
         logger.exception("Twilio SMS failed to %s: %s", to_e164, e)
-        # Log Twilio error details if present (e.g. 21211 invalid 'To', 21608 unverified trial)
-        if getattr(e, "msg", None):
-            logger.error("Twilio error msg: %s", e.msg)
-        if getattr(e, "code", None):
-            logger.error("Twilio error code: %s", e.code)
+        return False
+    if resp.ok:
+        logger.info("Twilio SMS sent to %s", to_e164)
+        return True
+    logger.error("Twilio SMS failed to %s: HTTP %s", to_e164, resp.status)
+    # Log Twilio error details if present (e.g. 21211 invalid 'To', 21608 unverified trial)
+    err = resp.json() or {}
+    if isinstance(err, dict):
+        if err.get("message"):
+            logger.error("Twilio error msg: %s", err["message"])
+        if err.get("code"):
+            logger.error("Twilio error code: %s", err["code"])
+    return False
 
 
-def send_booking_notifications(db, booking_id: int):
+def _order_line(booking) -> str:
+    if booking.booking_items:
+        package_lines = [_package_display(item) for item in booking.booking_items]
+        return "Your order: " + ", ".join(package_lines) + "\n\n"
+    if booking.package:
+        return f"Your order: {_package_display(booking.package)}\n\n"
+    return ""
+
+
+def _location_line(booking) -> str:
+    if getattr(booking, "location", None) and booking.location.strip():
+        return f"Service address: {booking.location.strip()}\n\n"
+    return ""
+
+
+def booking_created_messages(booking) -> list[dict]:
     """After a booking is created: email customer, email owner, SMS owner."""
-    from app.crud import bookings as crud_bookings
-    booking = crud_bookings.get_booking_with_details(db, booking_id)
     if not booking or not booking.customer:
-        return
+        return []
     summary = _booking_summary(booking)
-    customer_email = booking.customer.email
     customer_name = booking.customer.name
     date_str = _format_datetime(booking.scheduled_date)
 
     # Email to customer (request received)
-    customer_subject = f"Booking request received – {BUSINESS_NAME}"
-    location_line = ""
-    if getattr(booking, "location", None) and booking.location.strip():
-        location_line = f"Service address: {booking.location.strip()}\n\n"
-    if booking.booking_items:
-        package_lines = [_package_display(item) for item in booking.booking_items]
-        order_line = "Your order: " + ", ".join(package_lines) + "\n\n"
-    elif booking.package:
-        order_line = f"Your order: {_package_display(booking.package)}\n\n"
-    else:
-        order_line = ""
     customer_body = (
         f"Hi {customer_name},\n\n"
         f"We received your booking request for {date_str}.\n\n"
-        f"{order_line}"
-        f"{location_line}"
+        f"{_order_line(booking)}"
+        f"{_location_line(booking)}"
         "If you have questions, reply to this email or give us a call.\n\n"
         f"— {BUSINESS_NAME}"
     )
-    _send_email(customer_email, customer_subject, customer_body)
+    return [
+        {
+            "audience": "customer",
+            "channel": "email",
+            "recipient": booking.customer.email,
+            "subject": f"Booking request received – {BUSINESS_NAME}",
+            "body": customer_body,
+        },
+        # Email to owner
+        {
+            "audience": "owner",
+            "channel": "email",
+            "recipient": OWNER_EMAIL,
+            "subject": f"New booking request – {BUSINESS_NAME}",
+            "body": "New booking request:\n\n" + summary,
+        },
+        # SMS to owner (short)
+        {
+            "audience": "owner",
+            "channel": "sms",
+            "recipient": OWNER_PHONE,
+            "subject": None,
+            "body": f"New booking: {customer_name} – {date_str}. Check admin.",
+        },
+    ]
+
+
+def owner_digest_entry(booking) -> str:
+    """One booking's part of the owner digest (same text as the per-booking owner email)."""
+    return _booking_summary(booking)
 
-    # Email to owner
-    owner_subject = f"New booking request – {BUSINESS_NAME}"
-    owner_body = "New booking request:\n\n" + summary
-    _send_email(OWNER_EMAIL, owner_subject, owner_body)
 
-    # SMS to owner (short)
-    sms_body = f"New booking: {customer_name} – {date_str}. Check admin."
-    _send_sms(OWNER_PHONE, sms_body)
+def owner_digest_messages(entries: list[str]) -> list[dict]:
+    """One owner email and one owner SMS covering several new bookings."""
+    if not entries:
+        return []
+    n = len(entries)
+    noun = "booking request" if n == 1 else "booking requests"
+    return [
+        {
+            "audience": "owner",
+            "channel": "email",
+            "recipient": OWNER_EMAIL,
+            "subject": f"{n} new {noun} – {BUSINESS_NAME}",
+            "body": f"{n} new {noun}:\n\n" + "\n\n----------\n\n".join(entries),
+        },
+        {
+            "audience": "owner",
+            "channel": "sms",
+            "recipient": OWNER_PHONE,
+            "subject": None,
+            "body": f"{n} new {noun}. Check admin.",
+        },
+    ]
 
 
-def send_booking_confirmed_notification(db, booking_id: int):
+def booking_confirmed_messages(booking) -> list[dict]:
     """When admin confirms a booking: email the customer that their booking is confirmed."""
-    from app.crud import bookings as crud_bookings
-    booking = crud_bookings.get_booking_with_details(db, booking_id)
     if not booking or not booking.customer:
-        return
-    customer_email = booking.customer.email
+        return []
     customer_name = booking.customer.name
     date_str = _format_datetime(booking.scheduled_date)
-
-    subject = f"Your booking is confirmed – {BUSINESS_NAME}"
-    location_line = ""
-    if getattr(booking, "location", None) and booking.location.strip():
-        location_line = f"Service address: {booking.location.strip()}\n\n"
-    if booking.booking_items:
-        package_lines = [_package_display(item) for item in booking.booking_items]
-        order_line = "Your order: " + ", ".join(package_lines) + "\n\n"
-    elif booking.package:
-        order_line = f"Your order: {_package_display(booking.package)}\n\n"
-    else:
-        order_line = ""
     body = (
         f"Hi {customer_name},\n\n"
         f"Your booking with {BUSINESS_NAME} at {date_str} is confirmed.\n\n"
-        f"{order_line}"
-        f"{location_line}"
+        f"{_order_line(booking)}"
+        f"{_location_line(booking)}"
         "We look forward to seeing you. If you have any questions, reply to this email or give us a call.\n\n"
         f"— {BUSINESS_NAME}"
     )
-    _send_email(customer_email, subject, body)
+    return [
+        {
+            "audience": "customer",
+            "channel": "email",
+            "recipient": booking.customer.email,
+            "subject": f"Your booking is confirmed – {BUSINESS_NAME}",
+            "body": body,
+        }
+    ]
+
+
+def booking_reminder_messages(booking, lead: str) -> list[dict]:
+    """Reminder before a confirmed booking (lead is e.g. "24h" or "2h"): email, plus SMS if the customer has a phone."""
+    if not booking or not booking.customer:
+        return []
+    customer_name = booking.customer.name
+    date_str = _format_datetime(booking.scheduled_date)
+    when = "in about 2 hours" if lead == "2h" else "coming up"
+    body = (
+        f"Hi {customer_name},\n\n"
+        f"This is a reminder that your booking with {BUSINESS_NAME} is {when}: {date_str}.\n\n"
+        f"{_order_line(booking)}"
+        f"{_location_line(booking)}"
+        "Need to reschedule? Reply to this email or give us a call.\n\n"
+        f"— {BUSINESS_NAME}"
+    )
+    messages = [
+        {
+            "audience": "customer",
+            "channel": "email",
+            "recipient": booking.customer.email,
+            "subject": f"Reminder: your booking is {when} – {BUSINESS_NAME}",
+            "body": body,
+        }
+    ]
+    if booking.customer.phone:
+        messages.append({
+            "audience": "customer",
+            "channel": "sms",
+            "recipient": booking.customer.phone,
+            "subject": None,
+            "body": f"Reminder: {BUSINESS_NAME} booking {date_str}. Reply or call to reschedule.",
+        })
+    return messages
+
+
+def channel_configured(channel: str) -> bool:
+    if channel == "sms":
+        return sms_configured()
+    return is_email_configured()
+
+
+def deliver(channel: str, recipient: str, subject: str, body: str) -> bool:
+    """Send one outbox message now; True if the provider accepted it."""
+    if channel == "sms":
+        return _send_sms(recipient, body)
+    return _send_email(recipient, subject, body)
@@ -0,0 +1,431 @@
+"""
+Transactional notification outbox.
+
+Booking writes add notification_outbox rows in their own transaction, so the
+HTTP response never waits on email/SMS providers and a rolled-back booking
+sends nothing. A dispatcher claims due rows, delivers each batch concurrently
+through app.notify and retries failures with exponential backoff:
+
+- uvicorn: a background thread, woken right after any commit that queued rows
+- Lambda: a request that queued rows fires an asynchronous {"outbox_drain": true}
+  invoke of the function and returns; that separate invocation sends them. A
+  scheduled EventBridge rule sends the same event for retries and for anything
+  the async invoke missed (see app.lambda_handler)
+- by hand: uv run python -m app.outbox drain
+
+With OWNER_DIGEST_MINUTES set, the owner's per-booking email/SMS are held
+("held" rows) and sent as one summary per window or OWNER_DIGEST_MAX_BOOKINGS
+bookings; bookings starting within OWNER_DIGEST_URGENT_HOURS bypass it.
+Customer emails are never held.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app import models, notify
+from app.timezone import eastern_wall_clock, now_eastern
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "30"))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "20"))
+# Messages in flight at once (one booking fans out to 2 emails + 1 SMS)
+OUTBOX_CONCURRENCY = int(os.environ.get("OUTBOX_CONCURRENCY", "4"))
+# Lambda: after a request that queued rows, invoke this function asynchronously to send them
+OUTBOX_ASYNC_INVOKE = os.environ.get("OUTBOX_ASYNC_INVOKE", "true").lower() != "false"
+# Lambda: send in the request's own invocation instead (the response waits for the providers)
+OUTBOX_DRAIN_ON_INVOKE = os.environ.get("OUTBOX_DRAIN_ON_INVOKE", "false").lower() == "true"
+OUTBOX_INVOKE_BUDGET_SECONDS = float(os.environ.get("OUTBOX_INVOKE_BUDGET_SECONDS", "5"))
+# Owner digest: 0 = off; else owner email/SMS for new bookings are held and sent as one
+# summary once the oldest held booking is this many minutes old or this many are held
+OWNER_DIGEST_MINUTES = float(os.environ.get("OWNER_DIGEST_MINUTES", "0"))
+OWNER_DIGEST_MAX_BOOKINGS = int(os.environ.get("OWNER_DIGEST_MAX_BOOKINGS", "10"))
+# Bookings starting sooner than this (e.g. same-day) notify the owner immediately
+OWNER_DIGEST_URGENT_HOURS = float(os.environ.get("OWNER_DIGEST_URGENT_HOURS", "24"))
+# A claimed row goes back to the queue if its sender hasn't finished by then
+LEASE = timedelta(minutes=5)
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+# Set after a commit that queued rows in this process (Lambda async invoke / drain-on-invoke)
+_queued_locally = threading.Event()
+
+
+def enqueue(db: Session, kind: str, messages: list[dict], booking_id: Optional[int] = None) -> None:
+    """Add rows for these messages to the session; they go out once the caller commits."""
+    now = now_eastern()
+    for m in messages:
+        if not (m.get("recipient") or "").strip():
+            continue
+        db.add(
+            models.NotificationOutbox(
+                kind=kind,
+                channel=m["channel"],
+                recipient=m["recipient"].strip(),
+                subject=m.get("subject"),
+                body=m["body"],
+                booking_id=booking_id,
+                status=m.get("status", "pending"),
+                next_attempt_at=now,
+            )
+        )
+    db.info["outbox_queued"] = True
+
+
+def _is_urgent(booking: models.Booking) -> bool:
+    starts_in = eastern_wall_clock(booking.scheduled_date) - eastern_wall_clock(now_eastern())
+    return starts_in < timedelta(hours=OWNER_DIGEST_URGENT_HOURS)
+
+
+def enqueue_booking_created(db: Session, booking: models.Booking) -> None:
+    messages = notify.booking_created_messages(booking)
+    if OWNER_DIGEST_MINUTES > 0 and messages and not _is_urgent(booking):
+        # Customer still hears right away; each owner channel holds an entry for its digest
+        entry = notify.owner_digest_entry(booking)
+        messages = [m for m in messages if m.get("audience") != "owner"] + [
+            {"channel": m["channel"], "recipient": m["recipient"], "subject": None, "body": entry, "status": "held"}
+            for m in messages
+            if m.get("audience") == "owner"
+        ]
+    enqueue(db, "booking_created", messages, booking.id)
+
+
+def enqueue_booking_confirmed(db: Session, booking: models.Booking) -> None:
+    enqueue(db, "booking_confirmed", notify.booking_confirmed_messages(booking), booking.id)
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` (1-based), with jitter."""
+    seconds = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def _claim(db: Session, limit: int) -> list[models.NotificationOutbox]:
+    """Lease up to `limit` due rows (pending, or sending with an expired lease)."""
+    now = now_eastern()
+    o = models.NotificationOutbox
+    rows = (
+        db.query(o)
+        .filter(o.status.in_(("pending", "sending")))
+        .filter(o.next_attempt_at <= now)
+        .order_by(o.next_attempt_at, o.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for row in rows:
+        row.status = "sending"
+        row.attempts += 1
+        row.next_attempt_at = now + LEASE
+    db.commit()
+    return rows
+
+
+class _Job(NamedTuple):
+    """Plain copy of a claimed row, safe to hand to a worker thread (sessions aren't)."""
+    id: int
+    channel: str
+    recipient: str
+    subject: Optional[str]
+    body: str
+    attempts: int
+
+
+def _send(job: _Job) -> tuple[str, Optional[str], float]:
+    """Deliver one message; returns (status, error, elapsed ms)."""
+    started = time.perf_counter()
+    if not notify.channel_configured(job.channel):
+        return "skipped", f"{job.channel} provider not configured", 0.0
+    try:
+        if notify.deliver(job.channel, job.recipient, job.subject, job.body):
+            return "sent", None, (time.perf_counter() - started) * 1000
+        error = "all providers failed"
+    except Exception as e:
+        logger.exception("outbox %s delivery raised for id=%s", job.channel, job.id)
+        error = f"{e.__class__.__name__}: {e}"
+    status = "failed" if job.attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+    return status, error, (time.perf_counter() - started) * 1000
+
+
+def _finish(db: Session, row: models.NotificationOutbox, status: str, error: Optional[str]) -> None:
+    now = now_eastern()
+    row.status = status
+    row.last_error = error
+    if status == "sent":
+        row.sent_at = now
+    elif status == "pending":
+        row.next_attempt_at = now + backoff(row.attempts)
+    elif status == "failed":
+        logger.error("outbox id=%s to %s gave up after %d attempts: %s",
+                     row.id, row.recipient, row.attempts, error)
+    db.commit()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Bounded sender pool, created once per process (kept across warm Lambda invocations)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=OUTBOX_CONCURRENCY, thread_name_prefix="outbox-send"
+                )
+    return _executor
+
+
+def flush_owner_digest(db: Session, force: bool = False) -> int:
+    """Turn held owner entries into one digest per channel when the window or count is reached.
+
+    Channels are flushed independently: a channel without a recipient never
+    held anything, so it doesn't hold back the other. Returns the number of
+    bookings summarized (0 if nothing was due).
+    """
+    o = models.NotificationOutbox
+    held = (
+        db.query(o)
+        .filter(o.status == "held")
+        .order_by(o.id)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not held:
+        db.rollback()
+        return 0
+    by_channel: dict[str, list[models.NotificationOutbox]] = {}
+    for r in held:
+        by_channel.setdefault(r.channel, []).append(r)
+    bookings = max(len(rows) for rows in by_channel.values())
+    oldest = min(eastern_wall_clock(r.created_at) for r in held)
+    window_over = eastern_wall_clock(now_eastern()) - oldest >= timedelta(minutes=OWNER_DIGEST_MINUTES)
+    if not (force or window_over or bookings >= OWNER_DIGEST_MAX_BOOKINGS):
+        db.rollback()
+        return 0
+    for channel, rows in by_channel.items():
+        digest = notify.owner_digest_messages([r.body for r in rows])
+        enqueue(db, "owner_digest", [m for m in digest if m["channel"] == channel])
+        for r in rows:
+            r.status = "digested"
+    db.commit()
+    return bookings
+
+
+def _requeue_unsent(db: Session, row: models.NotificationOutbox) -> None:
+    """Hand back a claimed row whose send never started; the claim doesn't count as an attempt."""
+    row.status = "pending"
+    row.attempts = max(0, row.attempts - 1)
+    row.next_attempt_at = now_eastern()
+    db.commit()
+
+
+def _finish_late(bind, row_id: int):
+    """Done-callback for a send still running at the deadline: record it when it ends.
+
+    bind is the engine/connection drain's session used, so the row is updated
+    in the database it was claimed from. The row keeps its lease meanwhile, so
+    no other drain resends it; if this process is frozen or dies first, the
+    lease expires and the row is retried.
+    """
+
+    def callback(future: Future) -> None:
+        if future.cancelled():
+            return
+        db = Session(bind=bind, autoflush=False)
+        try:
+            row = db.get(models.NotificationOutbox, row_id)
+            if row is not None and row.status == "sending":
+                status, error, _ = future.result()
+                _finish(db, row, status, error)
+        except Exception as e:
+            logger.exception("outbox id=%s late finish failed: %s", row_id, e)
+        finally:
+            db.close()
+
+    return callback
+
+
+def drain(db: Session, budget_seconds: Optional[float] = None) -> dict:
+    """Send due rows until none are left or the time budget is spent.
+
+    Each claimed batch (e.g. a booking's customer email, owner email and owner
+    SMS) is sent concurrently, so a batch takes about as long as its slowest
+    message. The budget is one overall deadline: no batch is claimed after it,
+    and drain returns at it. Rows whose send hadn't started go back to pending
+    without using an attempt; sends still in flight are recorded when they end.
+    Both are counted as "unfinished". Returns counts by status plus per-channel results.
+    """
+    deadline = time.monotonic() + budget_seconds if budget_seconds is not None else None
+    counts = {"sent": 0, "pending": 0, "failed": 0, "skipped": 0, "unfinished": 0}
+    channels: dict[str, dict] = {}
+
+    def record(row: models.NotificationOutbox, future: Future) -> None:
+        status, error, elapsed_ms = future.result()
+        _finish(db, row, status, error)
+        counts[status] += 1
+        ch = channels.setdefault(
+            row.channel, {"sent": 0, "pending": 0, "failed": 0, "skipped": 0, "max_ms": 0.0}
+        )
+        ch[status] += 1
+        ch["max_ms"] = round(max(ch["max_ms"], elapsed_ms), 1)
+
+    flush_owner_digest(db)
+    while deadline is None or time.monotonic() < deadline:
+        rows = _claim(db, OUTBOX_BATCH_SIZE)
+        if not rows:
+            break
+        jobs = {
+            _get_executor().submit(
+                _send, _Job(r.id, r.channel, r.recipient, r.subject, r.body, r.attempts)
+            ): r
+            for r in rows
+        }
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            for future in as_completed(jobs, timeout=remaining):
+                record(jobs.pop(future), future)
+        except FuturesTimeout:
+            for future, row in jobs.items():
+                if future.done():
+                    record(row, future)
+                    continue
+                counts["unfinished"] += 1
+                if future.cancel():
+                    _requeue_unsent(db, row)
+                else:
+                    future.add_done_callback(_finish_late(db.get_bind(), row.id))
+            break
+    return {**counts, "channels": channels}
+
+
+def take_queued() -> bool:
+    """True (once) if this process committed outbox rows since the last call."""
+    if not _queued_locally.is_set():
+        return False
+    _queued_locally.clear()
+    return True
+
+
+def drain_new(budget_seconds: float = OUTBOX_INVOKE_BUDGET_SECONDS) -> Optional[dict]:
+    """Drain only if this process queued rows since the last drain (OUTBOX_DRAIN_ON_INVOKE)."""
+    if not take_queued():
+        return None
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return drain(db, budget_seconds)
+    finally:
+        db.close()
+
+
+def stats(db: Session) -> dict:
+    """Row counts by status and the most recent failures."""
+    o = models.NotificationOutbox
+    by_status = dict(db.query(o.status, func.count(o.id)).group_by(o.status).all())
+    recent_failures = (
+        db.query(o.id, o.kind, o.channel, o.recipient, o.attempts, o.last_error, o.created_at)
+        .filter(o.last_error.isnot(None))
+        .filter(o.status != "sent")
+        .order_by(o.id.desc())
+        .limit(20)
+        .all()
+    )
+    return {
+        "by_status": by_status,
+        "recent_failures": [dict(r._mapping) for r in recent_failures],
+        "dispatcher_running": _dispatcher is not None and _dispatcher.is_alive(),
+    }
+
+
+class Dispatcher(threading.Thread):
+    """Background sender for long-running servers (uvicorn)."""
+
+    def __init__(self, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        super().__init__(name="notification-outbox", daemon=True)
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        from app.database import SessionLocal
+
+        while not self._stopping.is_set():
+            self._wake.clear()
+            _queued_locally.clear()
+            db = SessionLocal()
+            try:
+                drain(db)
+            except Exception as e:
+                logger.exception("outbox dispatcher drain failed: %s", e)
+            finally:
+                db.close()
+            self._wake.wait(self.poll_seconds)
+
+
+_dispatcher: Optional[Dispatcher] = None
+
+
+def start_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is None or not _dispatcher.is_alive():
+        _dispatcher = Dispatcher()
+        _dispatcher.start()
+
+
+def stop_dispatcher() -> None:
+    if _dispatcher is not None:
+        _dispatcher.stop()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_on_commit(session):
+    if session.info.pop("outbox_queued", False):
+        _queued_locally.set()
+        if _dispatcher is not None:
+            _dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("outbox_queued", None)
+
+
+def main(argv: list[str]) -> int:
+    from app.database import Base, SessionLocal, engine as db_engine
+
+    if not argv or argv[0] != "drain":
+        print("usage: python -m app.outbox drain")
+        return 2
+    Base.metadata.create_all(bind=db_engine, tables=[models.NotificationOutbox.__table__])
+    db = SessionLocal()
+    try:
+        print(f"outbox drained: {drain(db)}")
+        print(f"outbox: {stats(db)['by_status']}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+"""
+In-process catalog of package duration and pricing fields.
+
+Loaded with one query and reloaded when the packages table generation changes
+(see app.cache) or after PACKAGE_CATALOG_TTL seconds, for edits made outside
+this process. Ids missing from the snapshot are fetched with a single IN query.
+"""
+import os
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app import cache, models
+
+PACKAGE_CATALOG_TTL = float(os.environ.get("PACKAGE_CATALOG_TTL", "300"))
+# Every booking gets this much on top of the package turnarounds (setup/travel)
+BASE_BOOKING_HOURS = 2.0
+
+
+class PackageInfo(NamedTuple):
+    id: int
+    service_id: int
+    name: str
+    price: Optional[float]
+    price_small: Optional[float]
+    price_medium: Optional[float]
+    price_large: Optional[float]
+    price_original_small: Optional[float]
+    price_original_medium: Optional[float]
+    price_original_large: Optional[float]
+    duration_minutes: Optional[int]
+    turnaround_hours: Optional[int]
+
+
+_COLUMNS = [getattr(models.Package, f) for f in PackageInfo._fields]
+
+
+class PackageCatalog:
+    """Snapshot of PackageInfo by id; version increments on every reload."""
+
+    def __init__(self, ttl: float = PACKAGE_CATALOG_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._packages: dict[int, PackageInfo] = {}
+        self._generation: Optional[tuple] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        return (
+            self._generation != cache.generation("packages")
+            or time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    def _load(self, db: Session) -> dict[int, PackageInfo]:
+        with self._lock:
+            if not self._is_stale():
+                return self._packages
+            generation = cache.generation("packages")
+            rows = db.query(*_COLUMNS).all()
+            self._packages = {r[0]: PackageInfo(*r) for r in rows}
+            self._generation = generation
+            self._loaded_at = time.monotonic()
+            self.version += 1
+            return self._packages
+
+    def all(self, db: Session) -> dict[int, PackageInfo]:
+        return self._packages if not self._is_stale() else self._load(db)
+
+    def get_many(self, db: Session, package_ids: Iterable[int]) -> dict[int, PackageInfo]:
+        """Known ids from the snapshot; any misses in one IN query."""
+        packages = self.all(db)
+        wanted = set(package_ids)
+        found = {pid: packages[pid] for pid in wanted if pid in packages}
+        missing = wanted - found.keys()
+        if missing:
+            rows = db.query(*_COLUMNS).filter(models.Package.id.in_(missing)).all()
+            fetched = {r[0]: PackageInfo(*r) for r in rows}
+            if fetched:
+                with self._lock:
+                    self._packages = {**self._packages, **fetched}
+            found.update(fetched)
+        return found
+
+
+catalog = PackageCatalog()
+
+
+def package_minutes(pkg: PackageInfo) -> float:
+    """Time one package adds to a booking: turnaround_hours, else duration_minutes."""
+    if pkg.turnaround_hours is not None:
+        return pkg.turnaround_hours * 60.0
+    if pkg.duration_minutes is not None:
+        return float(pkg.duration_minutes)
+    return 0.0
+
+
+def required_minutes(packages: dict[int, PackageInfo], package_ids: Iterable[int]) -> int:
+    """BASE_BOOKING_HOURS plus each listed package's time (ids not in packages add nothing)."""
+    total = BASE_BOOKING_HOURS * 60
+    for pid in package_ids:
+        pkg = packages.get(pid)
+        if pkg:
+            total += package_minutes(pkg)
+    return int(total)
+
+
+def required_minutes_for_packages(db: Session, package_ids: list[int]) -> int:
+    """Sum of package turnaround (hours) + 2 hours, in minutes."""
+    package_ids = package_ids or []
+    return required_minutes(catalog.get_many(db, package_ids), package_ids)
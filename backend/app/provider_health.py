@@ -0,0 +1,228 @@
+"""
+Per-provider health for the email fallback chain (Resend -> Brevo -> MailerSend).
+
+Each provider has a circuit breaker: PROVIDER_BREAKER_THRESHOLD consecutive
+failures open it for PROVIDER_BREAKER_COOLDOWN seconds, then one trial call
+is let through (half-open, in the provider's configured place) and its result
+closes or re-opens it; closing resets the success rate. A 429 marks
+the provider's quota exhausted until its Retry-After, or midnight UTC when
+none is given (Resend's free tier is 100 emails/day). Success rate and latency
+are tracked as EWMAs and used to order the providers that are available.
+
+State is per process; GET /api/admin/providers shows it.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+PROVIDER_BREAKER_THRESHOLD = int(os.environ.get("PROVIDER_BREAKER_THRESHOLD", "3"))
+PROVIDER_BREAKER_COOLDOWN = float(os.environ.get("PROVIDER_BREAKER_COOLDOWN", "60"))
+# Weight of the newest sample in the success-rate / latency averages
+EWMA_ALPHA = 0.2
+# Below this success rate an available provider is tried after the healthy ones
+DEGRADED_SUCCESS_RATE = 0.5
+
+
+def _next_midnight_utc(now: datetime) -> datetime:
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds (delta form only; HTTP-date falls back to midnight UTC)."""
+    try:
+        seconds = float(value) if value is not None else None
+    except ValueError:
+        return None
+    return seconds if seconds is not None and 0 <= seconds < 86400 else None
+
+
+class ProviderHealth:
+    """Breaker state and running stats for one provider (thread-safe)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"  # closed|open|half_open
+        self.consecutive_failures = 0
+        self.opened_until = 0.0  # time.monotonic()
+        self.quota_exhausted_until: Optional[datetime] = None  # UTC
+        self.ewma_success = 1.0
+        self.ewma_latency_ms: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.skipped = 0
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _quota_blocked(self) -> bool:
+        if self.quota_exhausted_until is None:
+            return False
+        if datetime.now(timezone.utc) >= self.quota_exhausted_until:
+            self.quota_exhausted_until = None
+            return False
+        return True
+
+    def acquire(self) -> bool:
+        """Whether to call this provider now; counts a skip when not."""
+        with self._lock:
+            allowed = True
+            if self._quota_blocked():
+                allowed = False
+            elif self.state == "open":
+                if time.monotonic() < self.opened_until:
+                    allowed = False
+                else:
+                    self.state = "half_open"
+            if allowed and self.state == "half_open":
+                # One trial call at a time while half-open
+                if self._trial_in_flight:
+                    allowed = False
+                else:
+                    self._trial_in_flight = True
+            if not allowed:
+                self.skipped += 1
+            return allowed
+
+    def available(self) -> bool:
+        """Side-effect-free version of acquire(), for ordering."""
+        with self._lock:
+            if self._quota_blocked():
+                return False
+            if self.state == "open":
+                return time.monotonic() >= self.opened_until
+            return not (self.state == "half_open" and self._trial_in_flight)
+
+    def trial_due(self) -> bool:
+        """Open breaker past its cooldown (or half-open, idle): the next call is the trial."""
+        with self._lock:
+            if self.state == "open":
+                return time.monotonic() >= self.opened_until
+            return self.state == "half_open" and not self._trial_in_flight
+
+    def mark_skipped(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def _sample(self, ok: bool, latency_ms: Optional[float]) -> None:
+        self.ewma_success += EWMA_ALPHA * ((1.0 if ok else 0.0) - self.ewma_success)
+        if latency_ms is not None:
+            if self.ewma_latency_ms is None:
+                self.ewma_latency_ms = latency_ms
+            else:
+                self.ewma_latency_ms += EWMA_ALPHA * (latency_ms - self.ewma_latency_ms)
+
+    def record_success(self, latency_ms: float) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == "half_open":
+                # Recovered: start the success rate over, or it would stay ranked as degraded
+                self.ewma_success = 1.0
+            self.state = "closed"
+            self._trial_in_flight = False
+            self._sample(True, latency_ms)
+
+    def record_failure(self, latency_ms: Optional[float], error: str) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            self._sample(False, latency_ms)
+            if self.state == "half_open" or self.consecutive_failures >= PROVIDER_BREAKER_THRESHOLD:
+                self.state = "open"
+                self.opened_until = time.monotonic() + PROVIDER_BREAKER_COOLDOWN
+            self._trial_in_flight = False
+
+    def record_rate_limited(self, latency_ms: Optional[float], retry_after: Optional[str]) -> None:
+        """429: don't call again until Retry-After, else until midnight UTC."""
+        now = datetime.now(timezone.utc)
+        seconds = _retry_after_seconds(retry_after)
+        with self._lock:
+            self.rate_limited += 1
+            self.last_error = "HTTP 429"
+            self._sample(False, latency_ms)
+            self.quota_exhausted_until = (
+                now + timedelta(seconds=seconds) if seconds is not None else _next_midnight_utc(now)
+            )
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.quota_exhausted_until = None
+            self._trial_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._quota_blocked()
+            open_for = max(0.0, self.opened_until - time.monotonic()) if self.state == "open" else 0.0
+            return {
+                "name": self.name,
+                "state": self.state,
+                "open_seconds_left": round(open_for, 1),
+                "quota_exhausted_until": (
+                    self.quota_exhausted_until.isoformat() if self.quota_exhausted_until else None
+                ),
+                "consecutive_failures": self.consecutive_failures,
+                "success_rate_ewma": round(self.ewma_success, 3),
+                "latency_ms_ewma": (
+                    round(self.ewma_latency_ms, 1) if self.ewma_latency_ms is not None else None
+                ),
+                "successes": self.successes,
+                "failures": self.failures,
+                "rate_limited": self.rate_limited,
+                "skipped": self.skipped,
+                "last_error": self.last_error,
+            }
+
+
+_registry: dict[str, ProviderHealth] = {}
+_registry_lock = threading.Lock()
+
+
+def get(name: str) -> ProviderHealth:
+    health = _registry.get(name)
+    if health is None:
+        with _registry_lock:
+            health = _registry.setdefault(name, ProviderHealth(name))
+    return health
+
+
+def order(names: Iterable[str]) -> list[str]:
+    """Available providers: healthy ones in configured order, then degraded by success rate.
+
+    Providers with an open breaker or exhausted quota are left out. One whose
+    breaker trial is due keeps its configured place, so a recovered provider
+    gets its trial call even while its success rate still ranks it degraded.
+    """
+    healthy, degraded = [], []
+    for name in names:
+        h = get(name)
+        if not h.available():
+            h.mark_skipped()
+            continue
+        trial = h.trial_due()
+        (healthy if trial or h.ewma_success >= DEGRADED_SUCCESS_RATE else degraded).append(h)
+    degraded.sort(key=lambda h: -h.ewma_success)
+    return [h.name for h in healthy + degraded]
+
+
+def snapshot() -> list[dict]:
+    return [h.snapshot() for h in list(_registry.values())]
+
+
+def reset(name: Optional[str] = None) -> bool:
+    """Close the breaker and clear quota memory for one provider (or all)."""
+    if name is None:
+        for h in list(_registry.values()):
+            h.reset()
+        return True
+    h = _registry.get(name)
+    if h is None:
+        return False
+    h.reset()
+    return True
@@ -0,0 +1,265 @@
+"""
+Shared keep-alive HTTP transport for the email/SMS provider APIs.
+
+One small connection pool per provider host, created lazily and kept for the
+life of the process (so warm Lambda invocations reuse the TCP + TLS session).
+Stdlib only (http.client). Compare per-message latency of a fresh urllib
+connection vs the pool against a local stub server:
+    uv run python -m app.provider_http
+"""
+import base64
+import http.client
+import json
+import os
+import select
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, NamedTuple, Optional
+
+# Seconds for connect and each socket read; per-call override via timeout=
+PROVIDER_HTTP_TIMEOUT = float(os.environ.get("PROVIDER_HTTP_TIMEOUT", "10"))
+# Idle keep-alive connections kept per host
+PROVIDER_HTTP_POOL_SIZE = int(os.environ.get("PROVIDER_HTTP_POOL_SIZE", "4"))
+
+# Raised by conn.request() on a reused connection the server already closed: nothing
+# was written, so one retry on a fresh connection can't send the message twice.
+# Failures from getresponse() (RemoteDisconnected, ConnectionResetError) come after
+# the POST went out and are never retried here; the outbox retries on a later drain.
+_UNSENT_ERRORS = (
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+)
+
+
+class Response(NamedTuple):
+    status: int
+    body: bytes
+    headers: Optional[dict] = None  # lower-cased names
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            return None
+
+
+class HostPool:
+    """Thread-safe LIFO pool of keep-alive connections to one scheme://host:port."""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], size: int = PROVIDER_HTTP_POOL_SIZE):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context() if scheme == "https" else None
+
+    @staticmethod
+    def _dropped(conn: http.client.HTTPConnection) -> bool:
+        """An idle connection with something to read has been closed by the server (EOF)."""
+        if conn.sock is None:
+            return True
+        try:
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _acquire(self, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if self._dropped(conn):
+                    conn.close()
+                    continue
+                self.reused += 1
+                conn.timeout = timeout
+                conn.sock.settimeout(timeout)
+                return conn, True
+            self.opened += 1
+        return self._connect(timeout), False
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self._ssl)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, path: str, body: Optional[bytes], headers: dict, timeout: float) -> Response:
+        with self._lock:
+            self.requests += 1
+        conn, reused = self._acquire(timeout)
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except _UNSENT_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # Stale keep-alive connection refused the write: retry once on a fresh one
+                with self._lock:
+                    self.opened += 1
+                conn = self._connect(timeout)
+                conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return Response(resp.status, data, {k.lower(): v for k, v in resp.getheaders()})
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "host": f"{self.scheme}://{self.host}" + (f":{self.port}" if self.port else ""),
+                "requests": self.requests,
+                "connections_opened": self.opened,
+                "connections_reused": self.reused,
+                "idle": len(self._idle),
+            }
+
+
+_pools: dict[tuple[str, str, Optional[int]], HostPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_for(scheme: str, host: str, port: Optional[int]) -> HostPool:
+    key = (scheme, host, port)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = HostPool(scheme, host, port)
+    return pool
+
+
+def basic_auth(user: str, password: str) -> str:
+    return "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    json_body: Any = None,
+    form: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    timeout: Optional[float] = None,
+) -> Response:
+    """Send one request over the host's pooled connection; raises on network errors."""
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    hdrs = {"Accept": "application/json", "Connection": "keep-alive", **(headers or {})}
+    body = None
+    if json_body is not None:
+        body = json.dumps(json_body).encode("utf-8")
+        hdrs.setdefault("Content-Type", "application/json")
+    elif form is not None:
+        body = urllib.parse.urlencode(form).encode("utf-8")
+        hdrs.setdefault("Content-Type", "application/x-www-form-urlencoded")
+    pool = _pool_for(parts.scheme, parts.hostname, parts.port)
+    return pool.request(method, path, body, hdrs, timeout if timeout is not None else PROVIDER_HTTP_TIMEOUT)
+
+
+def stats() -> list[dict]:
+    return [p.stats() for p in list(_pools.values())]
+
+
+def close_all() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for p in pools:
+        p.close()
+
+
+def _benchmark(n: int = 200, delay_ms: float = 0.0):
+    """Per-message latency: urllib (new connection each time, as before) vs pooled."""
+    import statistics
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; don't let Nagle hold the body
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+            body = b'{"id":"stub"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v3/smtp/email"
+    payload = {"to": [{"email": "someone@example.com"}], "subject": "Hi", "htmlContent": "x" * 800}
+
+    def fresh():
+        req = urllib.request.Request(
+            url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(req, timeout=PROVIDER_HTTP_TIMEOUT) as resp:
+            resp.read()
+
+    def pooled():
+        request("POST", url, json_body=payload)
+
+    try:
+        for name, fn in (("urllib, new connection", fresh), ("pooled keep-alive", pooled)):
+            fn()  # warm-up
+            samples = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            print(
+                f"{name:<24} n={n}  mean {statistics.mean(samples):6.3f} ms  "
+                f"p50 {samples[n // 2]:6.3f} ms  p95 {samples[int(n * 0.95)]:6.3f} ms"
+            )
+        print(f"pool: {stats()}")
+    finally:
+        server.shutdown()
+        close_all()
+
+
+if __name__ == "__main__":
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,207 @@
+"""
+Server-side cart pricing.
+
+Prices come from the in-process package catalog (app.package_catalog), so a
+quote costs no queries once the catalog is warm. Resolution matches the
+package pages: a tiered package (any price_<size> set) charges
+price_<size>, falling back to price, against price_original_<size> as the
+original; any other package charges price with no original.
+
+    quote(db, [CartLine(3, "medium"), CartLine(5)])    one cart, a size per line
+    quote_many(db, carts)                              many carts, one catalog lookup
+    iter_booking_quotes(db, since, until)              stored bookings, one streamed query
+    estimate_revenue(db, since, until)                 totals over iter_booking_quotes
+
+Bookings record neither the price paid nor the vehicle size, so stored
+bookings are priced at today's catalog for one size (QUOTE_DEFAULT_VEHICLE_SIZE
+unless given), and the totals are reported as estimates.
+"""
+import itertools
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.package_catalog import PackageInfo, catalog, package_minutes, required_minutes
+from app.timezone import eastern_wall_clock
+
+VEHICLE_SIZES = ("small", "medium", "large")
+QUOTE_DEFAULT_VEHICLE_SIZE = os.environ.get("QUOTE_DEFAULT_VEHICLE_SIZE", "medium")
+# Rows fetched per round trip while streaming bookings for a report
+BOOKING_STREAM_BATCH = 1000
+
+
+class CartLine(NamedTuple):
+    package_id: int
+    vehicle_size: Optional[str] = None  # needed for tiered packages only
+    quantity: int = 1
+
+
+class LineItem(NamedTuple):
+    package_id: int
+    name: str
+    vehicle_size: Optional[str]
+    quantity: int
+    unit_price: Optional[float]
+    unit_original: Optional[float]
+    total: float
+    savings: float
+    duration_minutes: int
+
+
+class Quote(NamedTuple):
+    items: list[LineItem]
+    missing: list[int]
+    subtotal: float
+    savings: float
+    duration_minutes: int
+
+
+def _money(value: float) -> float:
+    return round(value, 2)
+
+
+def is_tiered(pkg: PackageInfo) -> bool:
+    return pkg.price_small is not None or pkg.price_medium is not None or pkg.price_large is not None
+
+
+def unit_price(pkg: PackageInfo, vehicle_size: Optional[str]) -> tuple[Optional[float], Optional[float]]:
+    """(price, original) for one package at vehicle_size; either may be None."""
+    if not is_tiered(pkg):
+        return pkg.price, None
+    if vehicle_size not in VEHICLE_SIZES:
+        raise ValueError(f"{pkg.name}: vehicle_size must be one of {', '.join(VEHICLE_SIZES)}")
+    price = getattr(pkg, f"price_{vehicle_size}")
+    return (pkg.price if price is None else price), getattr(pkg, f"price_original_{vehicle_size}")
+
+
+def price_cart(packages: dict[int, PackageInfo], lines: Iterable[CartLine]) -> Quote:
+    """Price cart lines against packages; no queries.
+
+    Lines for the same package and size are merged (in first-seen order); the
+    same package at two sizes stays two lines. Ids not in packages are
+    reported in missing and add nothing. Duration is BASE_BOOKING_HOURS plus
+    every unit's time, as for a booking. Raises ValueError for a tiered
+    package without a valid vehicle_size.
+    """
+    quantities: dict[tuple[int, Optional[str]], int] = {}
+    missing: list[int] = []
+    for line in lines:
+        pkg = packages.get(line.package_id)
+        if pkg is None:
+            if line.package_id not in missing:
+                missing.append(line.package_id)
+            continue
+        # Size is irrelevant to flat-priced packages; don't split their lines on it
+        key = (line.package_id, line.vehicle_size if is_tiered(pkg) else None)
+        quantities[key] = quantities.get(key, 0) + line.quantity
+    items = []
+    for (pid, size), qty in quantities.items():
+        pkg = packages[pid]
+        price, original = unit_price(pkg, size)
+        saved = (original - price) if price is not None and original is not None and original > price else 0.0
+        items.append(LineItem(
+            package_id=pid,
+            name=pkg.name,
+            vehicle_size=size,
+            quantity=qty,
+            unit_price=price,
+            unit_original=original,
+            total=_money((price or 0.0) * qty),
+            savings=_money(saved * qty),
+            duration_minutes=int(package_minutes(pkg) * qty),
+        ))
+    return Quote(
+        items=items,
+        missing=missing,
+        subtotal=_money(sum(i.total for i in items)),
+        savings=_money(sum(i.savings for i in items)),
+        duration_minutes=required_minutes(
+            packages, itertools.chain.from_iterable([i.package_id] * i.quantity for i in items)
+        ),
+    )
+
+
+def quote(db: Session, lines: list[CartLine]) -> Quote:
+    """Quote one cart."""
+    return price_cart(catalog.get_many(db, [line.package_id for line in lines]), lines)
+
+
+def quote_many(db: Session, carts: Iterable[list[CartLine]]) -> list[Quote]:
+    """Quote every cart with a single catalog lookup for all their ids."""
+    carts = list(carts)
+    packages = catalog.get_many(db, {line.package_id for cart in carts for line in cart})
+    return [price_cart(packages, cart) for cart in carts]
+
+
+def iter_booking_quotes(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    statuses: Optional[Iterable[str]] = None,
+    vehicle_size: str = QUOTE_DEFAULT_VEHICLE_SIZE,
+) -> Iterator[tuple[int, str, Quote]]:
+    """(booking id, status, quote) for bookings scheduled in [since, until).
+
+    One query streams booking and item rows in booking order; bookings
+    without items (single-package bookings) are priced from package_id.
+    """
+    booking, item = models.Booking, models.BookingItem
+    query = (
+        db.query(booking.id, booking.status, booking.package_id, item.package_id, item.quantity)
+        .outerjoin(item, item.booking_id == booking.id)
+    )
+    if since is not None:
+        query = query.filter(booking.scheduled_date >= eastern_wall_clock(since))
+    if until is not None:
+        query = query.filter(booking.scheduled_date < eastern_wall_clock(until))
+    if statuses:
+        query = query.filter(booking.status.in_(list(statuses)))
+    packages = catalog.all(db)
+    rows = query.order_by(booking.id, item.id).yield_per(BOOKING_STREAM_BATCH)
+    for booking_id, group in itertools.groupby(rows, key=lambda r: r[0]):
+        group = list(group)
+        status, primary = group[0][1], group[0][2]
+        lines = [CartLine(r[3], vehicle_size, r[4] or 1) for r in group if r[3] is not None]
+        if not lines and primary is not None:
+            lines = [CartLine(primary, vehicle_size)]
+        yield booking_id, status, price_cart(packages, lines)
+
+
+def estimate_revenue(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    statuses: Optional[Iterable[str]] = None,
+    vehicle_size: str = QUOTE_DEFAULT_VEHICLE_SIZE,
+) -> dict:
+    """Estimated revenue of bookings in [since, until), overall and per status.
+
+    An estimate: bookings store neither the price paid nor the vehicle size,
+    so each is priced at today's catalog prices for vehicle_size.
+    """
+    by_status: dict[str, dict] = {}
+    unpriced = 0
+    for _, status, q in iter_booking_quotes(db, since, until, statuses, vehicle_size):
+        bucket = by_status.setdefault(
+            status or "unknown", {"bookings": 0, "estimated_subtotal": 0.0, "estimated_savings": 0.0}
+        )
+        bucket["bookings"] += 1
+        bucket["estimated_subtotal"] += q.subtotal
+        bucket["estimated_savings"] += q.savings
+        if q.missing or not q.items:
+            unpriced += 1
+    for bucket in by_status.values():
+        bucket["estimated_subtotal"] = _money(bucket["estimated_subtotal"])
+        bucket["estimated_savings"] = _money(bucket["estimated_savings"])
+    return {
+        "priced_at": {"vehicle_size": vehicle_size, "prices": "current catalog"},
+        "bookings": sum(b["bookings"] for b in by_status.values()),
+        "estimated_subtotal": _money(sum(b["estimated_subtotal"] for b in by_status.values())),
+        "estimated_savings": _money(sum(b["estimated_savings"] for b in by_status.values())),
+        # Bookings with a deleted package or no package at all
+        "unpriced_bookings": unpriced,
+        "by_status": by_status,
+    }
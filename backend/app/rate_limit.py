@@ -0,0 +1,120 @@
+"""
+Token-bucket rate limiting (used by POST /api/contact).
+
+A bucket holds up to `burst` tokens and refills at `per_hour` tokens an hour;
+each request takes one, and an empty bucket answers with the seconds until
+the next token (sent as Retry-After). RATE_LIMIT_BACKEND picks where buckets live:
+    memory    per process (default; each Lambda instance / worker counts alone)
+    postgres  rate_limit_buckets table, one atomic upsert per check, shared by
+              every instance
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory").strip().lower()
+# Idle buckets kept by the memory backend (least recently used are dropped first)
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MEMORY_MAX_KEYS", "10000"))
+
+
+class Limit:
+    """burst tokens, refilled at per_hour."""
+
+    def __init__(self, burst: int, per_hour: float):
+        self.burst = burst
+        self.per_second = per_hour / 3600
+
+    def retry_after(self, tokens: float) -> float:
+        """Seconds until a bucket holding `tokens` has one whole token."""
+        if self.per_second <= 0:
+            return 3600.0
+        return max(0.0, (1 - tokens) / self.per_second)
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = RATE_LIMIT_MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (tokens, monotonic)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+            tokens = min(float(limit.burst), tokens + (now - updated) * limit.per_second)
+            if tokens < 1:
+                return limit.retry_after(tokens)
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill and take in one statement; the WHERE leaves an empty bucket untouched
+# (so no row comes back) and RETURNING is empty for a rejected request.
+_TAKE_SQL = text("""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (:key, :burst - 1, now())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at) * :rate) - 1,
+        updated_at = now()
+    WHERE LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at) * :rate) >= 1
+    RETURNING tokens
+""")
+_PEEK_SQL = text("""
+    SELECT LEAST(:burst, tokens + EXTRACT(EPOCH FROM now() - updated_at) * :rate)
+    FROM rate_limit_buckets WHERE key = :key
+""")
+
+
+class PostgresBackend:
+    """Buckets in rate_limit_buckets; checked on its own short transaction."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def take(self, key: str, limit: Limit) -> float:
+        params = {"key": key, "burst": limit.burst, "rate": limit.per_second}
+        with self.engine.begin() as conn:
+            if conn.execute(_TAKE_SQL, params).first() is not None:
+                return 0.0
+            tokens = conn.execute(_PEEK_SQL, params).scalar()
+        return limit.retry_after(float(tokens or 0.0))
+
+    def reset(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM rate_limit_buckets"))
+
+
+_memory = MemoryBackend()
+
+
+def backend(engine: Optional[Engine] = None):
+    """Configured backend; postgres needs the engine (falls back to memory elsewhere)."""
+    if RATE_LIMIT_BACKEND == "postgres" and engine is not None and engine.dialect.name == "postgresql":
+        return PostgresBackend(engine)
+    return _memory
+
+
+def check(keys: dict[str, Limit], engine: Optional[Engine] = None) -> int:
+    """Take a token from each key's bucket; whole seconds to wait if any is empty (else 0).
+
+    Stops at the first empty bucket, so a rejected request doesn't drain the others.
+    """
+    store = backend(engine)
+    for key, limit in keys.items():
+        wait = store.take(key, limit)
+        if wait > 0:
+            return max(1, math.ceil(wait))
+    return 0
@@ -0,0 +1,148 @@
+"""
+Appointment reminders 24h and 2h before a confirmed booking.
+
+Each run selects confirmed bookings whose start falls in (now, now + lead] and
+that have no watermark for that lead yet, REMINDER_BATCH_SIZE at a time in
+scheduled_date order, via ix_bookings_status_scheduled. The reminder messages
+are queued in notification_outbox and the watermark (reminded_24h_at /
+reminded_2h_at) is set in the same commit, so a run can repeat or overlap
+another (rows are locked with SKIP LOCKED) without reminding twice.
+
+A booking confirmed inside the 2h window gets only the 2h reminder. Moving a
+booking clears its watermarks (crud.bookings.update_booking).
+
+Runs from:
+- uvicorn: ReminderLoop thread every REMINDER_POLL_SECONDS (REMINDER_LOOP_THREAD=false to disable)
+- Lambda: the EventBridge schedule that drains the outbox (or invoke with {"reminders": true})
+- by hand: uv run python -m app.reminders run
+"""
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session, selectinload
+
+from app import models, notify, outbox
+from app.timezone import eastern_wall_clock, now_eastern
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = int(os.environ.get("REMINDER_BATCH_SIZE", "100"))
+REMINDER_POLL_SECONDS = float(os.environ.get("REMINDER_POLL_SECONDS", "300"))
+
+# (lead, how far ahead, watermark column); nearest lead first so it wins when both are due
+STAGES = (
+    ("2h", timedelta(hours=2), "reminded_2h_at"),
+    ("24h", timedelta(hours=24), "reminded_24h_at"),
+)
+
+
+def _due_batch(db: Session, lead: timedelta, column: str, now: datetime) -> list[models.Booking]:
+    b = models.Booking
+    watermark = getattr(b, column)
+    # Naive Eastern bounds compare correctly against TIMESTAMP and TIMESTAMPTZ columns
+    start = eastern_wall_clock(now)
+    return (
+        db.query(b)
+        .options(
+            selectinload(b.customer),
+            selectinload(b.package),
+            selectinload(b.booking_items).selectinload(models.BookingItem.package),
+        )
+        .filter(b.status == "confirmed")
+        .filter(b.scheduled_date > start, b.scheduled_date <= start + lead)
+        .filter(watermark.is_(None))
+        .order_by(b.scheduled_date, b.id)
+        .limit(REMINDER_BATCH_SIZE)
+        .with_for_update(of=b, skip_locked=True)
+        .all()
+    )
+
+
+def run(db: Session, now: Optional[datetime] = None) -> dict:
+    """Queue every reminder that is due; returns the number queued per lead."""
+    now = now or now_eastern()
+    counts = {}
+    for i, (lead, ahead, column) in enumerate(STAGES):
+        queued = 0
+        while True:
+            batch = _due_batch(db, ahead, column, now)
+            if not batch:
+                db.rollback()
+                break
+            for booking in batch:
+                outbox.enqueue(db, f"reminder_{lead}", notify.booking_reminder_messages(booking, lead), booking.id)
+                # Later leads are stale once a nearer one is sent
+                for _, _, col in STAGES[i:]:
+                    if getattr(booking, col) is None:
+                        setattr(booking, col, now)
+            db.commit()
+            queued += len(batch)
+            if len(batch) < REMINDER_BATCH_SIZE:
+                break
+        counts[lead] = queued
+    if any(counts.values()):
+        logger.info("reminders queued: %s", counts)
+    return counts
+
+
+class ReminderLoop(threading.Thread):
+    """Periodic reminder scan for long-running servers (uvicorn)."""
+
+    def __init__(self, poll_seconds: float = REMINDER_POLL_SECONDS):
+        super().__init__(name="booking-reminders", daemon=True)
+        self.poll_seconds = poll_seconds
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self) -> None:
+        from app.database import SessionLocal
+
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                run(db)
+            except Exception as e:
+                logger.exception("reminder run failed: %s", e)
+            finally:
+                db.close()
+            self._stopping.wait(self.poll_seconds)
+
+
+_loop: Optional[ReminderLoop] = None
+
+
+def start_loop() -> None:
+    global _loop
+    if _loop is None or not _loop.is_alive():
+        _loop = ReminderLoop()
+        _loop.start()
+
+
+def stop_loop() -> None:
+    if _loop is not None:
+        _loop.stop()
+
+
+def main(argv: list[str]) -> int:
+    from app.database import SessionLocal
+
+    if not argv or argv[0] != "run":
+        print("usage: python -m app.reminders run")
+        return 2
+    db = SessionLocal()
+    try:
+        print(f"reminders queued: {run(db)}")
+        print(f"outbox drained: {outbox.drain(db)}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
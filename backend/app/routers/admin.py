@@ -1,11 +1,13 @@
 """Admin-only JSON routes (X-Admin-Secret)."""
 from datetime import datetime, timedelta
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 
-from app import models, schemas
+from app import booking_txn, cache, free_intervals, models, outbox, provider_health, provider_http, schemas
+from app import quote, reminders, snapshot
 from app.auth import require_admin
 from app.database import get_db
 from app.timezone import EASTERN, now_eastern
@@ -143,3 +145,113 @@ def dashboard_stats(
         most_booked_service=most_booked_service,
         recent_appointments=recent_appointments,
     )
+
+
+@router.post("/free-intervals/rebuild")
+def rebuild_free_intervals(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Recompute the materialized free-interval table from slots and bookings."""
+    return {"rows": free_intervals.rebuild(db)}
+
+
+@router.get("/free-intervals/check")
+def check_free_intervals(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Diff the free-interval table against a full recompute (empty list = consistent)."""
+    mismatches = free_intervals.check(db)
+    return {"consistent": not mismatches, "mismatches": mismatches}
+
+
+@router.get("/cache/stats")
+def cache_stats(_: None = Depends(require_admin)):
+    """Hit/miss counters for the in-process caches and current table generations."""
+    return cache.all_stats()
+
+
+@router.get("/booking-contention")
+def booking_contention(_: None = Depends(require_admin)):
+    """Booking transaction mode, advisory lock waits and serialization retries."""
+    return booking_txn.stats()
+
+
+@router.get("/outbox")
+def outbox_stats(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Notification outbox rows by status and recent delivery failures."""
+    return outbox.stats(db)
+
+
+@router.post("/outbox/drain")
+def drain_outbox(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Send due notifications now (bounded like a Lambda drain-on-invoke)."""
+    return outbox.drain(db, outbox.OUTBOX_INVOKE_BUDGET_SECONDS)
+
+
+@router.post("/reminders/run")
+def run_reminders(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Queue due 24h/2h booking reminders now (the scheduler does this periodically)."""
+    return reminders.run(db)
+
+
+@router.get("/revenue/estimate")
+def revenue_estimate(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[list[str]] = Query(None),
+    vehicle_size: schemas.VehicleSize = quote.QUOTE_DEFAULT_VEHICLE_SIZE,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Estimated revenue of bookings scheduled in [since, until): today's prices at one vehicle size."""
+    return quote.estimate_revenue(db, since, until, status, vehicle_size)
+
+
+@router.post("/snapshot")
+def publish_snapshot(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Render the public catalog as hashed, precompressed JSON plus manifest.json into SNAPSHOT_BUCKET."""
+    if not snapshot.SNAPSHOT_BUCKET:
+        raise HTTPException(status_code=503, detail="SNAPSHOT_BUCKET is not configured")
+    return snapshot.publish(db)
+
+
+@router.get("/snapshot")
+def snapshot_manifest(_: None = Depends(require_admin)):
+    """The published snapshot manifest (404 before the first publish)."""
+    if not snapshot.SNAPSHOT_BUCKET:
+        raise HTTPException(status_code=503, detail="SNAPSHOT_BUCKET is not configured")
+    manifest = snapshot.read_published_manifest()
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No snapshot published yet")
+    return manifest
+
+
+@router.get("/providers")
+def provider_status(_: None = Depends(require_admin)):
+    """Email provider breaker/quota state, success-rate and latency EWMAs, HTTP pool counters."""
+    return {
+        "email": provider_health.snapshot(),
+        "http_pools": provider_http.stats(),
+    }
+
+
+@router.post("/providers/{name}/reset")
+def reset_provider(name: str, _: None = Depends(require_admin)):
+    """Close a provider's breaker and forget its 429 quota (e.g. after upgrading the plan)."""
+    if not provider_health.reset(name):
+        raise HTTPException(status_code=404, detail="Unknown provider")
+    return provider_health.get(name).snapshot()
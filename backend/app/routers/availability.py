@@ -1,36 +1,50 @@
+import os
 from datetime import datetime, timedelta, time
-from app.timezone import now_eastern
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from app.timezone import EASTERN, now_eastern
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.auth import require_admin, is_admin
 from app import models, schemas
-from app.crud import services as crud_services
+from app import availability_engine as engine
+from app import cache
+from app import free_intervals
+from app.crud import slots as crud_slots
 from app.crud.bookings import DEFAULT_BOOKING_DURATION_MINUTES
+from app.package_catalog import required_minutes_for_packages
+
+try:
+    from app import availability_bitmap
+except ImportError:  # NumPy is optional; "bitmap" then falls back to "sweep"
+    availability_bitmap = None
 
 router = APIRouter()
 
 SLOT_INTERVAL_MINUTES = 30
 DEFAULT_REQUIRED_HOURS = 2
+# "materialized" (free_intervals table), "sweep" (recompute per request) or
+# "bitmap" (recompute per request with NumPy cell arrays; needs the bitmap extra)
+BOOKABLE_SLOTS_SOURCE = os.environ.get("BOOKABLE_SLOTS_SOURCE", "materialized").strip().lower()
+# Tables whose writes change bookable starts (generation is part of the cache key)
+AVAILABILITY_TABLES = ("available_slots", "bookings", "free_intervals")
 
-
-def _required_minutes_for_packages(db: Session, package_ids: list[int]) -> int:
-    """Sum of package turnaround (hours) + 2 hours, in minutes."""
-    total_hours = 2.0  # base 2 hours
-    for pid in package_ids or []:
-        pkg = crud_services.get_package(db, pid)
-        if not pkg:
-            continue
-        if pkg.turnaround_hours is not None:
-            total_hours += pkg.turnaround_hours
-        elif pkg.duration_minutes is not None:
-            total_hours += pkg.duration_minutes / 60.0
-    return int(total_hours * 60)
+_bookable_cache = cache.TTLCache(
+    "bookable_slots",
+    maxsize=int(os.environ.get("BOOKABLE_SLOTS_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("BOOKABLE_SLOTS_CACHE_TTL", "60")),
+)
+_calendar_cache = cache.TTLCache(
+    "calendar_summary",
+    maxsize=int(os.environ.get("BOOKABLE_SLOTS_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("BOOKABLE_SLOTS_CACHE_TTL", "60")),
+)
+# Browser/CDN freshness for the (tiny) calendar summary
+CALENDAR_SUMMARY_MAX_AGE = 30
 
 
-def _end_of_day(d: datetime) -> datetime:
-    return datetime.combine(d.date(), time(23, 59, 59), tzinfo=d.tzinfo)
+def _to_minute(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
 
 
 def _parse_cutoff_time(value: Optional[str]):
@@ -49,6 +63,59 @@ def _parse_cutoff_time(value: Optional[str]):
     return None
 
 
+def _iter_sweep_starts(
+    db: Session, start: datetime, end: datetime, required_minutes: int, cutoff_time
+) -> Iterator[tuple[datetime, int]]:
+    """Recompute from available_slots and bookings (no materialized table).
+
+    With BOOKABLE_SLOTS_SOURCE=bitmap the fit test runs on NumPy cell arrays.
+    """
+    slots = (
+        db.query(
+            models.AvailableSlot.id,
+            models.AvailableSlot.slot_start,
+            models.AvailableSlot.slot_end,
+        )
+        .filter(models.AvailableSlot.slot_start >= start)
+        .filter(models.AvailableSlot.slot_start <= end)
+        .order_by(models.AvailableSlot.slot_start, models.AvailableSlot.id)
+        .all()
+    )
+    # Existing bookings with duration for overlap check
+    bookings = (
+        db.query(models.Booking.scheduled_date, models.Booking.duration_minutes)
+        .filter(models.Booking.status != "cancelled")
+        .filter(models.Booking.scheduled_date >= start - timedelta(days=1))
+        .filter(models.Booking.scheduled_date <= end + timedelta(days=1))
+        .all()
+    )
+    windows = [
+        (slot_id, *engine.slot_window(slot_start, slot_end))
+        for slot_id, slot_start, slot_end in slots
+    ]
+    timeline = engine.BusyTimeline(
+        engine.booking_intervals(bookings, DEFAULT_BOOKING_DURATION_MINUTES)
+    )
+    fit = engine.iter_bookable_starts
+    if BOOKABLE_SLOTS_SOURCE == "bitmap" and availability_bitmap is not None:
+        fit = availability_bitmap.iter_bookable_starts
+    return fit(windows, timeline, required_minutes, SLOT_INTERVAL_MINUTES, cutoff_time)
+
+
+def _iter_starts(
+    db: Session, start: datetime, end: datetime, required_minutes: int, cutoff_time
+) -> Iterator[tuple[datetime, int]]:
+    """(start, available_slot_id) from the configured source, before dedupe/sort."""
+    if BOOKABLE_SLOTS_SOURCE in ("sweep", "bitmap"):
+        return _iter_sweep_starts(db, start, end, required_minutes, cutoff_time)
+    return engine.iter_gap_starts(
+        free_intervals.gaps_in_window(db, start, end),
+        required_minutes,
+        SLOT_INTERVAL_MINUTES,
+        cutoff_time,
+    )
+
+
 @router.get("/bookable-slots", response_model=list[schemas.BookableSlotOption])
 def list_bookable_slots(
     from_date: Optional[datetime] = Query(None, description="Start (ISO)"),
@@ -62,81 +129,81 @@ def list_bookable_slots(
     db: Session = Depends(get_db),
 ):
     """Bookable start times: 30-min steps; duration = package turnarounds + 2h."""
-    from app.timezone import as_eastern
-
     now = now_eastern()
     cutoff_time = _parse_cutoff_time(latest_booking_time)
-    start = from_date or now
-    end = to_date or (now + timedelta(days=30))
-    required_minutes = _required_minutes_for_packages(db, package_ids or [])
+    # Whole minutes so repeated "now .. now+30d" requests share cache entries
+    start = _to_minute(from_date or now)
+    end = _to_minute(to_date or (now + timedelta(days=30)))
+    required_minutes = required_minutes_for_packages(db, package_ids or [])
+    # Keyed by duration, not package ids: carts of equal length share an entry
+    key = (start, end, required_minutes, cutoff_time, cache.generation(*AVAILABILITY_TABLES))
+    options = _bookable_cache.get(key)
+    if options is None:
+        starts = engine.dedupe_sorted(
+            _iter_starts(db, start, end, required_minutes, cutoff_time)
+        )
+        options = [
+            schemas.BookableSlotOption(start=s, available_slot_id=slot_id)
+            for s, slot_id in starts
+        ]
+        _bookable_cache.set(key, options)
+    return options
 
-    slots = (
-        db.query(models.AvailableSlot)
-        .filter(models.AvailableSlot.slot_start >= start)
-        .filter(models.AvailableSlot.slot_start <= end)
-        .order_by(models.AvailableSlot.slot_start)
-        .all()
-    )
-    # Existing bookings with duration for overlap check
-    bookings = (
-        db.query(models.Booking)
-        .filter(models.Booking.status != "cancelled")
-        .filter(models.Booking.scheduled_date >= start - timedelta(days=1))
-        .filter(models.Booking.scheduled_date <= end + timedelta(days=1))
-        .all()
-    )
 
-    result = []
-    required_delta = timedelta(minutes=required_minutes)
-    interval = timedelta(minutes=SLOT_INTERVAL_MINUTES)
-
-    for slot in slots:
-        slot_start = slot.slot_start
-        slot_end = slot.slot_end if slot.slot_end else _end_of_day(slot_start)
-        if slot_end <= slot_start:
-            continue
-        # Last possible start so that [start, start+required] fits in slot
-        last_start = slot_end - required_delta
-        if last_start < slot_start:
-            continue
-
-        current = slot_start
-        while current <= last_start:
-            candidate_end = current + required_delta
-            # Overlap: booking [b_start, b_end] vs [current, candidate_end]
-            overlaps = False
-            for b in bookings:
-                b_start = b.scheduled_date
-                b_minutes = (
-                    b.duration_minutes
-                    if b.duration_minutes is not None
-                    else DEFAULT_BOOKING_DURATION_MINUTES
-                )
-                b_end = b_start + timedelta(minutes=b_minutes)
-                if b_start < candidate_end and b_end > current:
-                    overlaps = True
-                    break
-            if not overlaps:
-                if cutoff_time is not None:
-                    local_time = as_eastern(current).time()
-                    if local_time > cutoff_time:
-                        current += interval
-                        continue
-                result.append(
-                    schemas.BookableSlotOption(start=current, available_slot_id=slot.id)
-                )
-            current += interval
-
-    # Dedupe by start; sort by start
-    seen = set()
-    unique = []
-    for r in result:
-        key = r.start.isoformat()
-        if key not in seen:
-            seen.add(key)
-            unique.append(r)
-    unique.sort(key=lambda x: x.start)
-    return unique
+def _month_start(value: Optional[str], now: datetime) -> datetime:
+    """'YYYY-MM' (default: current month) -> first instant of that month, Eastern."""
+    if value:
+        try:
+            y, m = (int(p) for p in value.strip().split("-"))
+            return datetime(y, m, 1, tzinfo=EASTERN)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    return datetime(now.year, now.month, 1, tzinfo=EASTERN)
+
+
+def _add_months(d: datetime, months: int) -> datetime:
+    y, m = divmod(d.month - 1 + months, 12)
+    return d.replace(year=d.year + y, month=m + 1)
+
+
+@router.get("/calendar-summary", response_model=schemas.CalendarSummary)
+def calendar_summary(
+    response: Response,
+    month: Optional[str] = Query(None, description="First month, YYYY-MM (default: current)"),
+    months: int = Query(1, ge=1, le=3, description="1 = month, 3 = quarter"),
+    package_ids: Optional[list[int]] = Query(
+        None, description="Package IDs in cart (turnaround sum + 2h = slot length)"
+    ),
+    latest_booking_time: Optional[str] = Query(
+        None, description="No start times after this (Eastern), e.g. 13:00 for 1PM"
+    ),
+    db: Session = Depends(get_db),
+):
+    """Per-day count and earliest/latest bookable start; days with none are omitted."""
+    now = now_eastern()
+    cutoff_time = _parse_cutoff_time(latest_booking_time)
+    first = _month_start(month, now)
+    end = _add_months(first, months) - timedelta(microseconds=1)
+    start = _to_minute(max(first, now))
+    required_minutes = required_minutes_for_packages(db, package_ids or [])
+    key = (start, end, required_minutes, cutoff_time, cache.generation(*AVAILABILITY_TABLES))
+    summary = _calendar_cache.get(key)
+    if summary is None:
+        days = engine.day_summary(
+            _iter_starts(db, start, end, required_minutes, cutoff_time)
+        )
+        summary = schemas.CalendarSummary(
+            from_date=start,
+            to_date=end,
+            required_minutes=required_minutes,
+            days=[
+                schemas.CalendarDaySummary(day=d, count=c, earliest=lo, latest=hi)
+                for d, (c, lo, hi) in sorted(days.items())
+            ],
+        )
+        _calendar_cache.set(key, summary)
+    response.headers["Cache-Control"] = f"public, max-age={CALENDAR_SUMMARY_MAX_AGE}"
+    return summary
 
 
 @router.get("", response_model=list[schemas.AvailableSlot])
@@ -196,25 +263,67 @@ def create_available_slots_batch(
     _: None = Depends(require_admin),
 ):
     """Admin: add multiple slots; duplicates (overlapping same day) are skipped."""
-    created = []
-    duplicates_skipped = 0
-    for s in body.slots:
-        if _slot_overlaps_existing(db, s.slot_start, s.slot_end):
-            duplicates_skipped += 1
-            continue
-        db_slot = models.AvailableSlot(slot_start=s.slot_start, slot_end=s.slot_end)
-        db.add(db_slot)
-        db.flush()
-        db.refresh(db_slot)
-        created.append(db_slot)
+    created, duplicates_skipped = crud_slots.insert_slots(
+        db, [(s.slot_start, s.slot_end) for s in body.slots]
+    )
+    # Serialize before commit expires the rows (avoids a refresh per slot)
+    out = [schemas.AvailableSlot.model_validate(c) for c in created]
     db.commit()
-    for c in created:
-        db.refresh(c)
     return schemas.AvailableSlotBatchResult(
-        created=created, duplicates_skipped=duplicates_skipped
+        created=out, duplicates_skipped=duplicates_skipped
     )
 
 
+@router.get("/templates", response_model=list[schemas.SlotTemplate])
+def list_slot_templates(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Admin: recurring weekly availability templates."""
+    return crud_slots.get_templates(db)
+
+
+@router.post("/templates", response_model=schemas.SlotTemplate)
+def create_slot_template(
+    template: schemas.SlotTemplateCreate,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Admin: add a template (weekday + open/close + date range + exception dates)."""
+    try:
+        return crud_slots.create_template(db, template)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/templates/{template_id}")
+def delete_slot_template(
+    template_id: int,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Admin: remove a template (slots already created are kept)."""
+    if not crud_slots.delete_template(db, template_id):
+        raise HTTPException(status_code=404, detail="Template not found")
+    return {"message": "Template deleted"}
+
+
+@router.post("/templates/materialize", response_model=schemas.SlotMaterializeResult)
+def materialize_slot_templates(
+    body: schemas.SlotMaterializeRequest,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Admin: create slots from templates for a date range; overlaps are skipped."""
+    try:
+        created, skipped = crud_slots.materialize_templates(
+            db, body.from_date, body.to_date, body.template_ids
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schemas.SlotMaterializeResult(created=created, duplicates_skipped=skipped)
+
+
 @router.post("", response_model=schemas.AvailableSlot)
 def create_available_slot(
     slot: schemas.AvailableSlotCreate,
@@ -229,6 +338,8 @@ def create_available_slot(
         )
     db_slot = models.AvailableSlot(**slot.model_dump())
     db.add(db_slot)
+    db.flush()
+    free_intervals.refresh_slots(db, [db_slot.id])
     db.commit()
     db.refresh(db_slot)
     return db_slot
@@ -247,6 +358,7 @@ def delete_available_slot(
     )
     if not db_slot:
         raise HTTPException(status_code=404, detail="Slot not found")
+    free_intervals.remove_slot(db, slot_id)
     db.delete(db_slot)
     db.commit()
     return {"message": "Slot deleted"}
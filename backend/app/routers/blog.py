@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Union
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app import http_cache, models, schemas
+from app.crud import blog as crud_blog
 
 router = APIRouter()
 
@@ -13,13 +15,41 @@ def create_blog_post(post: schemas.BlogPostCreate, db: Session = Depends(get_db)
     db.refresh(db_post)
     return db_post
 
-@router.get("", response_model=list[schemas.BlogPost])
-def list_blog_posts(skip: int = 0, limit: int = 100, published_only: bool = True, db: Session = Depends(get_db)):
+@router.get(
+    "",
+    response_model=Union[list[schemas.BlogPost], list[schemas.BlogPostSummary]],
+    dependencies=[Depends(http_cache.cached("blog_posts"))],
+)
+def list_blog_posts(
+    skip: int = 0,
+    limit: int = 100,
+    published_only: bool = True,
+    view: str = Query("full", pattern="^(full|summary)$", description="summary: excerpt instead of content"),
+    db: Session = Depends(get_db),
+):
+    if view == "summary":
+        return [
+            schemas.BlogPostSummary.model_validate(p)
+            for p in crud_blog.get_post_summaries(db, skip=skip, limit=limit, published_only=published_only)
+        ]
     query = db.query(models.BlogPost)
     if published_only:
         query = query.filter(models.BlogPost.published == True)
     return query.offset(skip).limit(limit).all()
 
+@router.get(
+    "/search",
+    response_model=list[schemas.BlogPostSummary],
+    dependencies=[Depends(http_cache.cached("blog_posts"))],
+)
+def search_blog_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Published posts matching q, best match first (title counts more than content)."""
+    return crud_blog.search_posts(db, q, limit=limit)
+
 @router.get("/{post_id}", response_model=schemas.BlogPost)
 def get_blog_post(post_id: int, db: Session = Depends(get_db)):
     db_post = db.query(models.BlogPost).filter(models.BlogPost.id == post_id).first()
@@ -27,7 +57,7 @@ def get_blog_post(post_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Blog post not found")
     return db_post
 
-@router.get("/slug/{slug}", response_model=schemas.BlogPost)
+@router.get("/slug/{slug}", response_model=schemas.BlogPost, dependencies=[Depends(http_cache.cached("blog_posts"))])
 def get_blog_post_by_slug(slug: str, db: Session = Depends(get_db)):
     db_post = db.query(models.BlogPost).filter(models.BlogPost.slug == slug).first()
     if not db_post:
@@ -1,6 +1,7 @@
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app import schemas
@@ -13,21 +14,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Largest page /with-details returns; a larger limit is clamped, not rejected
+BOOKINGS_PAGE_MAX = 500
+
 @router.post("", response_model=schemas.Booking)
 def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)):
     try:
         db_booking = crud_bookings.create_booking(db=db, booking=booking)
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
-    try:
-        from app.notify import send_booking_notifications
-        send_booking_notifications(db, db_booking.id)
-    except Exception as e:
-        logger.exception(
-            "send_booking_notifications failed for booking_id=%s: %s",
-            getattr(db_booking, "id", None),
-            e,
-        )
+    # Notifications were queued in the booking's transaction (app.outbox)
     return db_booking
 
 
@@ -42,16 +38,6 @@ def create_booking_multi(
         db_booking = crud_bookings.create_booking_multi(db=db, payload=payload)
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
-    if db_booking:
-        try:
-            from app.notify import send_booking_notifications
-            send_booking_notifications(db, db_booking.id)
-        except Exception as e:
-            logger.exception(
-                "send_booking_notifications failed for multi booking_id=%s: %s",
-                getattr(db_booking, "id", None),
-                e,
-            )
     return db_booking
 
 
@@ -62,16 +48,31 @@ def list_bookings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 
 @router.get("/with-details", response_model=list[schemas.BookingWithDetails])
 def list_bookings_with_details(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, description=f"Page size, at most {BOOKINGS_PAGE_MAX} (larger values are clamped)"),
     include_archived: bool = False,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     db: Session = Depends(get_db),
     _: None = Depends(require_admin),
 ):
-    """For owner view. Hides completed >7 days by default; all states kept in DB. Admin only."""
-    return crud_bookings.get_bookings_with_details(
-        db, skip=skip, limit=limit, include_archived=include_archived
-    )
+    """For owner view. Hides completed >7 days by default; all states kept in DB. Admin only.
+
+    Newest first. When more rows exist the X-Next-Cursor header holds the cursor for the next page.
+    """
+    try:
+        page, next_cursor = crud_bookings.get_bookings_with_details(
+            db,
+            skip=skip,
+            limit=max(0, min(limit, BOOKINGS_PAGE_MAX)),
+            include_archived=include_archived,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
 
 
 @router.get("/{booking_id}", response_model=schemas.Booking)
@@ -92,21 +93,12 @@ def update_booking(
     existing = crud_bookings.get_booking(db, booking_id=booking_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Booking not found")
-    old_status = existing.status
-    db_booking = crud_bookings.update_booking(
-        db=db, booking_id=booking_id, booking=booking
-    )
-    # When admin confirms a pending booking, email the customer
-    if old_status == "pending" and booking.status == "confirmed":
-        try:
-            from app.notify import send_booking_confirmed_notification
-            send_booking_confirmed_notification(db, booking_id)
-        except Exception as e:
-            logger.exception(
-                "send_booking_confirmed_notification failed for booking_id=%s: %s",
-                booking_id,
-                e,
-            )
+    try:
+        db_booking = crud_bookings.update_booking(
+            db=db, booking_id=booking_id, booking=booking
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return db_booking
 
 @router.delete("/{booking_id}", response_model=schemas.Booking)
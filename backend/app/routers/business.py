@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import models, schemas
+from app import http_cache, models, schemas
 
 router = APIRouter()
 
@@ -13,7 +13,7 @@ def create_business_info(info: schemas.BusinessInfoCreate, db: Session = Depends
     db.refresh(db_info)
     return db_info
 
-@router.get("/info", response_model=schemas.BusinessInfo)
+@router.get("/info", response_model=schemas.BusinessInfo, dependencies=[Depends(http_cache.cached("business_info"))])
 def get_business_info(db: Session = Depends(get_db)):
     db_info = db.query(models.BusinessInfo).first()
     if not db_info:
@@ -39,7 +39,7 @@ def create_faq(faq: schemas.FAQCreate, db: Session = Depends(get_db)):
     db.refresh(db_faq)
     return db_faq
 
-@router.get("/faq", response_model=list[schemas.FAQ])
+@router.get("/faq", response_model=list[schemas.FAQ], dependencies=[Depends(http_cache.cached("faqs"))])
 def list_faqs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return db.query(models.FAQ).order_by(models.FAQ.order_index).offset(skip).limit(limit).all()
 
@@ -0,0 +1,57 @@
+"""Every service with its packages in one response (replaces /services + N x /services/{id}/packages)."""
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, selectinload
+
+from app import cache, http_cache, models, schemas
+from app.database import get_db
+
+router = APIRouter()
+
+CATALOG_TABLES = ("services", "packages")
+
+_catalog_adapter = TypeAdapter(list[schemas.ServiceWithPackages])
+# Rendered JSON per shared (services, packages) version, the same version the ETag is built from
+_catalog_cache = cache.TTLCache("catalog", maxsize=4, ttl=300.0)
+
+
+def _package_order(pkg: models.Package):
+    # Same order as /api/services/{id}/packages: display_order ASC (NULLs last), then id
+    return (pkg.display_order is None, pkg.display_order or 0, pkg.id)
+
+
+def build_catalog(db: Session) -> list[schemas.ServiceWithPackages]:
+    """Two queries total: services, then all their packages (selectinload)."""
+    services = (
+        db.query(models.Service)
+        .options(selectinload(models.Service.packages))
+        .order_by(models.Service.id)
+        .all()
+    )
+    return [
+        schemas.ServiceWithPackages.model_validate(svc).model_copy(
+            update={
+                "packages": [
+                    schemas.Package.model_validate(p) for p in sorted(svc.packages, key=_package_order)
+                ]
+            }
+        )
+        for svc in services
+    ]
+
+
+@router.get(
+    "",
+    response_model=list[schemas.ServiceWithPackages],
+    dependencies=[Depends(http_cache.cached(*CATALOG_TABLES))],
+)
+def get_catalog(response: Response, db: Session = Depends(get_db)):
+    """All services, each with its packages ordered by display_order, id."""
+    key = http_cache.versions(db, CATALOG_TABLES)
+    body = _catalog_cache.get(key)
+    if body is None:
+        body = _catalog_adapter.dump_json(build_catalog(db))
+        _catalog_cache.set(key, body)
+    # Pre-rendered bytes skip response_model serialization; carry over the ETag/Cache-Control
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,13 +1,61 @@
+import hashlib
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from app.auth import require_admin
 from app.database import get_db
-from app import models, schemas
+from app import models, rate_limit, schemas
+from app.crud import contact as crud_contact
 from app.email_send import send_email, OWNER_EMAIL, is_configured
+from app.timezone import eastern_wall_clock, now_eastern
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Token buckets per client IP and per sender email (burst, then refill per hour)
+CONTACT_IP_LIMIT = rate_limit.Limit(
+    int(os.environ.get("CONTACT_IP_BURST", "5")),
+    float(os.environ.get("CONTACT_IP_PER_HOUR", "10")),
+)
+CONTACT_EMAIL_LIMIT = rate_limit.Limit(
+    int(os.environ.get("CONTACT_EMAIL_BURST", "3")),
+    float(os.environ.get("CONTACT_EMAIL_PER_HOUR", "5")),
+)
+# Same sender + same text within this window is saved once and emailed once
+CONTACT_DEDUPE_MINUTES = float(os.environ.get("CONTACT_DEDUPE_MINUTES", "1440"))
+# Behind a proxy that appends the client address (Render, nginx); not for Lambda URLs
+TRUST_X_FORWARDED_FOR = os.environ.get("TRUST_X_FORWARDED_FOR", "false").lower() == "true"
+RATE_LIMITED_MESSAGE = "Too many messages. Please try again later or give us a call."
+
+
+def _client_ip(request: Request) -> str:
+    if TRUST_X_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        # Our proxy appends the address it saw; earlier entries are client-supplied
+        hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+        if hops:
+            return hops[-1]
+    return request.client.host if request.client else "unknown"
+
+
+def _content_hash(message: schemas.ContactMessageCreate) -> str:
+    text = " ".join(message.message.split()).lower()
+    return hashlib.sha256(f"{message.email.strip().lower()}\n{text}".encode("utf-8")).hexdigest()
+
+
+def _recent_duplicate(db: Session, content_hash: str):
+    since = eastern_wall_clock(now_eastern()) - timedelta(minutes=CONTACT_DEDUPE_MINUTES)
+    return (
+        db.query(models.ContactMessage)
+        .filter(models.ContactMessage.content_hash == content_hash)
+        .filter(models.ContactMessage.created_at >= since)
+        .order_by(models.ContactMessage.id.desc())
+        .first()
+    )
+
 
 def _send_contact_emails(msg: models.ContactMessage):
     """Email owner with contact form content and send confirmation to customer."""
@@ -34,11 +82,28 @@ def _send_contact_emails(msg: models.ContactMessage):
     send_email(msg.email, customer_subject, customer_body)
 
 
-@router.post("", response_model=schemas.ContactMessage)
+@router.post("", response_model=schemas.ContactMessageSubmitted)
 def create_contact_message(
-    message: schemas.ContactMessageCreate, db: Session = Depends(get_db)
+    message: schemas.ContactMessageCreate, request: Request, db: Session = Depends(get_db)
 ):
-    db_message = models.ContactMessage(**message.model_dump())
+    retry_after = rate_limit.check(
+        {
+            f"contact:ip:{_client_ip(request)}": CONTACT_IP_LIMIT,
+            f"contact:email:{message.email.strip().lower()}": CONTACT_EMAIL_LIMIT,
+        },
+        db.get_bind(),
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=429, detail=RATE_LIMITED_MESSAGE, headers={"Retry-After": str(retry_after)}
+        )
+    content_hash = _content_hash(message)
+    duplicate = _recent_duplicate(db, content_hash)
+    if duplicate is not None:
+        # Resubmit or bot replay: return the earlier message flagged duplicate; don't store or email again
+        logger.info("Duplicate contact message from %s ignored (matches id=%s)", message.email, duplicate.id)
+        return schemas.ContactMessageSubmitted.model_validate(duplicate).model_copy(update={"duplicate": True})
+    db_message = models.ContactMessage(**message.model_dump(), content_hash=content_hash)
     db.add(db_message)
     db.commit()
     db.refresh(db_message)
@@ -54,6 +119,31 @@ def list_contact_messages(
 ):
     return db.query(models.ContactMessage).offset(skip).limit(limit).all()
 
+@router.get("/search", response_model=list[schemas.ContactMessage])
+def search_contact_messages(
+    response: Response,
+    q: Optional[str] = Query(None, description="Words to find in name, email or message"),
+    since: Optional[datetime] = Query(None, description="Received at or after"),
+    until: Optional[datetime] = Query(None, description="Received before"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_admin),
+):
+    """Search the inbox, newest first. Admin only.
+
+    When more rows exist the X-Next-Cursor header holds the cursor for the next page.
+    """
+    try:
+        page, next_cursor = crud_contact.search_contact_messages(
+            db, q=q, since=since, until=until, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
+
 @router.get("/{message_id}", response_model=schemas.ContactMessage)
 def get_contact_message(message_id: int, db: Session = Depends(get_db)):
     db_message = (
@@ -1,20 +1,65 @@
 """Dedicated package routes to avoid path conflicts with /api/services/{id}."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import schemas
+from app import http_cache, schemas
 from app.crud import services as crud_services
 
 router = APIRouter()
 
+# Upper bound on ids per batch request (a cart, not a catalog dump)
+MAX_BATCH_IDS = 100
 
-@router.get("/{package_id}", response_model=schemas.PackageWithService)
-def get_package_with_service(package_id: int, db: Session = Depends(get_db)):
-    """Get a single package with service name/slug."""
-    pkg = crud_services.get_package(db, package_id)
-    if not pkg:
-        raise HTTPException(status_code=404, detail="Package not found")
+
+def _with_service(pkg) -> schemas.PackageWithService:
     out = schemas.PackageWithService.model_validate(pkg)
     out.service_name = pkg.service.name if pkg.service else None
     out.service_slug = pkg.service.slug if pkg.service else None
     return out
+
+
+def _parse_ids(ids: str) -> list[int]:
+    """'3,1,3' -> [3, 1]: requested order, duplicates dropped."""
+    seen = {}
+    for part in ids.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            seen.setdefault(int(part), None)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid package id: {part!r}")
+    if len(seen) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return list(seen)
+
+
+@router.get(
+    "",
+    response_model=schemas.PackageBatch,
+    dependencies=[Depends(http_cache.cached("packages", "services"))],
+)
+def get_packages_with_service(
+    ids: str = Query(..., description="Comma-separated package ids, e.g. 1,2,3"),
+    db: Session = Depends(get_db),
+):
+    """Several packages with service name/slug in one query, in the order requested."""
+    wanted = _parse_ids(ids)
+    found = crud_services.get_packages_with_service(db, wanted)
+    return schemas.PackageBatch(
+        packages=[_with_service(found[i]) for i in wanted if i in found],
+        missing=[i for i in wanted if i not in found],
+    )
+
+
+@router.get(
+    "/{package_id}",
+    response_model=schemas.PackageWithService,
+    dependencies=[Depends(http_cache.cached("packages", "services"))],
+)
+def get_package_with_service(package_id: int, db: Session = Depends(get_db)):
+    """Get a single package with service name/slug."""
+    pkg = crud_services.get_package_with_service(db, package_id)
+    if not pkg:
+        raise HTTPException(status_code=404, detail="Package not found")
+    return _with_service(pkg)
@@ -0,0 +1,18 @@
+"""Cart pricing (see app.quote): the server-side total for a set of packages."""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import quote, schemas
+from app.database import get_db
+
+router = APIRouter()
+
+
+@router.post("", response_model=schemas.Quote)
+def create_quote(payload: schemas.QuoteRequest, db: Session = Depends(get_db)):
+    """Line items, subtotal, savings vs. original prices and required duration for the cart."""
+    lines = [quote.CartLine(i.package_id, i.vehicle_size, i.quantity) for i in payload.items]
+    try:
+        return quote.quote(db, lines)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import schemas
+from app import http_cache, schemas
 from app.crud import reviews as crud_reviews
 
 router = APIRouter()
@@ -14,7 +14,7 @@ def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
 def list_reviews(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return crud_reviews.get_reviews(db, skip=skip, limit=limit)
 
-@router.get("/verified", response_model=list[schemas.Review])
+@router.get("/verified", response_model=list[schemas.Review], dependencies=[Depends(http_cache.cached("reviews"))])
 def get_verified_reviews(limit: int = 10, db: Session = Depends(get_db)):
     return crud_reviews.get_verified_reviews(db, limit=limit)
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app import schemas
+from app import http_cache, schemas
 from app.crud import services as crud_services
 
 router = APIRouter()
@@ -10,7 +10,7 @@ router = APIRouter()
 def create_service(service: schemas.ServiceCreate, db: Session = Depends(get_db)):
     return crud_services.create_service(db=db, service=service)
 
-@router.get("", response_model=list[schemas.Service])
+@router.get("", response_model=list[schemas.Service], dependencies=[Depends(http_cache.cached("services"))])
 def list_services(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return crud_services.get_services(db, skip=skip, limit=limit)
 
@@ -43,7 +43,11 @@ def delete_service(service_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Service not found")
     return db_service
 
-@router.get("/{service_id}/packages", response_model=list[schemas.Package])
+@router.get(
+    "/{service_id}/packages",
+    response_model=list[schemas.Package],
+    dependencies=[Depends(http_cache.cached("packages"))],
+)
 def get_service_packages(service_id: int, db: Session = Depends(get_db)):
     packages = crud_services.get_service_packages(db, service_id=service_id)
     return packages
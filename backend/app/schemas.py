@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, ConfigDict, model_validator
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator, model_validator
+from datetime import date, datetime
+from typing import Literal, Optional
 
 # Customer Schemas
 class CustomerBase(BaseModel):
@@ -59,6 +59,11 @@ class Package(PackageBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ServiceWithPackages(Service):
+    """Catalog entry: a service and its packages in display order."""
+    packages: list[Package] = []
+
+
 class PackageWithService(BaseModel):
     """Package with service info for detail page."""
     id: int
@@ -82,6 +87,47 @@ class PackageWithService(BaseModel):
     service_slug: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
+class PackageBatch(BaseModel):
+    """GET /api/packages?ids=: found packages in requested order, plus ids that don't exist."""
+    packages: list[PackageWithService] = []
+    missing: list[int] = []
+
+
+VehicleSize = Literal["small", "medium", "large"]
+
+
+class QuoteItem(BaseModel):
+    package_id: int
+    vehicle_size: Optional[VehicleSize] = None  # required for tiered packages
+    quantity: int = Field(1, ge=1, le=20)
+
+
+class QuoteRequest(BaseModel):
+    items: list[QuoteItem] = Field(..., min_length=1, max_length=100)
+
+
+class QuoteLine(BaseModel):
+    package_id: int
+    name: str
+    vehicle_size: Optional[VehicleSize] = None
+    quantity: int
+    unit_price: Optional[float] = None
+    unit_original: Optional[float] = None
+    total: float
+    savings: float
+    duration_minutes: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Quote(BaseModel):
+    """POST /api/quote: priced line items, totals and the booking length they need."""
+    items: list[QuoteLine]
+    missing: list[int] = []
+    subtotal: float
+    savings: float
+    duration_minutes: int
+    model_config = ConfigDict(from_attributes=True)
+
 # Booking Schemas
 class BookingBase(BaseModel):
     scheduled_date: datetime
@@ -213,6 +259,10 @@ class ContactMessage(ContactMessageCreate):
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class ContactMessageSubmitted(ContactMessage):
+    """POST /api/contact response; duplicate=True means an identical recent message was kept instead."""
+    duplicate: bool = False
+
 # Business Info Schemas
 class BusinessInfoCreate(BaseModel):
     phone: Optional[str] = None
@@ -251,12 +301,63 @@ class AvailableSlotBatchResult(BaseModel):
     duplicates_skipped: int
 
 
+class SlotTemplateCreate(BaseModel):
+    """Weekly availability: every `weekday` between start_date and end_date, minus exceptions."""
+    weekday: int = Field(ge=0, le=6, description="0=Monday .. 6=Sunday")
+    open_time: str = Field(description="HH:MM Eastern")
+    close_time: Optional[str] = Field(None, description="HH:MM Eastern; empty = until end of day")
+    start_date: date
+    end_date: Optional[date] = None
+    exceptions: list[date] = []
+
+
+class SlotTemplate(SlotTemplateCreate):
+    id: int
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("exceptions", mode="before")
+    @classmethod
+    def split_exceptions(cls, v):
+        if isinstance(v, str):
+            return [d for d in v.split(",") if d.strip()]
+        return v or []
+
+
+class SlotMaterializeRequest(BaseModel):
+    """Expand templates into available_slots for [from_date, to_date] (inclusive)."""
+    from_date: date
+    to_date: date
+    template_ids: Optional[list[int]] = None
+
+
+class SlotMaterializeResult(BaseModel):
+    created: int
+    duplicates_skipped: int
+
+
 class BookableSlotOption(BaseModel):
     """A single bookable start time within an availability window (client-side breakdown)."""
     start: datetime
     available_slot_id: int
 
 
+class CalendarDaySummary(BaseModel):
+    """Bookable starts on one (Eastern) day."""
+    day: date
+    count: int
+    earliest: datetime
+    latest: datetime
+
+
+class CalendarSummary(BaseModel):
+    """Month/quarter at a glance for the booking calendar."""
+    from_date: datetime
+    to_date: datetime
+    required_minutes: int
+    days: list[CalendarDaySummary]
+
+
 # FAQ Schemas
 class FAQCreate(BaseModel):
     question: str
@@ -281,3 +382,15 @@ class BlogPost(BlogPostCreate):
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+class BlogPostSummary(BaseModel):
+    """List/search view: no content, just its opening."""
+    id: int
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    image_url: Optional[str] = None
+    published: bool = False
+    created_at: datetime
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,286 @@
+"""
+Static snapshot of the public catalog endpoints for CDN / static hosting.
+
+Renders the catalog, services, each service's packages, each package,
+business info, FAQ, published blog posts (list and by slug) and verified
+reviews with the same handlers and response schemas as the API:
+
+    services.3f2a9c1be0d4.json       content-hashed, never rewritten (cache forever)
+    services.3f2a9c1be0d4.json.gz    precompressed gzip
+    services.3f2a9c1be0d4.json.br    precompressed brotli (needs the "snapshot" extra)
+    manifest.json                    API path -> file, sha256, sizes (cache briefly)
+
+A client fetches manifest.json and re-downloads only files whose sha256
+changed. Files are written once; older versions are kept so clients holding
+a previous manifest still resolve, and manifest.json always goes last.
+
+Two targets:
+
+    uv run python -m app.snapshot publish            S3 bucket behind the CDN
+                                                     (SNAPSHOT_BUCKET, SNAPSHOT_PREFIX;
+                                                     POST /api/admin/snapshot does the same)
+    uv run python -m app.snapshot export [DIR] [--prune]
+                                                     local directory, e.g. to sync with
+                                                     aws s3 sync DIR s3://bucket/prefix
+                                                     (upload manifest.json last)
+
+Publishing needs boto3 (in the Lambda runtime; the "snapshot" extra elsewhere).
+A Lambda's own filesystem is not a target: it is read-only apart from a
+per-instance /tmp that no CDN can reach.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.routers import blog, business, catalog, packages, reviews, services
+from app.timezone import now_eastern
+
+try:
+    import brotli
+except ImportError:  # optional; without it only .json and .json.gz are written
+    brotli = None
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshot")
+SNAPSHOT_BUCKET = os.environ.get("SNAPSHOT_BUCKET", "")
+SNAPSHOT_PREFIX = os.environ.get("SNAPSHOT_PREFIX", "snapshot/").strip("/")
+MANIFEST = "manifest.json"
+# Lists are exported whole rather than at the API's default page size
+LIST_LIMIT = 1000
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MANIFEST_CACHE_CONTROL = "public, max-age=60"
+
+
+class Rendered(NamedTuple):
+    path: str
+    name: str
+    body: bytes
+    gz: bytes
+    br: Optional[bytes]
+
+
+def _entries(db: Session) -> Iterator[tuple[str, Any, Callable[[], Any]]]:
+    """(API path, response schema, handler call) for every exported endpoint."""
+    yield "/api/catalog", list[schemas.ServiceWithPackages], lambda: catalog.build_catalog(db)
+    yield "/api/services", list[schemas.Service], lambda: services.list_services(0, LIST_LIMIT, db)
+    for svc in db.query(models.Service.id).order_by(models.Service.id).all():
+        yield (
+            f"/api/services/{svc.id}/packages",
+            list[schemas.Package],
+            lambda sid=svc.id: services.get_service_packages(sid, db),
+        )
+    for pkg in db.query(models.Package.id).order_by(models.Package.id).all():
+        yield (
+            f"/api/packages/{pkg.id}",
+            schemas.PackageWithService,
+            lambda pid=pkg.id: packages.get_package_with_service(pid, db),
+        )
+    yield "/api/business/info", schemas.BusinessInfo, lambda: business.get_business_info(db)
+    yield "/api/business/faq", list[schemas.FAQ], lambda: business.list_faqs(0, LIST_LIMIT, db)
+    yield "/api/blog", list[schemas.BlogPost], lambda: blog.list_blog_posts(0, LIST_LIMIT, True, "full", db)
+    published = db.query(models.BlogPost.slug).filter(models.BlogPost.published == True)
+    for post in published.order_by(models.BlogPost.id).all():
+        yield (
+            f"/api/blog/slug/{post.slug}",
+            schemas.BlogPost,
+            lambda slug=post.slug: blog.get_blog_post_by_slug(slug, db),
+        )
+    yield "/api/reviews/verified", list[schemas.Review], lambda: reviews.get_verified_reviews(10, db)
+
+
+def _file_stem(path: str) -> str:
+    """/api/services/3/packages -> services__3__packages"""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", path.removeprefix("/api/").replace("/", "__"))
+
+
+def _write_once(directory: str, name: str, data: bytes) -> bool:
+    """Write data unless the (content-addressed) file exists; atomic via rename."""
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        return False
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return True
+
+
+def _render(db: Session) -> Iterator[Rendered]:
+    for path, schema, call in _entries(db):
+        try:
+            value = call()
+        except HTTPException:
+            continue  # e.g. no business info yet: the API would 404 too
+        adapter = TypeAdapter(schema)
+        body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+        name = f"{_file_stem(path)}.{hashlib.sha256(body).hexdigest()[:12]}.json"
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        br = brotli.compress(body, quality=11) if brotli is not None else None
+        yield Rendered(path, name, body, gz, br)
+
+
+def _manifest_entry(r: Rendered) -> dict:
+    entry = {"file": r.name, "sha256": hashlib.sha256(r.body).hexdigest(), "bytes": len(r.body)}
+    entry["gzip_bytes"] = len(r.gz)
+    if r.br is not None:
+        entry["br_bytes"] = len(r.br)
+    return entry
+
+
+def _manifest(files: dict) -> dict:
+    version = hashlib.sha256(
+        "".join(f"{p}{e['sha256']}" for p, e in sorted(files.items())).encode()
+    ).hexdigest()[:12]
+    return {"version": version, "generated_at": now_eastern().isoformat(), "files": files}
+
+
+def export(db: Session, directory: Optional[str] = None, prune: bool = False) -> dict:
+    """Render every endpoint into directory and write the manifest; returns a summary."""
+    directory = directory or SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    written = 0
+    for r in _render(db):
+        written += _write_once(directory, r.name, r.body)
+        written += _write_once(directory, r.name + ".gz", r.gz)
+        if r.br is not None:
+            written += _write_once(directory, r.name + ".br", r.br)
+        files[r.path] = _manifest_entry(r)
+
+    manifest = _manifest(files)
+    tmp = os.path.join(directory, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+
+    pruned = 0
+    if prune:
+        keep = {MANIFEST}
+        for e in files.values():
+            keep.update((e["file"], e["file"] + ".gz", e["file"] + ".br"))
+        for name in os.listdir(directory):
+            if name not in keep and name.endswith((".json", ".json.gz", ".json.br")):
+                os.remove(os.path.join(directory, name))
+                pruned += 1
+    return {
+        "directory": os.path.abspath(directory),
+        "version": manifest["version"],
+        "files": len(files),
+        "written": written,
+        "pruned": pruned,
+        "brotli": brotli is not None,
+    }
+
+
+def read_manifest(directory: Optional[str] = None) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory or SNAPSHOT_DIR, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _s3():
+    import boto3
+
+    return boto3.client("s3")
+
+
+def _key(prefix: str, name: str) -> str:
+    return f"{prefix}/{name}" if prefix else name
+
+
+def publish(db: Session, bucket: Optional[str] = None, prefix: Optional[str] = None, client=None) -> dict:
+    """Render every endpoint into s3://bucket/prefix, manifest.json last; returns a summary.
+
+    Content-hashed objects that already exist are skipped. The .json.gz / .json.br
+    objects carry Content-Encoding, so the CDN can serve them for the plain URL
+    variant it negotiates. Old versions stay; expire them with a lifecycle rule.
+    """
+    bucket = bucket or SNAPSHOT_BUCKET
+    if not bucket:
+        raise ValueError("SNAPSHOT_BUCKET is not set")
+    prefix = SNAPSHOT_PREFIX if prefix is None else prefix.strip("/")
+    client = client or _s3()
+    existing = set()
+    for page in client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=_key(prefix, "")):
+        existing.update(obj["Key"] for obj in page.get("Contents", []))
+
+    def put(name: str, data: bytes, encoding: Optional[str] = None) -> int:
+        key = _key(prefix, name)
+        if key in existing:
+            return 0
+        extra = {"ContentEncoding": encoding} if encoding else {}
+        client.put_object(
+            Bucket=bucket, Key=key, Body=data, ContentType="application/json",
+            CacheControl=IMMUTABLE_CACHE_CONTROL, **extra,
+        )
+        return 1
+
+    files = {}
+    written = 0
+    for r in _render(db):
+        written += put(r.name, r.body)
+        written += put(r.name + ".gz", r.gz, "gzip")
+        if r.br is not None:
+            written += put(r.name + ".br", r.br, "br")
+        files[r.path] = _manifest_entry(r)
+
+    # Only once every file it names is in place
+    manifest = _manifest(files)
+    client.put_object(
+        Bucket=bucket, Key=_key(prefix, MANIFEST),
+        Body=json.dumps(manifest, indent=1, sort_keys=True).encode(),
+        ContentType="application/json", CacheControl=MANIFEST_CACHE_CONTROL,
+    )
+    return {
+        "bucket": bucket,
+        "prefix": prefix,
+        "version": manifest["version"],
+        "files": len(files),
+        "written": written,
+        "brotli": brotli is not None,
+    }
+
+
+def read_published_manifest(bucket: Optional[str] = None, prefix: Optional[str] = None, client=None) -> Optional[dict]:
+    bucket = bucket or SNAPSHOT_BUCKET
+    if not bucket:
+        raise ValueError("SNAPSHOT_BUCKET is not set")
+    prefix = SNAPSHOT_PREFIX if prefix is None else prefix.strip("/")
+    client = client or _s3()
+    try:
+        obj = client.get_object(Bucket=bucket, Key=_key(prefix, MANIFEST))
+    except client.exceptions.NoSuchKey:
+        return None
+    return json.loads(obj["Body"].read())
+
+
+def main(argv: list[str]) -> int:
+    from app.database import SessionLocal
+
+    args = [a for a in argv if not a.startswith("--")]
+    if not args or args[0] not in ("export", "publish"):
+        print("usage: python -m app.snapshot export [DIR] [--prune] | publish")
+        return 2
+    db = SessionLocal()
+    try:
+        if args[0] == "publish":
+            print(publish(db))
+        else:
+            print(export(db, args[1] if len(args) > 1 else None, prune="--prune" in argv))
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -20,3 +20,10 @@ def as_eastern(dt: datetime) -> datetime:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=ZoneInfo("UTC"))
     return dt.astimezone(EASTERN)
+
+
+def eastern_wall_clock(dt: datetime) -> datetime:
+    """Naive Eastern wall-clock time, so TIMESTAMP (naive, session tz) and TIMESTAMPTZ values compare."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(EASTERN).replace(tzinfo=None)
+    return dt
@@ -10,16 +10,21 @@ BEGIN;
 -- Drop existing tables
 -- =========================
 DROP TABLE IF EXISTS booking_items CASCADE;
+DROP TABLE IF EXISTS notification_outbox CASCADE;
 DROP TABLE IF EXISTS bookings CASCADE;
 DROP TABLE IF EXISTS reviews CASCADE;
 DROP TABLE IF EXISTS packages CASCADE;
 DROP TABLE IF EXISTS services CASCADE;
 DROP TABLE IF EXISTS customers CASCADE;
 DROP TABLE IF EXISTS contact_messages CASCADE;
+DROP TABLE IF EXISTS rate_limit_buckets CASCADE;
 DROP TABLE IF EXISTS blog_posts CASCADE;
 DROP TABLE IF EXISTS business_info CASCADE;
+DROP TABLE IF EXISTS slot_templates CASCADE;
+DROP TABLE IF EXISTS free_intervals CASCADE;
 DROP TABLE IF EXISTS available_slots CASCADE;
 DROP TABLE IF EXISTS faqs CASCADE;
+DROP TABLE IF EXISTS table_versions CASCADE;
 
 -- =========================
 -- Create tables (Postgres)
@@ -82,6 +87,33 @@ CREATE TABLE available_slots (
 
 CREATE INDEX ix_available_slots_id ON available_slots (id);
 
+-- Recurring weekly availability, expanded into available_slots on demand
+CREATE TABLE slot_templates (
+    id          INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    weekday     INTEGER NOT NULL,
+    open_time   VARCHAR(10) NOT NULL,
+    close_time  VARCHAR(10),
+    start_date  DATE NOT NULL,
+    end_date    DATE,
+    exceptions  TEXT,
+    created_at  TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX ix_slot_templates_id ON slot_templates (id);
+
+-- Materialized free time per slot (slot minus non-cancelled bookings); app.free_intervals
+CREATE TABLE free_intervals (
+    id                INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    available_slot_id INTEGER NOT NULL REFERENCES available_slots(id) ON DELETE CASCADE,
+    slot_start        TIMESTAMPTZ NOT NULL,
+    gap_start         TIMESTAMPTZ NOT NULL,
+    gap_end           TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX ix_free_intervals_id ON free_intervals (id);
+CREATE INDEX ix_free_intervals_available_slot_id ON free_intervals (available_slot_id);
+CREATE INDEX ix_free_intervals_slot_start ON free_intervals (slot_start);
+
 CREATE TABLE bookings (
     id                INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     customer_id       INTEGER NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
@@ -94,10 +126,61 @@ CREATE TABLE bookings (
     location          VARCHAR(500),
     notes             TEXT,
     created_at        TIMESTAMPTZ DEFAULT NOW(),
-    updated_at        TIMESTAMPTZ DEFAULT NOW()
+    updated_at        TIMESTAMPTZ DEFAULT NOW(),
+    reminded_24h_at   TIMESTAMPTZ,
+    reminded_2h_at    TIMESTAMPTZ
 );
 
 CREATE INDEX ix_bookings_id ON bookings (id);
+-- Reminder scan (app.reminders): status = 'confirmed' AND scheduled_date in (now, now + lead]
+CREATE INDEX ix_bookings_status_scheduled ON bookings (status, scheduled_date);
+-- Owner booking list: keyset (scheduled_date, id) DESC; INCLUDE covers the archived filter
+CREATE INDEX ix_bookings_schedule_keyset ON bookings (scheduled_date DESC, id DESC) INCLUDE (status, completed_at);
+
+-- Booking span as a range, kept by trigger; GiST exclusion forbids overlapping
+-- non-cancelled bookings (the app maps the violation to HTTP 409).
+ALTER TABLE bookings ADD COLUMN time_span TSTZRANGE;
+
+CREATE OR REPLACE FUNCTION bookings_set_time_span() RETURNS trigger AS $$
+BEGIN
+    NEW.time_span := tstzrange(
+        NEW.scheduled_date,
+        NEW.scheduled_date + make_interval(mins => COALESCE(NEW.duration_minutes, 120)),
+        '[)'
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bookings_time_span
+BEFORE INSERT OR UPDATE OF scheduled_date, duration_minutes ON bookings
+FOR EACH ROW EXECUTE FUNCTION bookings_set_time_span();
+
+CREATE INDEX ix_bookings_time_span ON bookings USING gist (time_span) WHERE status <> 'cancelled';
+
+ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+    EXCLUDE USING gist (time_span WITH &&) WHERE (status <> 'cancelled');
+
+-- Email/SMS queued with the booking write; sent by app.outbox with retries
+CREATE TABLE notification_outbox (
+    id              INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    kind            VARCHAR(50) NOT NULL,
+    channel         VARCHAR(10) NOT NULL,
+    recipient       VARCHAR(255) NOT NULL,
+    subject         VARCHAR(500),
+    body            TEXT NOT NULL,
+    booking_id      INTEGER REFERENCES bookings(id) ON DELETE SET NULL,
+    status          VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_error      TEXT,
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    sent_at         TIMESTAMPTZ
+);
+
+CREATE INDEX ix_notification_outbox_id ON notification_outbox (id);
+CREATE INDEX ix_notification_outbox_booking_id ON notification_outbox (booking_id);
+CREATE INDEX ix_notification_outbox_due ON notification_outbox (status, next_attempt_at);
 
 CREATE TABLE booking_items (
     id         INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -126,23 +209,52 @@ CREATE TABLE contact_messages (
     email      VARCHAR(255) NOT NULL,
     phone      VARCHAR(20),
     message    TEXT NOT NULL,
-    created_at TIMESTAMPTZ DEFAULT NOW()
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    content_hash VARCHAR(64)
 );
 
 CREATE INDEX ix_contact_messages_id ON contact_messages (id);
+-- Duplicate-submission check (routers/contact.py)
+CREATE INDEX ix_contact_messages_content_hash ON contact_messages (content_hash);
+
+-- Inbox search (crud/contact.py): weighted tsvector over name/email/message + GIN,
+-- keyset paging on (created_at, id)
+ALTER TABLE contact_messages ADD COLUMN search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english',
+            coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || translate(coalesce(email, ''), '@.', '  ')
+        ), 'A')
+        || setweight(to_tsvector('english', coalesce(message, '')), 'B')
+    ) STORED;
+CREATE INDEX ix_contact_messages_search ON contact_messages USING gin (search_vector);
+CREATE INDEX ix_contact_messages_keyset ON contact_messages (created_at DESC, id DESC);
+
+-- Contact form token buckets (app.rate_limit, RATE_LIMIT_BACKEND=postgres)
+CREATE TABLE rate_limit_buckets (
+    key        VARCHAR(255) PRIMARY KEY,
+    tokens     FLOAT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
 
 CREATE TABLE blog_posts (
     id          INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     title       VARCHAR(500) NOT NULL,
     slug        VARCHAR(500) NOT NULL UNIQUE,
     content     TEXT NOT NULL,
+    excerpt     VARCHAR(240) GENERATED ALWAYS AS (substr(content, 1, 240)) STORED,
     image_url   VARCHAR(500),
     published   BOOLEAN DEFAULT FALSE,
     created_at  TIMESTAMPTZ DEFAULT NOW(),
-    updated_at  TIMESTAMPTZ DEFAULT NOW()
+    updated_at  TIMESTAMPTZ DEFAULT NOW(),
+    -- Ranked search (crud/blog.py): title weighted above content
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
 );
 
 CREATE INDEX ix_blog_posts_id ON blog_posts (id);
+CREATE INDEX ix_blog_posts_search ON blog_posts USING gin (search_vector);
 
 CREATE TABLE business_info (
     id                          INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -171,6 +283,12 @@ CREATE TABLE faqs (
 
 CREATE INDEX ix_faqs_id ON faqs (id);
 
+-- Write counter per table, bumped in each writing transaction; ETags are built from it (app.cache)
+CREATE TABLE table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version    BIGINT NOT NULL DEFAULT 0
+);
+
 -- =========================
 -- Seed core services
 -- =========================
@@ -0,0 +1,86 @@
+"""
+The sweep (iter_bookable_starts) and precomputed-gap (iter_gap_starts) paths
+return exactly what the original nested loop (naive_bookable_starts) does, on
+randomized slots and bookings. Naive and Eastern-aware starts are the same
+wall-clock time to the cutoff filter and the calendar day summary.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app import availability_engine as engine
+from app.timezone import EASTERN
+
+
+def _windows(aware: bool):
+    tz = EASTERN if aware else None
+    day = datetime(2030, 3, 4, 8, 0, tzinfo=tz)
+    # Second window runs late: a 23:00 Eastern start is 04:00 UTC the next day
+    return [(1, day, day.replace(hour=16)), (2, day.replace(hour=20), day.replace(hour=23, minute=59))]
+
+
+@pytest.mark.parametrize("aware", [False, True])
+def test_cutoff_is_eastern_wall_clock(aware):
+    found = engine.bookable_starts(_windows(aware), [], 120, 30, time(13, 0))
+    assert [s.strftime("%H:%M") for s, _ in found][-1] == "13:00"
+    assert all(s.time() <= time(13, 0) for s, _ in found)
+
+
+@pytest.mark.parametrize("aware", [False, True])
+def test_day_summary_uses_eastern_day(aware):
+    found = engine.bookable_starts(_windows(aware), [], 30, 30)
+    days = engine.day_summary(found)
+    assert list(days) == [date(2030, 3, 4)]
+    count, earliest, latest = days[date(2030, 3, 4)]
+    assert count == len(found)
+    assert (earliest.hour, latest.hour, latest.minute) == (8, 23, 0)
+
+
+def test_naive_and_aware_agree():
+    naive = engine.bookable_starts(_windows(False), [], 90, 30, time(21, 0))
+    aware = engine.bookable_starts(_windows(True), [], 90, 30, time(21, 0))
+    assert [s for s, _ in naive] == [s.replace(tzinfo=None) for s, _ in aware]
+    assert engine.day_summary(naive).keys() == engine.day_summary(aware).keys()
+    assert naive[-1][0] - naive[0][0] == timedelta(hours=13)
+
+
+def _random_case(seed: int, aware: bool):
+    """Overlapping slots (some open-ended) and bookings over a month spanning the March DST change."""
+    rng = random.Random(seed)
+    tz = EASTERN if aware else None
+    base = datetime(2030, 3, 1, tzinfo=tz)
+    windows = []
+    for slot_id in range(1, rng.randint(5, 40)):
+        start = base + timedelta(days=rng.randrange(30), hours=rng.randint(6, 12), minutes=rng.choice((0, 15, 30)))
+        end = None if rng.random() < 0.2 else start + timedelta(hours=rng.randint(1, 12))
+        windows.append((slot_id, *engine.slot_window(start, end)))
+    windows.sort(key=lambda w: (w[1], w[0]))  # the order both sources query slots in
+    busy = []
+    for _ in range(rng.randint(0, 60)):
+        start = base + timedelta(days=rng.randrange(30), hours=rng.randint(5, 20), minutes=rng.choice((0, 15, 30, 45)))
+        busy.append((start, start + timedelta(minutes=rng.choice((60, 120, 180, 300, 420)))))
+    cutoff = rng.choice((None, time(11, 0), time(13, 30), time(17, 0)))
+    return windows, busy, rng.choice((60, 90, 120, 240, 300)), cutoff
+
+
+@pytest.mark.parametrize("aware", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_sweep_and_gaps_match_nested_loop(seed, aware):
+    windows, busy, minutes, cutoff = _random_case(seed, aware)
+    expected = engine.naive_bookable_starts(windows, busy, minutes, 30, cutoff)
+
+    timeline = engine.BusyTimeline(busy)
+    sweep = engine.dedupe_sorted(engine.iter_bookable_starts(windows, timeline, minutes, 30, cutoff))
+    # What free_intervals stores: (slot id, window start, gap start, gap end), in its read order
+    gaps = sorted(
+        ((slot_id, ws, gs, ge) for slot_id, ws, we in windows for gs, ge in timeline.gaps(ws, we)),
+        key=lambda g: (g[1], g[0], g[2]),
+    )
+    from_gaps = engine.dedupe_sorted(engine.iter_gap_starts(gaps, minutes, 30, cutoff))
+
+    def iso(found):
+        return [(s.isoformat(), slot_id) for s, slot_id in found]
+
+    assert iso(sweep) == iso(expected)
+    assert iso(from_gaps) == iso(expected)
@@ -0,0 +1,97 @@
+"""Concurrent bookings for one slot: exactly one may win, whatever the transaction mode.
+
+The database has no time_span column or exclusion constraint, so nothing but
+the transaction mode stops two check-then-insert transactions from both
+seeing a free slot. Mode "off" must therefore let several through; that is
+what shows the other two modes are doing the work.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app import booking_txn, models, outbox, package_catalog, schemas
+from app.crud import _keyset
+from app.crud import bookings as crud_bookings
+
+THREADS = 12
+SLOT = datetime(2030, 6, 4, 9, 0)
+
+
+@pytest.fixture
+def booking_setup(pg_sessionmaker, monkeypatch):
+    # No notifications: nothing is queued, so nothing could ever be sent
+    monkeypatch.setattr(outbox, "enqueue_booking_created", lambda db, booking: None)
+    # Package rows of an earlier test's database must not be served from the catalog
+    monkeypatch.setattr(package_catalog, "catalog", package_catalog.PackageCatalog())
+    # Test the modes without the constraint (a plain SELECT overlap check)
+    monkeypatch.setitem(_keyset._known_columns, ("bookings", "time_span"), False)
+    # Widen the race: every transaction sees the slot free before any inserts
+    check = crud_bookings._booking_overlaps_existing
+
+    def slow_check(*args, **kwargs):
+        result = check(*args, **kwargs)
+        time.sleep(0.2)
+        return result
+
+    monkeypatch.setattr(crud_bookings, "_booking_overlaps_existing", slow_check)
+
+    db = pg_sessionmaker()
+    service = models.Service(name="Test", slug="test")
+    db.add(service)
+    db.flush()
+    package = models.Package(service_id=service.id, name="Test", turnaround_hours=2)
+    customer = models.Customer(name="Test", email="test@example.com")
+    db.add_all([package, customer])
+    db.commit()
+    payload = schemas.BookingCreate(
+        customer_id=customer.id, package_id=package.id, scheduled_date=SLOT, location="Test"
+    )
+    db.close()
+    return pg_sessionmaker, payload
+
+
+def _race(session_factory, payload) -> tuple[int, int]:
+    """(won, booked rows) after THREADS concurrent create_booking calls for the same slot."""
+    barrier = threading.Barrier(THREADS)
+    results: list[str] = []
+
+    def attempt():
+        db = session_factory()
+        try:
+            barrier.wait()
+            crud_bookings.create_booking(db, payload)
+            results.append("won")
+        except ValueError:
+            results.append("rejected")
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=attempt) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db = session_factory()
+    try:
+        booked = db.query(models.Booking).filter(models.Booking.status != "cancelled").count()
+    finally:
+        db.close()
+    assert len(results) == THREADS
+    return results.count("won"), booked
+
+
+def test_mode_off_double_books_without_constraint(booking_setup, monkeypatch):
+    monkeypatch.setattr(booking_txn, "BOOKING_TXN_MODE", "off")
+    won, booked = _race(*booking_setup)
+    assert won > 1
+    assert booked == won
+
+
+@pytest.mark.parametrize("mode", ["advisory", "serializable"])
+def test_mode_allows_exactly_one_booking(booking_setup, monkeypatch, mode):
+    monkeypatch.setattr(booking_txn, "BOOKING_TXN_MODE", mode)
+    won, booked = _race(*booking_setup)
+    assert won == 1
+    assert booked == 1
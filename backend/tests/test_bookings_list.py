@@ -0,0 +1,55 @@
+"""
+Owner booking list: limit above the page maximum is clamped (not a 422), and
+the cursor walks the rest.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import get_db
+from app.routers import bookings
+
+
+@pytest.fixture
+def client(sqlite_sessionmaker, monkeypatch):
+    monkeypatch.setattr(bookings, "BOOKINGS_PAGE_MAX", 3)
+    db = sqlite_sessionmaker()
+    customer = models.Customer(name="List", email="list@example.com")
+    db.add(customer)
+    db.flush()
+    for i in range(5):
+        db.add(models.Booking(
+            customer_id=customer.id, scheduled_date=datetime(2030, 1, 7, 9) + timedelta(days=i), status="pending"
+        ))
+    db.commit()
+    db.close()
+
+    def session():
+        s = sqlite_sessionmaker()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    app = FastAPI()
+    app.include_router(bookings.router, prefix="/api/bookings")
+    app.dependency_overrides[get_db] = session
+    return TestClient(app)
+
+
+def test_limit_above_max_is_clamped(client):
+    first = client.get("/api/bookings/with-details", params={"limit": 1000})
+    assert first.status_code == 200, first.text
+    assert len(first.json()) == 3
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/api/bookings/with-details", params={"limit": 1000, "cursor": cursor})
+    assert rest.status_code == 200 and len(rest.json()) == 2
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_zero_limit_is_empty(client):
+    response = client.get("/api/bookings/with-details", params={"limit": 0})
+    assert response.status_code == 200 and response.json() == []
@@ -0,0 +1,60 @@
+"""
+Contact form: resubmitting the same message within the dedupe window keeps one
+row, sends one email and says so in the response.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import models, rate_limit
+from app.database import get_db
+from app.routers import contact
+
+
+@pytest.fixture
+def client(sqlite_sessionmaker, monkeypatch):
+    sent = []
+    monkeypatch.setattr(contact, "_send_contact_emails", sent.append)
+    monkeypatch.setattr(rate_limit, "_memory", rate_limit.MemoryBackend())
+
+    def session():
+        s = sqlite_sessionmaker()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    app = FastAPI()
+    app.include_router(contact.router, prefix="/api/contact")
+    app.dependency_overrides[get_db] = session
+    return TestClient(app), sqlite_sessionmaker, sent
+
+
+def test_duplicate_submission_is_flagged(client):
+    http, maker, sent = client
+    payload = {"name": "Sam", "email": "sam@example.com", "message": "Do you detail boats?"}
+    first = http.post("/api/contact", json=payload)
+    assert first.status_code == 200, first.text
+    assert first.json()["duplicate"] is False
+
+    # Same sender and text, differing only in case and spacing
+    again = http.post("/api/contact", json={**payload, "message": "do you  detail BOATS?"})
+    assert again.status_code == 200, again.text
+    assert again.json()["duplicate"] is True
+    assert again.json()["id"] == first.json()["id"]
+
+    db = maker()
+    try:
+        assert db.query(models.ContactMessage).count() == 1
+    finally:
+        db.close()
+    assert len(sent) == 1
+
+
+def test_different_message_is_not_a_duplicate(client):
+    http, maker, sent = client
+    http.post("/api/contact", json={"name": "Sam", "email": "sam@example.com", "message": "First"})
+    second = http.post("/api/contact", json={"name": "Sam", "email": "sam@example.com", "message": "Second"})
+    assert second.status_code == 200, second.text
+    assert second.json()["duplicate"] is False
+    assert len(sent) == 2
@@ -0,0 +1,86 @@
+"""
+The materialized free_intervals table and the per-request sweep must offer the
+same bookable starts, UTC offset included (the API serializes them as given).
+Runs on SQLite, and with TEST_DATABASE_URL on Postgres twice: the create_all
+schema (TIMESTAMP) and the reset_and_seed.sql schema (TIMESTAMPTZ).
+"""
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from app import availability_engine as engine
+from app import free_intervals, models
+from app.routers import availability
+from app.timezone import EASTERN
+
+DAY = datetime(2030, 5, 6, 9, 0)
+
+
+@pytest.fixture(params=["sqlite", "pg", "pg_seed"])
+def db(request):
+    maker = request.getfixturevalue(f"{request.param}_sessionmaker")
+    session = maker()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _seed(db):
+    customer = models.Customer(name="Equivalence", email="eq@example.com")
+    service = models.Service(name="Detail", slug="detail")
+    db.add_all([customer, service])
+    db.flush()
+    package = models.Package(service_id=service.id, name="Full", turnaround_hours=2)
+    db.add(package)
+    slots = [
+        models.AvailableSlot(slot_start=DAY, slot_end=DAY + timedelta(hours=9)),
+        models.AvailableSlot(slot_start=DAY + timedelta(days=1), slot_end=DAY + timedelta(days=1, hours=6)),
+        # Open until end of day
+        models.AvailableSlot(slot_start=DAY + timedelta(days=2, hours=3), slot_end=None),
+        # Overlaps the first slot
+        models.AvailableSlot(slot_start=DAY + timedelta(hours=4), slot_end=DAY + timedelta(hours=11)),
+    ]
+    db.add_all(slots)
+    db.flush()
+    free_intervals.refresh_slots(db, [s.id for s in slots])
+    bookings = [
+        (DAY + timedelta(hours=1), 120, "pending"),
+        (DAY + timedelta(hours=5, minutes=30), 90, "confirmed"),
+        (DAY + timedelta(days=1), None, "pending"),  # default duration
+        (DAY + timedelta(days=1, hours=2), 60, "cancelled"),
+        (DAY + timedelta(days=2, hours=6), 150, "completed"),
+        # Evening before the second day, running past midnight
+        (DAY + timedelta(hours=14, minutes=30), 600, "pending"),
+    ]
+    for scheduled, minutes, status in bookings:
+        db.add(models.Booking(
+            customer_id=customer.id, package_id=package.id, scheduled_date=scheduled,
+            duration_minutes=minutes, status=status,
+        ))
+        db.flush()
+        # What crud.bookings does after each write
+        free_intervals.refresh_booking_span(db, scheduled, minutes)
+    db.commit()
+
+
+def _starts(db, monkeypatch, source, start, end, minutes, cutoff):
+    monkeypatch.setattr(availability, "BOOKABLE_SLOTS_SOURCE", source)
+    found = engine.dedupe_sorted(availability._iter_starts(db, start, end, minutes, cutoff))
+    # isoformat: equal instants with different offsets (or none) still differ
+    return [(s.isoformat(), slot_id) for s, slot_id in found]
+
+
+@pytest.mark.parametrize("minutes", [60, 120, 240])
+@pytest.mark.parametrize("cutoff", [None, time(13, 0)])
+@pytest.mark.parametrize("aware_bounds", [False, True])
+def test_materialized_matches_sweep(db, monkeypatch, minutes, cutoff, aware_bounds):
+    _seed(db)
+    assert free_intervals.check(db) == []
+    start, end = DAY - timedelta(days=1), DAY + timedelta(days=5)
+    if aware_bounds:  # the route defaults to now_eastern(), which is aware
+        start, end = start.replace(tzinfo=EASTERN), end.replace(tzinfo=EASTERN)
+    sweep = _starts(db, monkeypatch, "sweep", start, end, minutes, cutoff)
+    materialized = _starts(db, monkeypatch, "materialized", start, end, minutes, cutoff)
+    assert sweep
+    assert materialized == sweep
@@ -0,0 +1,70 @@
+"""
+Shared table versions on a database without table_versions (Lambda skips
+create_all): cached GETs and writes keep working on per-process generations,
+and pick the table up once it exists.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import cache, http_cache
+from app.database import Base, get_db
+from app.routers import business, services
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(
+        bind=engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "table_versions"]
+    )
+    monkeypatch.setattr(cache, "_shared_table_exists", None)
+    monkeypatch.setattr(cache, "_shared_table_checked_at", float("-inf"))
+    monkeypatch.setattr(cache, "_shared_loaded_at", float("-inf"))
+    monkeypatch.setattr(cache, "_shared_versions", {})
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_VERSION_TTL", 0)
+    maker = sessionmaker(bind=engine, autoflush=False)
+
+    def db():
+        session = maker()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(business.router, prefix="/api/business")
+    app.include_router(services.router, prefix="/api/services")
+    app.add_exception_handler(http_cache.NotModified, lambda request, exc: http_cache.not_modified_response(exc))
+    app.dependency_overrides[get_db] = db
+    try:
+        yield TestClient(app), engine
+    finally:
+        engine.dispose()
+
+
+def test_missing_table_falls_back_to_local_generations(setup, monkeypatch):
+    client, engine = setup
+    first = client.get("/api/business/faq")
+    assert first.status_code == 200 and "ETag" in first.headers
+    assert client.get("/api/business/faq", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    created = client.post("/api/services", json={"name": "Wash", "slug": "wash"})
+    assert created.status_code == 200, created.text
+    listed = client.get("/api/services")
+    assert listed.status_code == 200 and [s["slug"] for s in listed.json()] == ["wash"]
+
+    faq = client.post("/api/business/faq", json={"question": "Q?", "answer": "A."})
+    assert faq.status_code == 200, faq.text
+    # The local generation moved, so the old tag no longer matches
+    again = client.get("/api/business/faq", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 200 and len(again.json()) == 1
+
+    # Once created (cold start on Lambda), writes bump the shared row
+    cache.ensure_shared_table(engine)
+    assert client.post("/api/services", json={"name": "Wax", "slug": "wax"}).status_code == 200
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM table_versions WHERE table_name = 'services'")).scalar() == 1
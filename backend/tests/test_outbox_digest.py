@@ -0,0 +1,68 @@
+"""
+Owner digest: held entries are flushed per channel, so a missing owner email
+doesn't swallow the SMS digest (or the other way round).
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app import models, notify, outbox
+
+
+def _booking(i: int):
+    return SimpleNamespace(
+        id=None,
+        customer=SimpleNamespace(name=f"Digest Customer {i}", email=f"digest{i}@example.com", phone=None),
+        scheduled_date=datetime(2030, 1, 7, 9, 0) + timedelta(days=i),
+        booking_items=[],
+        package=SimpleNamespace(name="Full Detail", service_name="Interior & Exterior"),
+        location=None,
+        notes=None,
+    )
+
+
+@pytest.fixture
+def db(sqlite_sessionmaker, monkeypatch):
+    monkeypatch.setattr(outbox, "OWNER_DIGEST_MINUTES", 60)
+    monkeypatch.setattr(outbox, "OWNER_DIGEST_MAX_BOOKINGS", 3)
+    session = sqlite_sessionmaker()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _rows(db, **criteria):
+    return db.query(models.NotificationOutbox).filter_by(**criteria).order_by(models.NotificationOutbox.id).all()
+
+
+@pytest.mark.parametrize(
+    "owner_email, owner_phone, channels",
+    [
+        ("owner@example.com", "5555550100", ["email", "sms"]),
+        ("", "5555550100", ["sms"]),
+        ("owner@example.com", "", ["email"]),
+    ],
+)
+def test_each_channel_flushes_its_own_digest(db, monkeypatch, owner_email, owner_phone, channels):
+    monkeypatch.setattr(notify, "OWNER_EMAIL", owner_email)
+    monkeypatch.setattr(notify, "OWNER_PHONE", owner_phone)
+    for i in range(2):
+        outbox.enqueue_booking_created(db, _booking(i))
+    db.commit()
+    assert sorted(r.channel for r in _rows(db, status="held")) == sorted(channels * 2)
+    # Two bookings: under the count and inside the window
+    assert outbox.flush_owner_digest(db) == 0
+
+    outbox.enqueue_booking_created(db, _booking(2))
+    db.commit()
+    assert outbox.flush_owner_digest(db) == 3
+    assert _rows(db, status="held") == []
+    digests = _rows(db, kind="owner_digest")
+    assert sorted(r.channel for r in digests) == sorted(channels)
+    for r in digests:
+        assert r.status == "pending"
+        assert "3 new booking requests" in (r.subject if r.channel == "email" else r.body)
+    # Customer emails were never held
+    assert len(_rows(db, kind="booking_created", status="pending")) == 3
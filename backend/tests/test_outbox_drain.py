@@ -0,0 +1,52 @@
+"""
+A send still running at the drain deadline is recorded later in the database
+drain was given, never in DATABASE_URL's.
+"""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models, notify, outbox
+from app.database import Base
+
+
+@pytest.fixture
+def maker(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[models.NotificationOutbox.__table__])
+    try:
+        yield sessionmaker(bind=engine, autoflush=False)
+    finally:
+        engine.dispose()
+
+
+def test_late_send_is_finished_in_the_drained_database(maker, monkeypatch):
+    def slow_deliver(channel, recipient, subject, body):
+        time.sleep(0.5)
+        return True
+
+    def no_default_session():
+        raise AssertionError("late finish opened a DATABASE_URL session")
+
+    monkeypatch.setattr(notify, "channel_configured", lambda channel: True)
+    monkeypatch.setattr(notify, "deliver", slow_deliver)
+    monkeypatch.setattr(database, "SessionLocal", no_default_session)
+
+    db = maker()
+    outbox.enqueue(db, "booking_created", [{"channel": "email", "recipient": "late@example.com", "body": "hi"}])
+    db.commit()
+    result = outbox.drain(db, budget_seconds=0.1)
+    db.close()
+    assert result["unfinished"] == 1
+
+    o = models.NotificationOutbox
+    for _ in range(40):
+        check = maker()
+        status, sent_at = check.query(o.status, o.sent_at).one()
+        check.close()
+        if status != "sending":
+            break
+        time.sleep(0.05)
+    assert status == "sent" and sent_at is not None
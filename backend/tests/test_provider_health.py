@@ -0,0 +1,101 @@
+"""Breaker, 429 quota memory and EWMA routing, against app.fake_providers on localhost."""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import email_send, fake_providers, provider_health, provider_http
+
+COOLDOWN = 0.3
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Fake Resend/Brevo/MailerSend on localhost with fresh provider health."""
+    providers = fake_providers.FakeProviders(seed=0)
+    server, base_url = fake_providers.start(providers)
+    for name in ("RESEND", "BREVO", "MAILERSEND"):
+        monkeypatch.setattr(email_send, f"{name}_API_BASE", base_url)
+        monkeypatch.setattr(email_send, f"{name}_API_KEY", "fake")
+        monkeypatch.setattr(email_send, f"{name}_FROM", "Fake <bookings@example.com>")
+    monkeypatch.setattr(provider_health, "_registry", {})
+    monkeypatch.setattr(provider_health, "PROVIDER_BREAKER_THRESHOLD", 3)
+    monkeypatch.setattr(provider_health, "PROVIDER_BREAKER_COOLDOWN", COOLDOWN)
+    yield providers
+    server.shutdown()
+    provider_http.close_all()
+
+
+def _send() -> bool:
+    return email_send.send_email("customer@example.com", "Booking", "Hello")
+
+
+def _calls(providers, name: str) -> int:
+    return providers.stats()[name]["requests"]
+
+
+def test_429_parks_provider_until_retry_after(fake):
+    fake.configure({"resend": {"burst_every": 1000, "burst_len": 1, "retry_after": 1}})
+    before = datetime.now(timezone.utc)
+    assert _send()
+    resend = provider_health.get("resend")
+    assert resend.quota_exhausted_until is not None
+    assert timedelta(seconds=0.5) < resend.quota_exhausted_until - before < timedelta(seconds=2)
+    assert _calls(fake, "brevo") == 1
+
+    assert _send()
+    assert _calls(fake, "resend") == 1  # parked: not even tried
+    assert _calls(fake, "brevo") == 2
+
+    time.sleep(1.1)
+    assert _send()
+    assert _calls(fake, "resend") == 2
+    assert fake.stats()["resend"]["ok"] == 1
+
+
+def test_429_without_retry_after_parks_provider_until_midnight_utc(fake):
+    fake.configure({"resend": {"burst_every": 1000, "burst_len": 1, "retry_after": -1}})
+    assert _send()
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    assert provider_health.get("resend").quota_exhausted_until == midnight
+    assert "resend" not in provider_health.order(email_send.configured_providers())
+
+
+def test_breaker_opens_then_half_opens(fake):
+    fake.configure({"resend": {"error_rate": 1.0}})
+    for _ in range(3):
+        assert _send()  # delivered by Brevo each time
+    resend = provider_health.get("resend")
+    assert resend.state == "open"
+    assert _send()
+    assert _calls(fake, "resend") == 3  # open: skipped
+
+    # Cooldown over: one trial call; it fails, so the breaker opens again
+    time.sleep(COOLDOWN + 0.05)
+    assert _send()
+    assert _calls(fake, "resend") == 4
+    assert resend.state == "open"
+
+    # Next trial succeeds and closes it
+    fake.configure({"resend": {"error_rate": 0.0}})
+    time.sleep(COOLDOWN + 0.05)
+    assert _send()
+    assert _calls(fake, "resend") == 5
+    assert resend.state == "closed"
+    assert resend.consecutive_failures == 0
+
+
+def test_routing_moves_to_healthy_provider(fake, monkeypatch):
+    # Breaker out of the way: only the success-rate EWMA reorders providers
+    monkeypatch.setattr(provider_health, "PROVIDER_BREAKER_THRESHOLD", 1000)
+    fake.configure({"resend": {"error_rate": 1.0}})
+    assert provider_health.order(email_send.configured_providers())[0] == "resend"
+    while provider_health.get("resend").ewma_success >= provider_health.DEGRADED_SUCCESS_RATE:
+        assert _send()
+    tried = _calls(fake, "resend")
+    assert provider_health.order(email_send.configured_providers()) == ["brevo", "mailersend", "resend"]
+
+    assert _send()
+    assert _calls(fake, "resend") == tried  # Brevo answered first; degraded Resend not needed
+    assert provider_health.get("brevo").successes == tried + 1
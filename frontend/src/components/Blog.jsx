@@ -9,7 +9,7 @@ function Blog({ id }) {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    axios.get(`${API_BASE}/api/blog/?limit=3`)
+    axios.get(`${API_BASE}/api/blog/?limit=3&view=summary`)
       .then((res) => setPosts(res.data))
       .catch(() => setPosts([]))
       .finally(() => setLoading(false));
@@ -28,7 +28,7 @@ function Blog({ id }) {
               posts.map((post) => (
                 <Link to={`/blog#${post.slug}`} key={post.id} className="blog-card">
                   <h3>{post.title}</h3>
-                  <p>{post.content?.slice(0, 120)}...</p>
+                  <p>{post.excerpt?.slice(0, 120)}...</p>
                   <span>Read more →</span>
                 </Link>
               ))
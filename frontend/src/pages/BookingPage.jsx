@@ -38,10 +38,9 @@ function BookingPage() {
     let cancelled = false;
     (async () => {
       try {
-        const servicesRes = await axios.get(`${API_BASE}/api/services/`);
-        for (const svc of servicesRes.data) {
-          const pkgRes = await axios.get(`${API_BASE}/api/services/${svc.id}/packages`);
-          const pkg = pkgRes.data.find((p) => p.id === parseInt(preselectedPackageId, 10));
+        const catalogRes = await axios.get(`${API_BASE}/api/catalog`);
+        for (const svc of catalogRes.data) {
+          const pkg = svc.packages.find((p) => p.id === parseInt(preselectedPackageId, 10));
           if (pkg && !cancelled) {
             addItem({ id: pkg.id, name: pkg.name, price: pkg.price, service_name: svc.name });
             break;